@@ -0,0 +1,251 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Minimal in-memory WAPI server for benchmarks
+
+Supports search with paging, fetch by reference, create, update, delete,
+function calls and 'request' object, which is enough to drive Connector,
+objects and object_manager. Search matches fields by exact value and
+extensible attributes passed as '*Name=value'. Every reply is delayed
+by 'latency' seconds to simulate network and NIOS processing time.
+"""
+
+import base64
+import json
+import threading
+import time
+
+import six
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+from six.moves.urllib import parse
+
+AUTH_COOKIE = 'ibapauth'
+
+# fields used to build readable part of object reference
+REF_FIELDS = ('network', 'ipv4addr', 'ipv6addr', 'name', 'fqdn',
+              'start_addr')
+
+
+class FakeWapi(object):
+    """Thread safe in-memory store of WAPI objects"""
+
+    def __init__(self, page_size=1000):
+        self.page_size = page_size
+        self.objects = {}
+        self._refs = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def _make_ref(self, obj_type, obj):
+        self._next_id += 1
+        name = next((str(obj[field]) for field in REF_FIELDS
+                     if field in obj), '')
+        return '%s/ZG5z%08d:%s' % (obj_type, self._next_id, name)
+
+    def add(self, obj_type, obj):
+        with self._lock:
+            obj = dict(obj)
+            obj['_ref'] = self._make_ref(obj_type, obj)
+            self.objects.setdefault(obj_type, {})[obj['_ref']] = obj
+            self._refs[obj['_ref']] = obj_type
+            return obj
+
+    @staticmethod
+    def _matches(obj, params):
+        for key, value in params.items():
+            if key.startswith('*'):
+                ea = obj.get('extattrs', {}).get(key[1:], {})
+                if str(ea.get('value')) != value:
+                    return False
+            elif key.startswith('_'):
+                continue
+            elif str(obj.get(key)) != value:
+                return False
+        return True
+
+    def search(self, obj_type, params):
+        with self._lock:
+            found = [obj for obj in self.objects.get(obj_type, {}).values()
+                     if self._matches(obj, params)]
+        if '_paging' not in params:
+            return 200, found[:abs(int(params.get('_max_results', 1000)))]
+        page_size = min(self.page_size, int(params['_max_results']))
+        start = int(params.get('_page_id', 0))
+        reply = {'result': found[start:start + page_size]}
+        if start + page_size < len(found):
+            reply['next_page_id'] = str(start + page_size)
+        return 200, reply
+
+    def get(self, ref):
+        with self._lock:
+            obj_type = self._refs.get(ref)
+            if obj_type is None:
+                return 404, {'Error': 'AdmConDataNotFoundError'}
+            return 200, self.objects[obj_type][ref]
+
+    def create(self, obj_type, data, params):
+        obj = self.add(obj_type, data)
+        if '_return_fields' in params or '_return_fields+' in params:
+            return 201, obj
+        return 201, obj['_ref']
+
+    def update(self, ref, data):
+        with self._lock:
+            obj_type = self._refs.get(ref)
+            if obj_type is None:
+                return 404, {'Error': 'AdmConDataNotFoundError'}
+            self.objects[obj_type][ref].update(data)
+        return 200, ref
+
+    def delete(self, ref):
+        with self._lock:
+            obj_type = self._refs.pop(ref, None)
+            if obj_type is None:
+                return 404, {'Error': 'AdmConDataNotFoundError'}
+            del self.objects[obj_type][ref]
+        return 200, ref
+
+    def call_func(self, ref, func_name, data):
+        num = data.get('num', 1) if data else 1
+        if func_name == 'next_available_ip':
+            return 200, {'ips': ['10.0.0.%d' % (i + 1) for i in range(num)]}
+        return 200, {}
+
+    def multi_request(self, data):
+        replies = []
+        for item in data:
+            code, reply = self.handle(item['method'].upper(), item['object'],
+                                      item.get('args', {}),
+                                      item.get('data'))
+            if code >= 400:
+                return code, reply
+            replies.append(reply)
+        return 200, replies
+
+    def handle(self, method, path, params, data):
+        obj_type, _, ref_id = path.partition('/')
+        if method == 'GET':
+            if ref_id:
+                return self.get(path)
+            return self.search(obj_type, params)
+        if method == 'POST':
+            if obj_type == 'request':
+                return self.multi_request(data)
+            if '_function' in params:
+                return self.call_func(path, params['_function'], data)
+            return self.create(obj_type, data or {}, params)
+        if method == 'PUT':
+            return self.update(path, data or {})
+        if method == 'DELETE':
+            return self.delete(path)
+        return 400, {'Error': 'Unsupported method'}
+
+
+class WapiRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _handle(self):
+        url = parse.urlsplit(self.path)
+        # /wapi/v2.5/<object type or reference>
+        path = parse.unquote(url.path.split('/', 3)[3])
+        params = dict(parse.parse_qsl(url.query, keep_blank_values=True))
+        length = int(self.headers.get('Content-Length') or 0)
+        data = json.loads(self.rfile.read(length)) if length else None
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        cookie = None
+        if self.server.credentials is None:
+            authorized = True
+        else:
+            authorized, cookie = self.server.authorize(
+                self.headers.get('Cookie'), self.headers.get('Authorization'))
+        if authorized:
+            code, reply = self.server.wapi.handle(self.command, path,
+                                                  params, data)
+        else:
+            code, reply = 401, {'Error': 'Unauthorized'}
+        body = json.dumps(reply).encode('utf-8')
+        self.send_response(code)
+        if cookie:
+            self.send_header('Set-Cookie', '%s=%s; Path=/' % (
+                AUTH_COOKIE, cookie))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeWapiServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    """Serves FakeWapi over HTTP
+
+    If credentials are set, requests are authorized by basic auth, which
+    sets a session cookie, or by the session cookie. Number of basic auth
+    logins is counted in 'logins'.
+    """
+
+    def __init__(self, wapi, latency=0, address=('127.0.0.1', 0),
+                 credentials=None):
+        BaseHTTPServer.HTTPServer.__init__(self, address, WapiRequestHandler)
+        self.wapi = wapi
+        self.latency = latency
+        self.credentials = credentials
+        self.logins = 0
+        self._sessions = set()
+        self._lock = threading.Lock()
+
+    def authorize(self, cookie_header, auth_header):
+        """Returns (authorized, new session cookie or None)"""
+        cookies = dict(cookie.strip().partition('=')[::2]
+                       for cookie in (cookie_header or '').split(';'))
+        with self._lock:
+            if cookies.get(AUTH_COOKIE) in self._sessions:
+                return True, None
+            basic = 'Basic ' + base64.b64encode(
+                ('%s:%s' % self.credentials).encode('utf-8')).decode('ascii')
+            if auth_header != basic:
+                return False, None
+            self.logins += 1
+            cookie = 'session%d' % self.logins
+            self._sessions.add(cookie)
+            return True, cookie
+
+    def expire_sessions(self):
+        with self._lock:
+            self._sessions.clear()
+
+    def wapi_url(self, wapi_version):
+        return 'http://%s:%d/wapi/v%s/' % (self.server_address[0],
+                                           self.server_address[1],
+                                           wapi_version)
+
+
+def make_networks(count, ea_count=5, network_view='default'):
+    """Generates network objects with 'ea_count' extensible attributes"""
+    for i in six.moves.range(count):
+        cidr = '10.%d.%d.0/24' % (i // 256 % 256, i % 256)
+        extattrs = dict(('Attribute %d' % n, {'value': 'value %d' % i})
+                        for n in range(ea_count))
+        yield {'network': cidr,
+               'network_view': network_view,
+               'comment': 'Benchmark network %d' % i,
+               'extattrs': extattrs}
@@ -0,0 +1,94 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Compares installed JSON codecs on WAPI payload shapes
+
+Usage:
+    python -m benchmarks.json_codecs [--duration SECONDS]
+"""
+
+import argparse
+import collections
+import sys
+
+from benchmarks import fake_wapi
+from infoblox_client import json_codec
+from infoblox_client import utils
+
+
+def host_record(i):
+    return {'name': 'host%d.example.com' % i,
+            'view': 'default',
+            'ipv4addrs': [{'ipv4addr': '10.0.%d.%d' % (i // 256 % 256,
+                                                       i % 256),
+                           'mac': 'aa:bb:cc:dd:ee:ff',
+                           'configure_for_dhcp': True}],
+            'extattrs': {'Tenant ID': {'value': 'tenant-%d' % i},
+                         'VM ID': {'value': 'vm-%d' % i}}}
+
+
+def payloads():
+    networks = list(fake_wapi.make_networks(1000, ea_count=10))
+    for network in networks:
+        network['_ref'] = 'network/ZG5zLm5ldHdvcms6:%s/default' % (
+            network['network'])
+    return collections.OrderedDict([
+        # request bodies
+        ('create host record', host_record(1)),
+        ('multi request x100', [{'method': 'POST',
+                                 'object': 'record:host',
+                                 'data': host_record(i)}
+                                for i in range(100)]),
+        # replies
+        ('search reply x1', [networks[0]]),
+        ('paged reply x1000', {'result': networks,
+                               'next_page_id': '789c:page2'}),
+    ])
+
+
+def measure(func, arg, duration):
+    """Returns number of calls per second, calls func for 'duration'"""
+    calls = 0
+    start = utils.monotonic()
+    while True:
+        func(arg)
+        calls += 1
+        elapsed = utils.monotonic() - start
+        if elapsed >= duration:
+            return calls / elapsed
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--duration', type=float, default=0.5,
+                        help='time to measure each operation, seconds')
+    options = parser.parse_args(sys.argv[1:] if args is None else args)
+
+    codecs = [codec_class() for codec_class in json_codec.CODECS
+              if codec_class.available()]
+    print('%-22s %-8s %14s %14s %10s' % ('payload', 'codec', 'dumps/sec',
+                                         'loads/sec', 'bytes'))
+    for name, payload in payloads().items():
+        for codec in codecs:
+            data = codec.dumps(payload)
+            print('%-22s %-8s %14.0f %14.0f %10d' % (
+                name, codec.name,
+                measure(codec.dumps, payload, options.duration),
+                measure(codec.loads, data, options.duration),
+                len(data)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
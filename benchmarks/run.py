@@ -0,0 +1,237 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Client throughput benchmarks against local fake WAPI server
+
+Usage:
+    python -m benchmarks.run [--objects N] [--page-size N] [--latency S]
+                             [--iterations N] [--stream-pages] [--json FILE]
+                             [--compare FILE [--threshold PERCENT]]
+
+Fake WAPI server runs in a separate process, so peak memory reported
+for each case is allocated by the client only. With --compare, results
+are checked against a previous --json run and the command fails if
+ops/sec of any case dropped by more than --threshold percent.
+"""
+
+import argparse
+import collections
+import gc
+import json
+import multiprocessing
+import sys
+
+try:
+    import tracemalloc
+except ImportError:  # pragma: no cover
+    tracemalloc = None
+
+from benchmarks import fake_wapi
+from infoblox_client import connector
+from infoblox_client import object_manager
+from infoblox_client import objects
+from infoblox_client import utils
+
+
+def serve(pipe, options):
+    wapi = fake_wapi.FakeWapi(page_size=options.page_size)
+    for network in fake_wapi.make_networks(options.objects,
+                                           ea_count=options.ea_count):
+        wapi.add('network', network)
+    server = fake_wapi.FakeWapiServer(wapi, latency=options.latency)
+    pipe.send(server.wapi_url(options.wapi_version))
+    server.serve_forever()
+
+
+def start_server(options):
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=serve, args=(child, options))
+    process.daemon = True
+    process.start()
+    return process, parent.recv()
+
+
+def make_connector(options, wapi_url):
+    conn = connector.Connector({'host': '127.0.0.1',
+                                'username': 'admin',
+                                'password': 'admin',
+                                'wapi_version': options.wapi_version,
+                                'max_results': options.page_size,
+                                'paging': True,
+                                'stream_pages': options.stream_pages,
+                                'json_codec': options.json_codec,
+                                'http_request_timeout': 60})
+    # fake server speaks plain http
+    conn.wapi_url = wapi_url
+    return conn
+
+
+def new_cidr(i):
+    return '172.%d.%d.0/24' % (16 + i // 65536 % 16, i // 256 % 256)
+
+
+def bench_get_object_paging(conn, i):
+    conn.get_object('network', {'network_view': 'default'}, paging=True)
+
+
+def bench_search_all(conn, i):
+    objects.Network.search_all(conn, network_view='default')
+
+
+def bench_iter_search(conn, i):
+    for network in objects.Network.iter_search(conn,
+                                               network_view='default'):
+        pass
+
+
+def bench_has_networks(conn, i):
+    object_manager.InfobloxObjectManager(conn).has_networks('default')
+
+
+def bench_count(conn, i):
+    objects.Network.count(conn, network_view='default')
+
+
+def bench_create_check_exists(conn, i):
+    objects.Network.create_check_exists(conn, network_view='default',
+                                        cidr=new_cidr(i))
+
+
+def bench_object_manager(conn, i):
+    manager = object_manager.InfobloxObjectManager(conn)
+    cidr = '192.168.%d.0/24' % (i % 256)
+    ip = '192.168.%d.10' % (i % 256)
+    manager.create_network('default', cidr)
+    manager.get_network('default', cidr)
+    manager.create_fixed_address_for_given_ip('default', 'aa:bb:cc:dd:ee:ff',
+                                              ip, None)
+    manager.delete_fixed_address('default', ip)
+    manager.delete_network('default', cidr)
+
+
+CASES = collections.OrderedDict([
+    ('get_object_paging', bench_get_object_paging),
+    ('search_all', bench_search_all),
+    ('iter_search', bench_iter_search),
+    ('has_networks', bench_has_networks),
+    ('count', bench_count),
+    ('create_check_exists', bench_create_check_exists),
+    ('object_manager', bench_object_manager),
+])
+
+
+def percentile(sorted_values, percent):
+    index = int(round(percent / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[index]
+
+
+def run_case(func, conn, iterations):
+    # warm up connection pool and caches
+    func(conn, iterations)
+    gc.collect()
+    if tracemalloc is not None:
+        tracemalloc.start()
+    latencies = []
+    start = utils.monotonic()
+    for i in range(iterations):
+        op_start = utils.monotonic()
+        func(conn, i)
+        latencies.append(utils.monotonic() - op_start)
+    total = utils.monotonic() - start
+    peak = None
+    if tracemalloc is not None:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    latencies.sort()
+    return {'ops_per_sec': iterations / total,
+            'p50': percentile(latencies, 50),
+            'p99': percentile(latencies, 99),
+            'peak_memory': peak}
+
+
+def print_results(results):
+    print('%-22s %12s %10s %10s %14s' % ('case', 'ops/sec', 'p50 ms',
+                                         'p99 ms', 'peak memory KB'))
+    for name, result in results.items():
+        peak = result['peak_memory']
+        print('%-22s %12.2f %10.2f %10.2f %14s' % (
+            name, result['ops_per_sec'], result['p50'] * 1000,
+            result['p99'] * 1000, '-' if peak is None else peak // 1024))
+
+
+def compare(results, baseline, threshold):
+    """Returns list of cases that are slower than baseline"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]['ops_per_sec']
+        change = (result['ops_per_sec'] - old) / old * 100
+        if change < -threshold:
+            regressions.append('%s: %.2f -> %.2f ops/sec (%.1f%%)' % (
+                name, old, result['ops_per_sec'], change))
+    return regressions
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--objects', type=int, default=2000,
+                        help='number of networks on the fake server')
+    parser.add_argument('--ea-count', type=int, default=5,
+                        help='extensible attributes per network')
+    parser.add_argument('--page-size', type=int, default=1000,
+                        help='objects per page of paged search')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='server side delay of each reply, seconds')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--wapi-version', default='2.5')
+    parser.add_argument('--json-codec', default='auto',
+                        help='json_codec connector option')
+    parser.add_argument('--stream-pages', action='store_true',
+                        help='decode paged replies while downloading')
+    parser.add_argument('--case', action='append', choices=list(CASES),
+                        help='case to run, may be repeated (default: all)')
+    parser.add_argument('--json', help='write results to file')
+    parser.add_argument('--compare', help='results of previous run')
+    parser.add_argument('--threshold', type=float, default=10.0,
+                        help='allowed ops/sec drop, percent')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    options = parse_args(sys.argv[1:] if args is None else args)
+    process, wapi_url = start_server(options)
+    try:
+        conn = make_connector(options, wapi_url)
+        results = collections.OrderedDict()
+        for name in options.case or CASES:
+            results[name] = run_case(CASES[name], conn, options.iterations)
+    finally:
+        process.terminate()
+
+    print_results(results)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    if options.compare:
+        with open(options.compare) as f:
+            regressions = compare(results, json.load(f), options.threshold)
+        if regressions:
+            print('Regressions:\n' + '\n'.join(regressions))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,303 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+
+import netaddr
+
+from infoblox_client import objects as obj
+from infoblox_client import prefix_index
+from infoblox_client import replica
+
+# binding states of leases that do not hold their address
+FREE_LEASE_STATES = ('FREE', 'BACKUP', 'EXPIRED', 'RELEASED', 'RESET')
+
+DEFAULT_CLASSES = (obj.FixedAddress, obj.HostRecord, obj.DHCPLease,
+                   obj.IPRange)
+
+
+class IntervalSet(object):
+    """Set of integers kept as sorted disjoint inclusive intervals
+
+    Adjacent and overlapping intervals are merged, so memory depends on
+    the number of gaps, not on the number of integers.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._ends = []
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        return iter(zip(self._starts, self._ends))
+
+    def __contains__(self, value):
+        i = bisect.bisect_right(self._starts, value)
+        return bool(i) and value <= self._ends[i - 1]
+
+    @property
+    def count(self):
+        """Number of integers in the set"""
+        return sum(end - start + 1
+                   for start, end in zip(self._starts, self._ends))
+
+    def add(self, start, end):
+        # intervals ending right before start up to ones starting right
+        # after end are merged with the new one
+        i = bisect.bisect_left(self._ends, start - 1)
+        j = bisect.bisect_right(self._starts, end + 1)
+        if i < j:
+            start = min(start, self._starts[i])
+            end = max(end, self._ends[j - 1])
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+    def iter_gaps(self, first, last):
+        """Yields (start, end) intervals of [first, last] not in the set"""
+        i = max(bisect.bisect_right(self._starts, first) - 1, 0)
+        for start, end in zip(self._starts[i:], self._ends[i:]):
+            if start > last:
+                break
+            if start > first:
+                yield first, start - 1
+            first = max(first, end + 1)
+        if first <= last:
+            yield first, last
+
+
+class AddressSpace(object):
+    """Used and free addresses of a network or network container
+
+    Used space is added by IPs and address ranges, e.g. fixed addresses,
+    host record IPs, active leases and DHCP ranges (the whole range is
+    taken as used, as it is not free for static allocation).
+    Addresses out of the network are ignored.
+
+    With 'exclude_reserved' network and broadcast addresses of IPv4
+    network are neither used nor free, as they cannot be allocated.
+    Pass False to plan subnets of a network container.
+    """
+
+    def __init__(self, cidr, exclude_reserved=True):
+        self.network = netaddr.IPNetwork(cidr).cidr
+        self.first = self.network.first
+        self.last = self.network.last
+        if (exclude_reserved and self.network.version == 4 and
+                self.network.prefixlen < 31):
+            self.first += 1
+            self.last -= 1
+        self.used = IntervalSet()
+
+    def __repr__(self):
+        return "AddressSpace: {0} {1:.1f}% used".format(self.network,
+                                                        self.utilization)
+
+    @property
+    def version(self):
+        return self.network.version
+
+    @property
+    def size(self):
+        return self.last - self.first + 1
+
+    @property
+    def used_count(self):
+        return self.used.count
+
+    @property
+    def free_count(self):
+        return self.size - self.used_count
+
+    @property
+    def utilization(self):
+        """Used addresses in percents"""
+        if self.size <= 0:
+            return 100.0
+        return 100.0 * self.used_count / self.size
+
+    def add_range(self, start_ip, end_ip):
+        start = max(int(netaddr.IPAddress(start_ip)), self.first)
+        end = min(int(netaddr.IPAddress(end_ip)), self.last)
+        if start <= end:
+            self.used.add(start, end)
+
+    def add_ip(self, ip):
+        self.add_range(ip, ip)
+
+    def add_object(self, ib_obj):
+        """Adds addresses used by fixed address, host, lease or range"""
+        obj_type = ib_obj.infoblox_type
+        if obj_type in ('range', 'ipv6range'):
+            self.add_range(ib_obj.start_addr, ib_obj.end_addr)
+        elif obj_type == 'record:host':
+            for host_ip in ib_obj.ip or []:
+                self.add_ip(host_ip.ip)
+        elif obj_type == 'lease':
+            if ib_obj.binding_state not in FREE_LEASE_STATES:
+                self.add_ip(ib_obj.address)
+        elif ib_obj.ip:
+            self.add_ip(ib_obj.ip)
+
+    def _address(self, value):
+        return netaddr.IPAddress(value, self.version)
+
+    def iter_free_blocks(self):
+        """Yields free address ranges as netaddr.IPRange"""
+        for start, end in self.used.iter_gaps(self.first, self.last):
+            yield netaddr.IPRange(self._address(start), self._address(end))
+
+    def iter_free_subnets(self):
+        """Yields free subnets (CIDR aligned blocks) as netaddr.IPNetwork
+
+        Subnets are computed per free block when they are requested.
+        """
+        for start, end in self.used.iter_gaps(self.first, self.last):
+            for subnet in netaddr.iprange_to_cidrs(self._address(start),
+                                                   self._address(end)):
+                yield subnet
+
+    def _largest_subnet(self, start, end):
+        bits = 32 if self.version == 4 else 128
+        for prefixlen in range(self.network.prefixlen, bits + 1):
+            size = 1 << (bits - prefixlen)
+            aligned = -(-start // size) * size
+            if aligned + size - 1 <= end:
+                return netaddr.IPNetwork((aligned, prefixlen),
+                                         version=self.version)
+        return None
+
+    def largest_free_subnet(self):
+        """Returns the largest free subnet, the lowest one if many"""
+        largest = None
+        for start, end in self.used.iter_gaps(self.first, self.last):
+            subnet = self._largest_subnet(start, end)
+            if subnet is not None and (largest is None or
+                                       subnet.prefixlen < largest.prefixlen):
+                largest = subnet
+        return largest
+
+
+class _SpaceTable(object):
+    """Address spaces of one IP version, looked up by address interval"""
+
+    def __init__(self, bits):
+        self._prefixes = prefix_index.PrefixTable(bits)
+        # spaces sorted by the first address of their network
+        self._firsts = []
+        self._spaces = []
+
+    def add(self, space):
+        network = space.network
+        self._prefixes.add(network.value, network.prefixlen, space)
+        i = bisect.bisect_right(self._firsts, network.first)
+        self._firsts.insert(i, network.first)
+        self._spaces.insert(i, space)
+
+    def iter_overlapping(self, start, end):
+        """Yields spaces having addresses of [start, end]"""
+        # space starting before the interval overlaps it only if it
+        # contains its start, as spaces are CIDR blocks
+        for space in self._prefixes.iter_containing(start):
+            if space.network.first < start:
+                yield space
+        i = bisect.bisect_left(self._firsts, start)
+        j = bisect.bisect_right(self._firsts, end)
+        for space in self._spaces[i:j]:
+            yield space
+
+
+def load_address_spaces(connector, cidrs, network_view='default',
+                        object_classes=DEFAULT_CLASSES, page_size=None,
+                        exclude_reserved=True):
+    """Returns AddressSpace of each cidr, filled with objects from NIOS
+
+    Objects of each type are streamed once for the whole network view
+    (host records cannot be searched by network), and each address is
+    added to all spaces containing it, each range to all spaces it
+    overlaps. Types shared by IPv4 and IPv6
+    classes (record:host) are streamed once too, each reply object is
+    parsed by classes of both versions.
+    """
+    spaces = dict((cidr, AddressSpace(cidr, exclude_reserved))
+                  for cidr in cidrs)
+    tables = {4: _SpaceTable(32), 6: _SpaceTable(128)}
+    for space in spaces.values():
+        tables[space.version].add(space)
+    for obj_type, classes in _get_classes_by_type(
+            object_classes, set(space.version
+                                for space in spaces.values())):
+        return_fields = []
+        for cls in classes:
+            return_fields.extend(field for field in cls._return_fields
+                                 if field not in return_fields)
+        if obj_type == obj.DHCPLease._infoblox_type:
+            return_fields.append('binding_state')
+        for data in connector.iter_objects(obj_type,
+                                           {'network_view': network_view},
+                                           return_fields=return_fields,
+                                           page_size=page_size):
+            for cls in classes:
+                ib_obj = cls.from_dict(connector, dict(data))
+                for start_ip, end_ip in _iter_intervals(ib_obj):
+                    start = netaddr.IPAddress(start_ip)
+                    for space in tables[start.version].iter_overlapping(
+                            int(start), int(netaddr.IPAddress(end_ip))):
+                        space.add_object(ib_obj)
+    return spaces
+
+
+def _get_classes_by_type(object_classes, versions):
+    """Returns list of (WAPI object type, classes) for given IP versions"""
+    # None stands for classes of both versions, e.g. DHCPLease
+    versions = set(versions) | set([None])
+    classes_by_type = []
+    for ib_class in object_classes:
+        for cls in replica.get_versioned_classes(ib_class):
+            if _get_version(cls) not in versions:
+                continue
+            for obj_type, classes in classes_by_type:
+                if obj_type == cls._infoblox_type:
+                    if cls not in classes:
+                        classes.append(cls)
+                    break
+            else:
+                classes_by_type.append((cls._infoblox_type, [cls]))
+    return classes_by_type
+
+
+def _get_version(ib_class):
+    v4_class = ib_class.get_v4_class()
+    v6_class = ib_class.get_v6_class()
+    if v4_class is v6_class:
+        return None
+    return 4 if ib_class is v4_class else 6
+
+
+def _iter_intervals(ib_obj):
+    """Yields (start IP, end IP) of object, used to find address spaces
+    having its addresses"""
+    obj_type = ib_obj.infoblox_type
+    if obj_type in ('range', 'ipv6range'):
+        yield ib_obj.start_addr, ib_obj.end_addr
+    elif obj_type == 'record:host':
+        # host may have IPs of several networks
+        for ip in set(host_ip.ip for host_ip in ib_obj.ip or []):
+            yield ip, ip
+    elif obj_type == 'lease':
+        yield ib_obj.address, ib_obj.address
+    elif ib_obj.ip:
+        yield ib_obj.ip, ib_obj.ip
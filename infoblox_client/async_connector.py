@@ -0,0 +1,488 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import asyncio
+import base64
+import functools
+import logging
+import ssl
+import sys
+
+import requests
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from infoblox_client import connector
+from infoblox_client import exceptions as ib_ex
+from infoblox_client import single_flight
+from infoblox_client import throttle
+from infoblox_client import utils
+
+LOG = logging.getLogger(__name__)
+
+
+def reraise_neutron_exception(func):
+    @functools.wraps(func)
+    async def callee(*args, **kwargs):
+        try:
+            return await func(*args, **kwargs)
+        except asyncio.TimeoutError as e:
+            raise ib_ex.InfobloxTimeoutError(e)
+        except aiohttp.ClientError as e:
+            raise ib_ex.InfobloxConnectionError(reason=e)
+
+    return callee
+
+
+class AsyncResponse(object):
+    """Fully read aiohttp response
+
+    Exposes the same 'status_code' and 'content' attributes as
+    requests.Response, so reply processing is shared with Connector.
+    """
+
+    def __init__(self, status_code, content):
+        self.status_code = status_code
+        self.content = content
+
+
+class AsyncRequestGovernor(object):
+    """Asyncio version of throttle.RequestGovernor"""
+
+    def __init__(self, rate=None, max_in_flight=None):
+        self.bucket = throttle.TokenBucket(rate) if rate else None
+        self.max_in_flight = max_in_flight
+        self._semaphore = None
+
+    async def __aenter__(self):
+        if self.bucket is not None:
+            delay = self.bucket.reserve()
+            if delay:
+                await asyncio.sleep(delay)
+        if self.max_in_flight:
+            if self._semaphore is None:
+                # created on first use to be bound to the running loop
+                self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            await self._semaphore.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if self._semaphore is not None:
+            self._semaphore.release()
+
+
+class AsyncSingleFlight(single_flight.SingleFlight):
+    """Asyncio version of single_flight.SingleFlight"""
+
+    @staticmethod
+    def _new_call():
+        return single_flight.Call(asyncio.Event())
+
+    async def do(self, key, func):
+        """Returns result of coroutine func(), sharing it with callers
+
+        Cancellation of the caller running func() is not passed to
+        callers waiting for it, one of them runs func() again instead.
+        """
+        while True:
+            call, leader = self._join(key)
+            if leader:
+                break
+            await call.done.wait()
+            if not call.cancelled:
+                return self._get_result(call, shared=True)
+        try:
+            call.result = await func()
+        except asyncio.CancelledError:
+            call.cancelled = True
+            raise
+        except BaseException:
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            followers = self._leave(key, call)
+            call.done.set()
+        return self._get_result(call, shared=bool(followers))
+
+
+class AsyncConnector(connector.Connector):
+    """AsyncConnector stands for interacting with Infoblox NIOS over asyncio
+
+    Accepts the same options as Connector and provides the same
+    get/create/update/delete/call_func interface, but all of these methods
+    are coroutines backed by aiohttp. Requires Python 3.5+ and aiohttp.
+
+    The HTTP session is created lazily inside of the running event loop
+    and has to be released with close() or by using the connector
+    as an async context manager. Session cookie is kept in memory only,
+    cookie_store option is not supported.
+    """
+
+    is_async = True
+
+    def __init__(self, options):
+        if aiohttp is None:
+            msg = "AsyncConnector requires aiohttp to be installed"
+            raise ib_ex.InfobloxConfigException(msg=msg)
+        super(AsyncConnector, self).__init__(options)
+        if self.cookie_store is not None:
+            msg = "AsyncConnector does not support cookie_store option"
+            raise ib_ex.InfobloxConfigException(msg=msg)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @staticmethod
+    def _create_single_flight():
+        return AsyncSingleFlight()
+
+    @staticmethod
+    def _create_governor(rate, max_in_flight):
+        return AsyncRequestGovernor(rate=rate, max_in_flight=max_in_flight)
+
+    def _configure_session(self):
+        # aiohttp session has to be created inside of the event loop,
+        # so only prepare settings here
+        self.session = None
+        credentials = '%s:%s' % (self.username, self.password)
+        self._auth_header = {'Authorization': 'Basic %s' % base64.b64encode(
+            credentials.encode('utf-8')).decode('ascii')}
+        self._ssl = self._get_ssl_setting()
+        self._auth_lock = None
+        # incremented on each login after session cookie expired
+        self._auth_generation = 0
+
+    def _get_ssl_setting(self):
+        ssl_verify = utils.try_value_to_bool(self.ssl_verify,
+                                             strict_mode=False)
+        if ssl_verify is False:
+            return False
+        if ssl_verify is True:
+            return None
+        # Like in requests, non boolean value is a path to CA bundle
+        return ssl.create_default_context(cafile=ssl_verify)
+
+    def _get_session(self):
+        if self.session is None or self.session.closed:
+            # 'unsafe' jar accepts cookies from hosts defined by IP address
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.http_pool_maxsize, ssl=self._ssl),
+                cookie_jar=aiohttp.CookieJar(unsafe=True),
+                timeout=aiohttp.ClientTimeout(
+                    total=self.http_request_timeout),
+                trust_env=self.trust_env)
+        return self.session
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _get_request_options(self, data=None):
+        opts = dict(headers=self.DEFAULT_HEADER)
+        if data:
+            opts['data'] = self.codec.dumps(data)
+        return opts
+
+    async def _send_request(self, method, obj_type, url, opts,
+                            process_reply):
+        metrics = self._start_metrics(method, obj_type, url, opts)
+        if metrics is None:
+            return process_reply(await self._request(method, url, opts))
+        try:
+            r = await self._request(method, url, opts)
+            metrics.reply_received(r)
+            return metrics.decode(process_reply, r)
+        except Exception as e:
+            metrics.error = e
+            raise
+        finally:
+            self._finish_metrics(metrics)
+
+    async def _request(self, method, url, opts):
+        self._log_request(method, url, opts)
+        attempt = 0
+        while True:
+            start = utils.monotonic()
+            try:
+                r = await self._send(method, url, dict(opts))
+            except asyncio.TimeoutError as e:
+                self.retry_policy.record_attempt(
+                    method, attempt, utils.monotonic() - start,
+                    type(e).__name__)
+                if not self.retry_policy.should_retry(method, attempt,
+                                                      error=e):
+                    raise
+                reason = 'timeout'
+            else:
+                self.retry_policy.record_attempt(
+                    method, attempt, utils.monotonic() - start,
+                    r.status_code)
+                if not self.retry_policy.should_retry(
+                        method, attempt, status_code=r.status_code):
+                    return r
+                reason = r.status_code
+            delay = self.retry_policy.get_delay(attempt)
+            LOG.warning("Retrying %s request to %s in %.2f seconds "
+                        "after failure: %s", method, url, delay, reason)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _send(self, method, url, opts):
+        """Sends request, logging in first if there is no session cookie
+
+        Request rejected because of expired session cookie is sent again
+        once, after a new login shared with other waiting requests.
+        """
+        session = self._get_session()
+        generation = self._auth_generation
+        with_cookie = bool(len(session.cookie_jar))
+        r = await self._send_once(session, method, url, opts,
+                                  login=not with_cookie)
+        if not with_cookie or r.status_code != requests.codes.UNAUTHORIZED:
+            return r
+        async with self._get_auth_lock():
+            if self._auth_generation == generation:
+                # the first request that found cookie expired logs in
+                session.cookie_jar.clear()
+                LOG.info("Session cookie expired, logging in to %s",
+                         self.host)
+                r = await self._send_once(session, method, url, opts,
+                                          login=True)
+                self._auth_generation += 1
+                return r
+        return await self._send_once(session, method, url, opts,
+                                     login=not len(session.cookie_jar))
+
+    def _get_auth_lock(self):
+        if self._auth_lock is None:
+            # created on first use to be bound to the running loop
+            self._auth_lock = asyncio.Lock()
+        return self._auth_lock
+
+    async def _send_once(self, session, method, url, opts, login):
+        opts = dict(opts)
+        headers = dict(opts.pop('headers', {}))
+        if login:
+            headers.update(self._auth_header)
+        async with self._get_governor(method):
+            async with session.request(method, url, headers=headers,
+                                       **opts) as resp:
+                content = await resp.read()
+        return AsyncResponse(resp.status, content)
+
+    @reraise_neutron_exception
+    async def get_object(self, obj_type, payload=None, return_fields=None,
+                         extattrs=None, force_proxy=False, max_results=None,
+                         paging=None):
+        """Retrieve a list of Infoblox objects of type 'obj_type'
+
+        Coroutine version of Connector.get_object, accepts the same
+        arguments.
+        """
+        self._validate_obj_type_or_die(obj_type, obj_type_expected=False)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = self.cache.make_key(obj_type, payload, return_fields,
+                                            extattrs, force_proxy,
+                                            max_results, paging)
+            found, ib_object = self.cache.get(cache_key)
+            if found:
+                return ib_object
+            generation = self.cache.generation(cache_key)
+
+        query_params = self._get_query_params(payload=payload,
+                                              return_fields=return_fields,
+                                              max_results=max_results,
+                                              paging=paging)
+        if cache_key is None:
+            return await self._search_object(obj_type, query_params,
+                                             extattrs, force_proxy)
+        try:
+            ib_object = await self._search_object(obj_type, query_params,
+                                                  extattrs, force_proxy,
+                                                  raise_on_error=True)
+        except ib_ex.InfobloxSearchError:
+            # failed search is not cached, so it is retried next time
+            return None
+        self.cache.set(cache_key, ib_object, generation)
+        return ib_object
+
+    async def _search_object(self, obj_type, query_params, extattrs,
+                             force_proxy, raise_on_error=False):
+        proxy_flag = self._get_proxy_flag(obj_type, force_proxy)
+        error = None
+        try:
+            ib_object = await self._handle_get_object(
+                obj_type, query_params, extattrs, proxy_flag,
+                raise_on_error=raise_on_error)
+        except ib_ex.InfobloxSearchError as e:
+            ib_object, error = None, e
+        # Do second get call with force_proxy if needed
+        if self._need_proxied_search(obj_type, force_proxy, proxy_flag,
+                                     bool(ib_object)):
+            ib_object = await self._handle_get_object(
+                obj_type, query_params, extattrs, proxy_flag=True,
+                raise_on_error=raise_on_error)
+            self.proxy_search.second_search_done(obj_type, bool(ib_object))
+        elif error is not None and raise_on_error:
+            raise error
+        return ib_object or None
+
+    async def _handle_get_object(self, obj_type, query_params, extattrs,
+                                 proxy_flag=False, raise_on_error=False):
+        if '_paging' in query_params:
+            self._set_page_size(query_params)
+
+            result = []
+            while True:
+                url = self._construct_url(obj_type, query_params, extattrs,
+                                          force_proxy=proxy_flag)
+                resp = await self._get_object(obj_type, url, raise_on_error)
+                if not resp:
+                    return None
+                result.extend(resp['result'])
+                if not ('next_page_id' in resp):
+                    query_params.pop('_page_id', None)
+                    return result
+                query_params['_page_id'] = resp['next_page_id']
+        else:
+            url = self._construct_url(obj_type, query_params, extattrs,
+                                      force_proxy=proxy_flag)
+            return await self._get_object(obj_type, url, raise_on_error)
+
+    async def _get_object(self, obj_type, url, raise_on_error=False):
+        try:
+            if self.gets_in_flight is None:
+                return await self._send_get(obj_type, url)
+            return await self.gets_in_flight.do(
+                self.gets_in_flight.make_key(obj_type, url),
+                functools.partial(self._send_get, obj_type, url))
+        except ib_ex.InfobloxSearchError:
+            if raise_on_error:
+                raise
+            return None
+
+    async def _send_get(self, obj_type, url):
+        return await self._send_request(
+            'get', obj_type, url, self._get_request_options(),
+            functools.partial(self._process_get_reply, obj_type, url))
+
+    @reraise_neutron_exception
+    async def create_object(self, obj_type, payload, return_fields=None):
+        """Create an Infoblox object of type 'obj_type'
+
+        Coroutine version of Connector.create_object.
+        """
+        self._validate_obj_type_or_die(obj_type)
+        self._invalidate_cache(obj_type)
+
+        query_params = self._build_query_params(return_fields=return_fields)
+
+        url = self._construct_url(obj_type, query_params)
+        opts = self._get_request_options(data=payload)
+        try:
+            return await self._send_request(
+                'post', obj_type, url, opts,
+                functools.partial(self._process_create_reply, obj_type,
+                                  payload))
+        finally:
+            self._change_done(obj_type)
+
+    @reraise_neutron_exception
+    async def call_func(self, func_name, ref, payload, return_fields=None):
+        self._invalidate_cache(ref)
+        query_params = self._build_query_params(return_fields=return_fields)
+        query_params['_function'] = func_name
+
+        url = self._construct_url(ref, query_params)
+        opts = self._get_request_options(data=payload)
+        try:
+            return await self._send_request(
+                'post', utils.get_obj_type(ref), url, opts,
+                functools.partial(self._process_func_reply, func_name, ref))
+        finally:
+            self._change_done(ref)
+
+    @reraise_neutron_exception
+    async def update_object(self, ref, payload, return_fields=None):
+        """Update an Infoblox object
+
+        Coroutine version of Connector.update_object.
+        """
+        self._invalidate_cache(ref)
+        query_params = self._build_query_params(return_fields=return_fields)
+
+        opts = self._get_request_options(data=payload)
+        url = self._construct_url(ref, query_params)
+        try:
+            return await self._send_request(
+                'put', utils.get_obj_type(ref), url, opts,
+                functools.partial(self._process_update_reply, ref))
+        finally:
+            self._change_done(ref)
+
+    @reraise_neutron_exception
+    async def delete_object(self, ref, delete_arguments=None):
+        """Remove an Infoblox object
+
+        Coroutine version of Connector.delete_object.
+        """
+        self._invalidate_cache(ref)
+        opts = self._get_request_options()
+        if not isinstance(delete_arguments, dict):
+            delete_arguments = {}
+        url = self._construct_url(ref, query_params=delete_arguments)
+        try:
+            return await self._send_request(
+                'delete', utils.get_obj_type(ref), url, opts,
+                functools.partial(self._process_delete_reply, ref))
+        finally:
+            self._change_done(ref)
+
+    @reraise_neutron_exception
+    async def multi_request(self, requests_data):
+        """Execute several operations in one call to WAPI 'request' object
+
+        Coroutine version of Connector.multi_request.
+        """
+        for request in requests_data:
+            self._invalidate_cache(request['object'])
+        url = self._construct_url('request')
+        opts = self._get_request_options(data=requests_data)
+        try:
+            return await self._send_request('post', 'request', url, opts,
+                                            self._process_multi_reply)
+        finally:
+            for request in requests_data:
+                self._change_done(request['object'])
+
+    def iter_objects(self, *args, **kwargs):
+        raise NotImplementedError(
+            "AsyncConnector does not support iter_objects, "
+            "use get_object with paging instead")
+
+    def batch(self, *args, **kwargs):
+        raise NotImplementedError(
+            "AsyncConnector does not support batch, "
+            "use multi_request instead")
@@ -0,0 +1,163 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+"""Coroutine implementation of InfobloxObject CRUD interface.
+
+Functions in this module mirror InfobloxObject methods with the same name
+and are exposed as InfobloxObject.acreate, asearch, asearch_all, afetch,
+aupdate and adelete. Connector passed in is expected to be an
+async_connector.AsyncConnector.
+"""
+
+import logging
+
+from infoblox_client import exceptions as ib_ex
+
+LOG = logging.getLogger(__name__)
+
+
+async def create_check_exists(cls, connector, check_if_exists=True,
+                              update_if_exists=False, optimistic=False,
+                              **kwargs):
+    obj_created = False
+    exists = False
+    local_obj = cls(connector, **kwargs)
+    if check_if_exists and optimistic:
+        try:
+            reply = await connector.create_object(local_obj.infoblox_type,
+                                                  local_obj.to_dict(),
+                                                  local_obj.return_fields)
+        except ib_ex.InfobloxObjectAlreadyExists:
+            exists = await fetch(local_obj, only_ref=True)
+            if not exists:
+                raise
+        else:
+            LOG.info("Infoblox %(obj_type)s was created: %(ib_obj)s",
+                     {'obj_type': local_obj.infoblox_type,
+                      'ib_obj': local_obj})
+            return cls._object_from_reply(local_obj, connector, reply), True
+    elif check_if_exists:
+        exists = await fetch(local_obj, only_ref=True)
+    if exists:
+        LOG.info(("Infoblox %(obj_type)s already exists: "
+                  "%(ib_obj)s"),
+                 {'obj_type': local_obj.infoblox_type,
+                  'ib_obj': local_obj})
+        if not update_if_exists:
+            return local_obj, obj_created
+    reply = None
+    if not local_obj.ref:
+        reply = await connector.create_object(local_obj.infoblox_type,
+                                              local_obj.to_dict(),
+                                              local_obj.return_fields)
+        obj_created = True
+        LOG.info("Infoblox %(obj_type)s was created: %(ib_obj)s",
+                 {'obj_type': local_obj.infoblox_type,
+                  'ib_obj': local_obj})
+    elif update_if_exists:
+        update_fields = local_obj.to_dict(search_fields='exclude')
+        reply = await connector.update_object(local_obj.ref,
+                                              update_fields,
+                                              local_obj.return_fields)
+        LOG.info('Infoblox object was updated: %s', local_obj.ref)
+    return cls._object_from_reply(local_obj, connector, reply), obj_created
+
+
+async def create(cls, connector, check_if_exists=True,
+                 update_if_exists=False, optimistic=False, **kwargs):
+    ib_object, _ = await create_check_exists(
+        cls, connector,
+        check_if_exists=check_if_exists,
+        update_if_exists=update_if_exists,
+        optimistic=optimistic,
+        **kwargs)
+    return ib_object
+
+
+async def _search(cls, connector, **kwargs):
+    ib_obj_for_search, search_dict, search_args = cls._prepare_search(
+        connector, **kwargs)
+    reply = await connector.get_object(ib_obj_for_search.infoblox_type,
+                                       search_dict,
+                                       **search_args)
+    return reply, ib_obj_for_search
+
+
+async def search(cls, connector, **kwargs):
+    ib_obj, parse_class = await _search(cls, connector, **kwargs)
+    if ib_obj:
+        return parse_class.from_dict(connector, ib_obj[0])
+
+
+async def search_all(cls, connector, **kwargs):
+    ib_objects, parsing_class = await _search(cls, connector, **kwargs)
+    if ib_objects:
+        return [parsing_class.from_dict(connector, obj)
+                for obj in ib_objects]
+    return []
+
+
+async def exists(cls, connector, **kwargs):
+    ib_obj_for_search, search_dict, search_args = cls._prepare_ref_search(
+        connector, max_results=1, **kwargs)
+    reply = await connector.get_object(ib_obj_for_search.infoblox_type,
+                                       search_dict, paging=False,
+                                       **search_args)
+    return bool(reply)
+
+
+async def fetch(ib_obj, only_ref=False):
+    connector = ib_obj.connector
+    if ib_obj.ref:
+        reply = await connector.get_object(
+            ib_obj.ref, return_fields=ib_obj.return_fields)
+        if reply:
+            ib_obj.update_from_dict(reply)
+            return True
+
+    search_dict = ib_obj.to_dict(search_fields='update')
+    if only_ref:
+        reply = await connector.get_object(ib_obj.infoblox_type,
+                                           search_dict,
+                                           return_fields=[],
+                                           max_results=1,
+                                           paging=False)
+    else:
+        reply = await connector.get_object(ib_obj.infoblox_type,
+                                           search_dict,
+                                           return_fields=ib_obj.return_fields)
+    if reply:
+        ib_obj.update_from_dict(reply[0], only_ref=only_ref)
+        return True
+    return False
+
+
+async def update(ib_obj, full=False):
+    update_fields = ib_obj.get_update_fields(full=full)
+    if not update_fields and not full:
+        LOG.debug('Infoblox object was not changed: %s', ib_obj.ref)
+        return ib_obj
+    reply = await ib_obj.connector.update_object(ib_obj.ref,
+                                                 update_fields,
+                                                 ib_obj.return_fields)
+    LOG.info('Infoblox object was updated: %s', ib_obj.ref)
+    ib_obj._mark_saved()
+    return ib_obj._object_from_reply(ib_obj, ib_obj.connector, reply)
+
+
+async def delete(ib_obj):
+    try:
+        await ib_obj.connector.delete_object(ib_obj.ref)
+    except ib_ex.InfobloxCannotDeleteObject as e:
+        LOG.info("Failed to delete an object: %s", e)
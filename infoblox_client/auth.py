@@ -0,0 +1,115 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+from requests import codes
+
+LOGGED_OUT = 'logged_out'
+LOGGING_IN = 'logging_in'
+LOGGED_IN = 'logged_in'
+
+
+class AuthState(object):
+    """Thread safe authentication state of requests.Session
+
+    - logged_out: there is no session cookie, the next request is sent
+      with basic auth and logs in;
+    - logging_in: one request is logging in, other requests wait for it
+      instead of logging in too;
+    - logged_in: requests are sent with session cookie only (or with
+      basic auth, if server did not set a cookie).
+
+    Session auth is changed only on transitions, while no other request
+    is being prepared, so concurrent requests never see it half-changed.
+    A request rejected with 401 while logged in means that the session
+    cookie expired: state goes back to logged_out, on_expired() is called
+    and the request is sent again. Requests that were sent with the same
+    expired cookie wait for the single login that follows.
+    If reload_cookies(session) is given, it is called first and returns
+    True if it put a newer cookie (e.g. saved by another process) to the
+    session, in which case requests are sent again with it instead.
+    Session is passed to each call, as connector may replace it.
+    """
+
+    def __init__(self, credentials, on_expired=None, reload_cookies=None):
+        self.credentials = credentials
+        self.on_expired = on_expired
+        self.reload_cookies = reload_cookies
+        self.state = LOGGED_OUT
+        # incremented on each login, tells which cookie request was sent with
+        self.generation = 0
+        self.logins = 0
+        self._cond = threading.Condition()
+
+    def reset(self, session):
+        """Sets state from session cookies, e.g. restored from a store"""
+        with self._cond:
+            if session.cookies:
+                self.state = LOGGED_IN
+                session.auth = None
+            else:
+                self.state = LOGGED_OUT
+                session.auth = self.credentials
+
+    def begin_request(self, session):
+        """Waits until request can be sent
+
+        Returns token to pass to end_request. Token tells if the request
+        logs in, in which case it is sent with basic auth.
+        """
+        with self._cond:
+            while self.state == LOGGING_IN:
+                self._cond.wait()
+            if self.state == LOGGED_IN:
+                return False, self.generation
+            self.state = LOGGING_IN
+            session.auth = self.credentials
+            self.logins += 1
+            return True, self.generation
+
+    def end_request(self, session, token, status_code):
+        """Records request result, status_code is None if request failed
+
+        Returns True if the request was rejected because of expired
+        session cookie and has to be sent again.
+        """
+        login, generation = token
+        unauthorized = status_code == codes.UNAUTHORIZED
+        with self._cond:
+            if login:
+                if status_code is None or unauthorized:
+                    self.state = LOGGED_OUT
+                else:
+                    self.state = LOGGED_IN
+                    self.generation += 1
+                    if session.cookies:
+                        session.auth = None
+                self._cond.notify_all()
+                return False
+            if not unauthorized:
+                return False
+            if self.state == LOGGED_IN and generation == self.generation:
+                # the first request that found cookie expired
+                if (self.reload_cookies is not None and
+                        self.reload_cookies(session)):
+                    # requests sent with the expired cookie use the new one
+                    self.generation += 1
+                else:
+                    self.state = LOGGED_OUT
+                    session.cookies.clear()
+                    if self.on_expired is not None:
+                        self.on_expired()
+            return True
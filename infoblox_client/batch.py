@@ -0,0 +1,205 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+
+from infoblox_client import exceptions as ib_ex
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100
+
+
+class BatchItem(object):
+    """Single operation queued in Batch
+
+    After batch execution 'reply' contains NIOS reply for the operation,
+    or 'error' contains exception for it. 'result' returns reply or
+    raises the error.
+    """
+
+    def __init__(self, method, obj, data=None, args=None, ib_obj=None):
+        self.method = method
+        self.obj = obj
+        self.data = data
+        self.args = args
+        self.ib_obj = ib_obj
+        self.reply = None
+        self.error = None
+        self.done = False
+
+    def __repr__(self):
+        return "BatchItem: {0} {1}".format(self.method, self.obj)
+
+    def to_dict(self):
+        item = {'method': self.method, 'object': self.obj}
+        if self.data:
+            item['data'] = self.data
+        if self.args:
+            item['args'] = self.args
+        return item
+
+    @property
+    def result(self):
+        if self.error:
+            raise self.error
+        return self.reply
+
+    def set_reply(self, reply):
+        self.reply = reply
+        self.done = True
+        if self.ib_obj is None or self.method == 'DELETE':
+            return
+        if self.method == 'PUT':
+            self.ib_obj._mark_saved()
+        if not reply:
+            return
+        if isinstance(reply, dict):
+            self.ib_obj.update_from_dict(reply)
+        else:
+            self.ib_obj.update_from_dict({'_ref': reply}, only_ref=True)
+
+    def set_error(self, error):
+        self.error = error
+        self.done = True
+
+    def build_error(self, exc):
+        """Convert error of the whole request into error for this item"""
+        kwargs = dict(response=exc.response,
+                      content=exc.kwargs.get('content'),
+                      code=exc.kwargs.get('code'))
+        if self.method == 'POST':
+            return ib_ex.InfobloxCannotCreateObject(
+                obj_type=self.obj, args=self.data, **kwargs)
+        elif self.method == 'PUT':
+            return ib_ex.InfobloxCannotUpdateObject(ref=self.obj, **kwargs)
+        return ib_ex.InfobloxCannotDeleteObject(ref=self.obj, **kwargs)
+
+
+class Batch(object):
+    """Queues create/update/delete operations to send them in bulk
+
+    Queued operations are sent to WAPI 'request' object in chunks of
+    'chunk_size' operations, so one HTTP request is made per chunk.
+    NIOS applies each chunk as a transaction: if one operation fails,
+    the whole chunk is rolled back and every item of the chunk gets
+    an error of corresponding class (InfobloxCannotCreateObject,
+    InfobloxCannotUpdateObject, InfobloxCannotDeleteObject).
+    Chunks are processed independently, so failure of one chunk does
+    not prevent processing of the next ones.
+
+    Usage:
+        with connector.batch() as batch:
+            batch.create(objects.HostRecord(connector, ...))
+            batch.delete_object(ref)
+        batch.errors
+    """
+
+    def __init__(self, connector, chunk_size=DEFAULT_CHUNK_SIZE):
+        if chunk_size < 1:
+            raise ValueError("Batch chunk size has to be positive.")
+        self.connector = connector
+        self.chunk_size = chunk_size
+        self.items = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # do not send anything if exception occurred while queueing
+        if exc_type is None:
+            self.execute()
+
+    def __len__(self):
+        return len(self.items)
+
+    def _queue(self, item):
+        self.items.append(item)
+        return item
+
+    def create_object(self, obj_type, payload, return_fields=None,
+                      ib_obj=None):
+        self.connector._validate_obj_type_or_die(obj_type)
+        args = self.connector._build_query_params(
+            return_fields=return_fields)
+        return self._queue(BatchItem('POST', obj_type, data=payload,
+                                     args=args, ib_obj=ib_obj))
+
+    def update_object(self, ref, payload, return_fields=None, ib_obj=None):
+        args = self.connector._build_query_params(
+            return_fields=return_fields)
+        return self._queue(BatchItem('PUT', ref, data=payload, args=args,
+                                     ib_obj=ib_obj))
+
+    def delete_object(self, ref, delete_arguments=None, ib_obj=None):
+        return self._queue(BatchItem('DELETE', ref, args=delete_arguments,
+                                     ib_obj=ib_obj))
+
+    def create(self, ib_obj):
+        """Queue creation of InfobloxObject, its _ref is set on success"""
+        return self.create_object(ib_obj.infoblox_type,
+                                  ib_obj.to_dict(),
+                                  ib_obj.return_fields,
+                                  ib_obj=ib_obj)
+
+    def update(self, ib_obj, full=False):
+        """Queue update of InfobloxObject, like InfobloxObject.update()
+
+        Only fields changed since the object was received are sent,
+        unless full is True. Nothing is queued and None is returned if
+        no field was changed.
+        """
+        update_fields = ib_obj.get_update_fields(full=full)
+        if not update_fields:
+            LOG.debug('Infoblox object was not changed: %s', ib_obj.ref)
+            return None
+        return self.update_object(ib_obj.ref,
+                                  update_fields,
+                                  ib_obj.return_fields,
+                                  ib_obj=ib_obj)
+
+    def delete(self, ib_obj):
+        return self.delete_object(ib_obj.ref, ib_obj=ib_obj)
+
+    @property
+    def errors(self):
+        return [item.error for item in self.items if item.error]
+
+    def execute(self):
+        """Send all not yet processed operations
+
+        Returns list of processed BatchItem.
+        """
+        pending = [item for item in self.items if not item.done]
+        for start in range(0, len(pending), self.chunk_size):
+            self._execute_chunk(pending[start:start + self.chunk_size])
+        return pending
+
+    def _execute_chunk(self, chunk):
+        try:
+            replies = self.connector.multi_request(
+                [item.to_dict() for item in chunk])
+        except ib_ex.InfobloxMultiRequestException as e:
+            LOG.info("Multiple request failed: %s", e)
+            for item in chunk:
+                item.set_error(item.build_error(e))
+            return
+        except ib_ex.InfobloxGridTemporaryUnavailable as e:
+            for item in chunk:
+                item.set_error(e)
+            return
+
+        for item, reply in zip(chunk, replies):
+            item.set_reply(reply)
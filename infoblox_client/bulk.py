@@ -0,0 +1,101 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import logging
+import threading
+
+from six.moves import queue
+
+LOG = logging.getLogger(__name__)
+
+
+class BulkResult(object):
+    """Result of processing of a single spec by BulkExecutor"""
+
+    def __init__(self, spec, result=None, error=None):
+        self.spec = spec
+        self.result = result
+        self.error = error
+
+    def __repr__(self):
+        if self.error is not None:
+            return "BulkResult: error {0}".format(self.error)
+        return "BulkResult: {0}".format(self.result)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BulkExecutor(object):
+    """Calls function for each spec using bounded pool of threads
+
+    Specs are consumed from iterable lazily: no more than 'max_pending'
+    specs are waiting for a free worker at a time, so reading of specs
+    is blocked while workers are busy (backpressure).
+    Each spec is a dict of keyword arguments or a tuple of positional
+    arguments for the function.
+    """
+
+    def __init__(self, max_workers, max_pending=None):
+        if max_workers < 1:
+            raise ValueError("Number of workers has to be positive.")
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+
+    def map(self, func, specs):
+        """Process specs concurrently
+
+        Returns list of BulkResult in the order of specs. Errors raised
+        by the function are stored in BulkResult.error, so failure
+        of one spec does not abort processing of the others.
+        """
+        tasks = queue.Queue(maxsize=self.max_pending)
+        results = {}
+        workers = [threading.Thread(target=self._worker,
+                                    args=(func, tasks, results))
+                   for _ in range(self.max_workers)]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+
+        count = 0
+        try:
+            for spec in specs:
+                tasks.put((count, spec))
+                count += 1
+        finally:
+            for _ in workers:
+                tasks.put(None)
+            for worker in workers:
+                worker.join()
+        return [results[index] for index in range(count)]
+
+    @staticmethod
+    def _worker(func, tasks, results):
+        while True:
+            task = tasks.get()
+            if task is None:
+                return
+            index, spec = task
+            try:
+                if isinstance(spec, dict):
+                    result = func(**spec)
+                else:
+                    result = func(*spec)
+                results[index] = BulkResult(spec, result=result)
+            except Exception as e:
+                LOG.warning("Bulk operation failed for %s: %s", spec, e)
+                results[index] = BulkResult(spec, error=e)
@@ -0,0 +1,111 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import copy
+import threading
+
+from oslo_serialization import jsonutils
+
+from infoblox_client import utils
+
+
+class QueryCache(object):
+    """Thread safe TTL and LRU cache for get_object replies
+
+    Entries expire 'ttl' seconds after being stored. When cache holds
+    'max_size' entries, the least recently used one is evicted.
+    Entries are grouped by object type, so all replies for some type
+    can be invalidated at once after it was changed. Invalidation also
+    bumps generation of the type, so reply of a search started before
+    the change is not stored when it completes after it.
+    Replies are copied on store and on lookup, so callers are free
+    to modify them.
+    """
+
+    def __init__(self, ttl, max_size, timer=utils.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._timer = timer
+        self._entries = collections.OrderedDict()
+        # object type -> set of keys, to invalidate type without full scan
+        self._keys_by_type = collections.defaultdict(set)
+        # object type -> number of invalidations
+        self._generations = collections.defaultdict(int)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    @staticmethod
+    def make_key(obj_type, *args):
+        return (utils.get_obj_type(obj_type), obj_type,
+                jsonutils.dumps(args, sort_keys=True))
+
+    def get(self, key):
+        """Returns tuple (found, reply)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, reply = entry
+                if expires > self._timer():
+                    # mark entry as the most recently used one
+                    del self._entries[key]
+                    self._entries[key] = entry
+                    self.hits += 1
+                    return True, copy.deepcopy(reply)
+                self._remove(key)
+            self.misses += 1
+            return False, None
+
+    def generation(self, key):
+        """Returns generation of key object type, to be passed to set()"""
+        with self._lock:
+            return self._generations.get(key[0], 0)
+
+    def set(self, key, reply, generation=None):
+        """Stores reply, unless its type was invalidated since generation"""
+        reply = copy.deepcopy(reply)
+        with self._lock:
+            if (generation is not None and
+                    generation != self._generations.get(key[0], 0)):
+                return
+            self._entries.pop(key, None)
+            self._entries[key] = (self._timer() + self.ttl, reply)
+            self._keys_by_type[key[0]].add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        del self._entries[key]
+        keys = self._keys_by_type[key[0]]
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_type[key[0]]
+
+    def invalidate(self, obj_type_or_ref):
+        """Drops all entries for object type of given type or reference"""
+        obj_type = utils.get_obj_type(obj_type_or_ref)
+        with self._lock:
+            self._generations[obj_type] += 1
+            for key in self._keys_by_type.pop(obj_type, ()):
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_type.clear()
@@ -0,0 +1,266 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import logging
+import threading
+
+import requests
+import six
+
+from infoblox_client import exceptions as ib_ex
+from infoblox_client import objects as obj
+from infoblox_client import replica
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class ChangeEvent(object):
+    """Change of grid object reported by db_objects
+
+    'object' is the object as returned by NIOS, None if it was deleted.
+    'initial' is True for objects that existed before the feed started,
+    reported by the first poll if the feed was asked to.
+    """
+
+    def __init__(self, object_type, unique_id, object, sequence_id,
+                 initial=False):
+        self.object_type = object_type
+        self.unique_id = unique_id
+        self.object = object
+        self.sequence_id = sequence_id
+        self.initial = initial
+
+    def __repr__(self):
+        return "ChangeEvent: {0} {1} {2}".format(
+            'deleted' if self.deleted else 'changed',
+            self.object_type, self.unique_id)
+
+    @property
+    def deleted(self):
+        return self.object is None
+
+    @property
+    def ref(self):
+        if self.object is not None:
+            return self.object.get('_ref')
+
+
+class FileFeedCheckpoint(replica.FileReplicaCheckpoint):
+    """Stores position of change feed in JSON file"""
+
+
+class ChangeFeed(object):
+    """Delivers grid changes reported by db_objects to subscribers
+
+    Callbacks are subscribed per WAPI object type (or InfobloxObject
+    class) and are called with lists of ChangeEvent: each poll delivers
+    changes in batches of up to 'batch_size' events, and each callback
+    gets events of its types from the batch at once.
+    Position (sequence ID) is saved to 'checkpoint' after each poll that
+    delivered its changes, so a restarted feed continues where it
+    stopped. Changes of a poll are delivered again if a callback fails
+    or the process stops in the middle of it: delivery is at least once.
+
+    Polling interval adapts to the change rate: it is 'min_interval'
+    after a poll that found changes and doubles after each idle (or
+    failed) poll up to 'max_interval', so idle grid costs one request
+    per 'max_interval'.
+
+    The first poll without saved position requests all objects to learn
+    the current sequence ID, they are delivered as initial events only
+    if 'initial' is True. The same is done when NIOS rejects the saved
+    sequence ID (e.g. it is too old), changes made since it are lost.
+    """
+
+    def __init__(self, connector, checkpoint=None, min_interval=1,
+                 max_interval=60, batch_size=DEFAULT_BATCH_SIZE,
+                 initial=False):
+        if min_interval <= 0 or max_interval < min_interval:
+            raise ValueError("Invalid change feed polling intervals.")
+        self.connector = connector
+        if isinstance(checkpoint, six.string_types):
+            checkpoint = FileFeedCheckpoint(checkpoint)
+        self.checkpoint = checkpoint
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.batch_size = batch_size
+        self.initial = initial
+        # object type -> list of callbacks
+        self._subscribers = collections.defaultdict(list)
+        self._lock = threading.Lock()
+        self._poll_lock = threading.Lock()
+        self.sequence_id = None
+        if checkpoint is not None:
+            state = checkpoint.load()
+            if state:
+                self.sequence_id = state.get('sequence_id')
+        self.polls = 0
+        self.delivered = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @staticmethod
+    def _get_object_types(object_type):
+        if isinstance(object_type, six.string_types):
+            return [object_type]
+        # versioned classes may share the type, e.g. record:host
+        return sorted(set(
+            cls._infoblox_type
+            for cls in replica.get_versioned_classes(object_type)))
+
+    def subscribe(self, object_type, callback):
+        """Calls callback(events) for changes of given type
+
+        object_type is WAPI object type (e.g. 'record:host') or
+        InfobloxObject class (e.g. objects.HostRecord).
+        """
+        with self._lock:
+            for obj_type in self._get_object_types(object_type):
+                self._subscribers[obj_type].append(callback)
+
+    def unsubscribe(self, object_type, callback):
+        with self._lock:
+            for obj_type in self._get_object_types(object_type):
+                callbacks = self._subscribers.get(obj_type, [])
+                if callback in callbacks:
+                    callbacks.remove(callback)
+                if not callbacks:
+                    self._subscribers.pop(obj_type, None)
+
+    @property
+    def object_types(self):
+        with self._lock:
+            return sorted(self._subscribers)
+
+    def _iter_entries(self, object_types):
+        payload = {'object_types': ','.join(object_types)}
+        if self.sequence_id is not None:
+            payload['start_sequence_id'] = self.sequence_id
+            payload['all_events'] = True
+        return self.connector.iter_objects(
+            obj.DbObjects._infoblox_type, payload,
+            return_fields=obj.DbObjects._return_fields,
+            page_size=self.batch_size, raise_on_error=True)
+
+    def _deliver(self, events):
+        with self._lock:
+            subscribers = dict((obj_type, list(callbacks))
+                               for obj_type, callbacks
+                               in self._subscribers.items())
+        by_type = collections.OrderedDict()
+        for event in events:
+            by_type.setdefault(event.object_type, []).append(event)
+        for obj_type, typed_events in by_type.items():
+            for callback in subscribers.get(obj_type, ()):
+                callback(typed_events)
+        self.delivered += len(events)
+
+    def _commit(self, sequence_id):
+        self.sequence_id = sequence_id
+        if self.checkpoint is not None:
+            self.checkpoint.save({'sequence_id': sequence_id})
+
+    def poll(self):
+        """Delivers changes since the last poll, returns number of events
+
+        Returns 0 if nobody is subscribed. Position is moved once all
+        batches are delivered, error of callback or failed query is raised
+        and leaves position where it was. Position rejected by NIOS is
+        dropped and a fresh one is requested.
+        """
+        object_types = self.object_types
+        if not object_types:
+            return 0
+        with self._poll_lock:
+            self.polls += 1
+            try:
+                return self._poll(object_types)
+            except ib_ex.InfobloxSearchError as e:
+                if (self.sequence_id is None or
+                        e.kwargs.get('code') != requests.codes.bad_request):
+                    raise
+                LOG.warning("Sequence ID %s is rejected, changes since it "
+                            "are lost, resyncing: %s", self.sequence_id, e)
+                self._commit(None)
+            return self._poll(object_types)
+
+    def _poll(self, object_types):
+        deliver = self.initial or self.sequence_id is not None
+        initial = self.sequence_id is None
+        count = 0
+        events = []
+        sequence_id = self.sequence_id
+        for entry in self._iter_entries(object_types):
+            sequence_id = entry.get('last_sequence_id', sequence_id)
+            if not deliver:
+                continue
+            data = entry.get('object')
+            events.append(ChangeEvent(
+                entry.get('object_type'), entry.get('unique_id'),
+                data if isinstance(data, dict) else None,
+                sequence_id, initial=initial))
+            if len(events) >= self.batch_size:
+                self._deliver(events)
+                count += len(events)
+                events = []
+        if events:
+            self._deliver(events)
+            count += len(events)
+        if sequence_id != self.sequence_id:
+            self._commit(sequence_id)
+        return count
+
+    def _next_interval(self, count):
+        if count:
+            return self.min_interval
+        return min(self.interval * 2, self.max_interval)
+
+    def _run(self):
+        while not self._stop.is_set():
+            count = 0
+            try:
+                count = self.poll()
+            except Exception as e:
+                LOG.warning("Change feed poll failed: %s", e)
+            self.interval = self._next_interval(count)
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Starts polling in background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='infoblox-change-feed')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
@@ -15,6 +15,7 @@
 
 import functools
 import re
+import time
 import urllib
 import requests
 import six
@@ -29,7 +30,18 @@ except ImportError:
 import logging
 from oslo_serialization import jsonutils
 
+from infoblox_client import auth as ib_auth
+from infoblox_client import batch as ib_batch
+from infoblox_client import cache as ib_cache
+from infoblox_client import cookie_store
 from infoblox_client import exceptions as ib_ex
+from infoblox_client import json_codec
+from infoblox_client import json_stream
+from infoblox_client import metrics as ib_metrics
+from infoblox_client import proxy_strategy as ib_proxy
+from infoblox_client import retry
+from infoblox_client import single_flight
+from infoblox_client import throttle
 from infoblox_client import utils
 
 LOG = logging.getLogger(__name__)
@@ -54,9 +66,14 @@ class Connector(object):
 
     Defines methods for getting, creating, updating and
     removing objects from an Infoblox server instance.
+    Connector is thread safe, one instance can serve up to
+    http_pool_maxsize threads sharing one login session.
     """
 
     DEFAULT_HEADER = {'Content-type': 'application/json'}
+    STREAM_CHUNK_SIZE = 64 * 1024
+    # methods of async connector are coroutines
+    is_async = False
     DEFAULT_OPTIONS = {'ssl_verify': False,
                        'silent_ssl_warnings': False,
                        'http_request_timeout': 10,
@@ -67,7 +84,25 @@ class Connector(object):
                        'max_results': None,
                        'log_api_calls_as_info': False,
                        'paging': False,
-                       'trust_env': True}
+                       'trust_env': True,
+                       'cache_ttl': None,
+                       'cache_max_size': 1000,
+                       'proxy_strategy': ib_proxy.FALLBACK,
+                       'read_rate_limit': None,
+                       'write_rate_limit': None,
+                       'max_reads_in_flight': None,
+                       'max_writes_in_flight': None,
+                       'retry_attempts': 0,
+                       'retry_backoff_base': 0.5,
+                       'retry_backoff_max': 30,
+                       'retry_jitter': True,
+                       'retry_status_codes': retry.RETRY_STATUS_CODES,
+                       'retry_methods': retry.IDEMPOTENT_METHODS,
+                       'metrics_hooks': None,
+                       'stream_pages': False,
+                       'json_codec': json_codec.AUTO,
+                       'cookie_store': None,
+                       'coalesce_gets': True}
 
     def __init__(self, options):
         self._parse_options(options)
@@ -88,7 +123,15 @@ class Connector(object):
                       'ssl_verify', 'http_request_timeout', 'max_retries',
                       'http_pool_connections', 'http_pool_maxsize',
                       'silent_ssl_warnings', 'log_api_calls_as_info',
-                      'max_results', 'paging', 'trust_env')
+                      'max_results', 'paging', 'trust_env',
+                      'cache_ttl', 'cache_max_size', 'proxy_strategy',
+                      'read_rate_limit', 'write_rate_limit',
+                      'max_reads_in_flight', 'max_writes_in_flight',
+                      'retry_attempts', 'retry_backoff_base',
+                      'retry_backoff_max', 'retry_jitter',
+                      'retry_status_codes', 'retry_methods',
+                      'metrics_hooks', 'stream_pages', 'json_codec',
+                      'cookie_store', 'coalesce_gets')
         for attr in attributes:
             if isinstance(options, dict) and attr in options:
                 setattr(self, attr, options[attr])
@@ -111,6 +154,53 @@ class Connector(object):
         self.cloud_api_enabled = self.is_cloud_wapi(
             self.wapi_version)
 
+        self.proxy_search = ib_proxy.ProxySearchStrategy(
+            self.proxy_strategy)
+
+        self.metrics_hooks = list(self.metrics_hooks or [])
+        self.codec = json_codec.get_codec(self.json_codec)
+        self.cookie_store = cookie_store.get_cookie_store(self.cookie_store)
+
+        self.retry_policy = retry.RetryPolicy(
+            attempts=self.retry_attempts,
+            backoff_base=self.retry_backoff_base,
+            backoff_max=self.retry_backoff_max,
+            jitter=self.retry_jitter,
+            status_codes=self.retry_status_codes,
+            methods=self.retry_methods)
+
+        # Reads (GET) and writes (POST, PUT, DELETE) are limited separately
+        self._read_governor = self._create_governor(
+            self.read_rate_limit, self.max_reads_in_flight)
+        self._write_governor = self._create_governor(
+            self.write_rate_limit, self.max_writes_in_flight)
+
+        self.cache = None
+        if self.cache_ttl:
+            self.cache = ib_cache.QueryCache(self.cache_ttl,
+                                             self.cache_max_size)
+
+        # identical concurrent GETs share one request
+        self.gets_in_flight = None
+        if self.coalesce_gets:
+            self.gets_in_flight = self._create_single_flight()
+
+    @staticmethod
+    def _create_single_flight():
+        return single_flight.SingleFlight()
+
+    @property
+    def coalesced_requests(self):
+        """Number of GETs which joined identical request in flight"""
+        if self.gets_in_flight is None:
+            return 0
+        return self.gets_in_flight.coalesced
+
+    @staticmethod
+    def _create_governor(rate, max_in_flight):
+        return throttle.RequestGovernor(rate=rate,
+                                        max_in_flight=max_in_flight)
+
     def _configure_session(self):
         self.session = requests.Session()
         self.session.trust_env = self.trust_env
@@ -120,9 +210,13 @@ class Connector(object):
             max_retries=self.max_retries)
         self.session.mount('http://', adapter)
         self.session.mount('https://', adapter)
-        self.session.auth = (self.username, self.password)
         self.session.verify = utils.try_value_to_bool(self.ssl_verify,
                                                       strict_mode=False)
+        self.auth_state = ib_auth.AuthState(
+            (self.username, self.password), on_expired=self._cookie_expired,
+            reload_cookies=self._reload_cookies)
+        self._load_cookies()
+        self.auth_state.reset(self.session)
 
         if self.silent_ssl_warnings:
             urllib3.disable_warnings()
@@ -203,17 +297,17 @@ class Connector(object):
                     headers=self.DEFAULT_HEADER,
                     verify=self.session.verify)
         if data:
-            opts['data'] = jsonutils.dumps(data)
+            opts['data'] = self.codec.dumps(data)
         return opts
 
     @staticmethod
-    def _parse_reply(request):
+    def _parse_reply(request, loads=jsonutils.loads):
         """Tries to parse reply from NIOS.
 
         Raises exception with content if reply is not in json format
         """
         try:
-            return jsonutils.loads(request.content)
+            return loads(request.content)
         except ValueError:
             raise ib_ex.InfobloxConnectionError(reason=request.content)
 
@@ -228,7 +322,7 @@ class Connector(object):
     @reraise_neutron_exception
     def get_object(self, obj_type, payload=None, return_fields=None,
                    extattrs=None, force_proxy=False, max_results=None,
-                   paging=False):
+                   paging=None):
         """Retrieve a list of Infoblox objects of type 'obj_type'
 
         Some get requests like 'ipv4address' should be always
@@ -237,6 +331,8 @@ class Connector(object):
         then plan to do 2 request:
         - the first one is not proxied to GM
         - the second is proxied to GM
+        This can be changed with 'proxy_strategy' connector option,
+        see proxy_strategy.ProxySearchStrategy.
 
         Args:
             obj_type  (str): Infoblox object type, e.g. 'network',
@@ -254,6 +350,7 @@ class Connector(object):
             paging    (bool): Enables paging to wapi calls if paging = True,
                 it uses _max_results to set paging size of the wapi calls.
                 If _max_results is negative it will take paging size as 1000.
+                Paging connector option is used if paging is None.
 
         Returns:
             A list of the Infoblox objects requested
@@ -262,52 +359,102 @@ class Connector(object):
         """
         self._validate_obj_type_or_die(obj_type, obj_type_expected=False)
 
+        cache_key = None
+        if self.cache is not None:
+            # key is built before query params are modified
+            cache_key = self.cache.make_key(obj_type, payload, return_fields,
+                                            extattrs, force_proxy,
+                                            max_results, paging)
+            found, ib_object = self.cache.get(cache_key)
+            if found:
+                return ib_object
+            generation = self.cache.generation(cache_key)
+
+        query_params = self._get_query_params(payload=payload,
+                                              return_fields=return_fields,
+                                              max_results=max_results,
+                                              paging=paging)
+        if cache_key is None:
+            return self._search_object(obj_type, query_params, extattrs,
+                                       force_proxy)
+        try:
+            ib_object = self._search_object(obj_type, query_params, extattrs,
+                                            force_proxy, raise_on_error=True)
+        except ib_ex.InfobloxSearchError:
+            # failed search is not cached, so it is retried next time
+            return None
+        self.cache.set(cache_key, ib_object, generation)
+        return ib_object
+
+    def _search_object(self, obj_type, query_params, extattrs, force_proxy,
+                       raise_on_error=False):
+        proxy_flag = self._get_proxy_flag(obj_type, force_proxy)
+        error = None
+        try:
+            ib_object = self._handle_get_object(obj_type, query_params,
+                                                extattrs, proxy_flag,
+                                                raise_on_error=raise_on_error)
+        except ib_ex.InfobloxSearchError as e:
+            ib_object, error = None, e
+        # Do second get call with force_proxy if needed
+        if self._need_proxied_search(obj_type, force_proxy, proxy_flag,
+                                     bool(ib_object)):
+            ib_object = self._handle_get_object(obj_type, query_params,
+                                                extattrs, proxy_flag=True,
+                                                raise_on_error=raise_on_error)
+            self.proxy_search.second_search_done(obj_type, bool(ib_object))
+        elif error is not None and raise_on_error:
+            raise error
+        return ib_object or None
+
+    def _get_proxy_flag(self, obj_type, force_proxy):
+        # Clear proxy flag if wapi version is too old (non-cloud)
+        if not self.cloud_api_enabled:
+            return False
+        return force_proxy or self.proxy_search.use_gm(obj_type)
+
+    def _need_proxied_search(self, obj_type, force_proxy, proxy_flag, found):
+        if not self.cloud_api_enabled:
+            return False
+        return self.proxy_search.first_search_done(
+            obj_type, proxy_flag, found, forced=force_proxy)
+
+    def _get_query_params(self, payload=None, return_fields=None,
+                          max_results=None, paging=None):
         # max_results passed to get_object has priority over
         # one defined as connector option
         if max_results is None and self.max_results:
             max_results = self.max_results
 
-        if paging is False and self.paging:
+        if paging is None:
             paging = self.paging
 
-        query_params = self._build_query_params(payload=payload,
-                                                return_fields=return_fields,
-                                                max_results=max_results,
-                                                paging=paging)
-        # Clear proxy flag if wapi version is too old (non-cloud)
-        proxy_flag = self.cloud_api_enabled and force_proxy
-        ib_object = self._handle_get_object(obj_type, query_params, extattrs,
-                                            proxy_flag)
-        if ib_object:
-            return ib_object
-
-        # Do second get call with force_proxy if not done yet
-        if self.cloud_api_enabled and not force_proxy:
-            ib_object = self._handle_get_object(obj_type, query_params,
-                                                extattrs, proxy_flag=True)
-            if ib_object:
-                return ib_object
+        return self._build_query_params(payload=payload,
+                                        return_fields=return_fields,
+                                        max_results=max_results,
+                                        paging=paging)
+
+    @staticmethod
+    def _set_page_size(query_params):
+        if not ('_max_results' in query_params):
+            query_params['_max_results'] = 1000
 
-        return None
+        if query_params['_max_results'] < 0:
+            # Since pagination is enabled with _max_results < 0,
+            # set _max_results = 1000.
+            query_params['_max_results'] = 1000
 
     def _handle_get_object(self, obj_type, query_params, extattrs,
-                           proxy_flag=False):
+                           proxy_flag=False, raise_on_error=False):
         if '_paging' in query_params:
-
-            if not ('_max_results' in query_params):
-                query_params['_max_results'] = 1000
-
-            if query_params['_max_results'] < 0:
-                # Since pagination is enabled with _max_results < 0,
-                # set _max_results = 1000.
-                query_params['_max_results'] = 1000
+            self._set_page_size(query_params)
 
             result = []
             while True:
 
                 url = self._construct_url(obj_type, query_params, extattrs,
                                           force_proxy=proxy_flag)
-                resp = self._get_object(obj_type, url)
+                resp = self._get_paged_reply(obj_type, url, raise_on_error)
                 if not resp:
                     return None
                 if not ('next_page_id' in resp):
@@ -320,24 +467,410 @@ class Connector(object):
         else:
             url = self._construct_url(obj_type, query_params, extattrs,
                                       force_proxy=proxy_flag)
-            return self._get_object(obj_type, url)
+            return self._get_object(obj_type, url,
+                                    raise_on_error=raise_on_error)
+
+    def iter_objects(self, obj_type, payload=None, return_fields=None,
+                     extattrs=None, force_proxy=False, page_size=None,
+                     prefetch=False, raise_on_error=False):
+        """Iterate over Infoblox objects of type 'obj_type' page by page
 
-    def _get_object(self, obj_type, url):
+        Unlike get_object, pages are requested lazily using paging, so
+        only one page of objects is kept in memory at a time.
+
+        Args:
+            obj_type  (str): Infoblox object type, e.g. 'network',
+                            'range', etc.
+            payload (dict): Payload with data to send
+            return_fields (list): List of fields to be returned
+            extattrs      (dict): List of Extensible Attributes
+            force_proxy   (bool): Set _proxy_search flag
+                                  to process requests on GM
+            page_size     (int): Number of objects requested per page,
+                max_results connector option or 1000 is used by default.
+            prefetch     (bool): Request the next page in background
+                thread while objects of the current page are consumed.
+            raise_on_error (bool): Raise InfobloxSearchError if a page
+                cannot be fetched, instead of ending the iteration.
+
+        Returns:
+            Generator of Infoblox objects (dicts)
+        Raises:
+            InfobloxSearchError
+        """
+        self._validate_obj_type_or_die(obj_type, obj_type_expected=False)
+
+        query_params = self._get_query_params(payload=payload,
+                                              return_fields=return_fields,
+                                              max_results=page_size,
+                                              paging=True)
+        self._set_page_size(query_params)
+        return self._iter_objects(obj_type, query_params, extattrs,
+                                  force_proxy, prefetch, raise_on_error)
+
+    def _iter_objects(self, obj_type, query_params, extattrs, force_proxy,
+                      prefetch, raise_on_error=False):
+        proxy_flag = self._get_proxy_flag(obj_type, force_proxy)
+        found = False
+        for item in self._iter_pages(obj_type, query_params, extattrs,
+                                     proxy_flag, prefetch, raise_on_error):
+            found = True
+            yield item
+
+        # Do second search with force_proxy if needed
+        if self._need_proxied_search(obj_type, force_proxy, proxy_flag,
+                                     found):
+            for item in self._iter_pages(obj_type, query_params, extattrs,
+                                         True, prefetch, raise_on_error):
+                found = True
+                yield item
+            self.proxy_search.second_search_done(obj_type, found)
+
+    def _iter_pages(self, obj_type, query_params, extattrs, proxy_flag,
+                    prefetch, raise_on_error=False):
+        query_params = query_params.copy()
+        if self.stream_pages:
+            # next page id is known only after the whole page is read,
+            # so streamed pages are not prefetched
+            for item in self._iter_streamed_pages(obj_type, query_params,
+                                                  extattrs, proxy_flag,
+                                                  raise_on_error):
+                yield item
+            return
+
+        url = self._construct_url(obj_type, query_params, extattrs,
+                                  force_proxy=proxy_flag)
+        resp = self._get_page(obj_type, url, raise_on_error)
+        while resp:
+            next_page = None
+            if 'next_page_id' in resp:
+                query_params['_page_id'] = resp['next_page_id']
+                next_url = self._construct_url(obj_type, query_params,
+                                               extattrs,
+                                               force_proxy=proxy_flag)
+                if prefetch:
+                    next_page = utils.BackgroundCall(self._get_page,
+                                                     obj_type, next_url,
+                                                     raise_on_error)
+                else:
+                    next_page = functools.partial(self._get_page,
+                                                  obj_type, next_url,
+                                                  raise_on_error)
+            for item in resp['result']:
+                yield item
+            if next_page is None:
+                return
+            resp = next_page()
+
+    @reraise_neutron_exception
+    def _get_page(self, obj_type, url, raise_on_error=False):
+        return self._get_object(obj_type, url,
+                                raise_on_error=raise_on_error)
+
+    def _iter_streamed_pages(self, obj_type, query_params, extattrs,
+                             proxy_flag, raise_on_error=False):
+        while True:
+            url = self._construct_url(obj_type, query_params, extattrs,
+                                      force_proxy=proxy_flag)
+            page = self._get_streamed_page(obj_type, url, raise_on_error)
+            if page is None:
+                return
+            try:
+                for item in page:
+                    yield item
+            except ValueError as e:
+                raise ib_ex.InfobloxConnectionError(reason=e)
+            if page.next_page_id is None:
+                return
+            query_params['_page_id'] = page.next_page_id
+
+    def _get_paged_reply(self, obj_type, url, raise_on_error=False):
+        """Returns page of paged search as dict, decoded from stream
+        if stream_pages option is set"""
+        if not self.stream_pages:
+            return self._get_object(obj_type, url,
+                                    raise_on_error=raise_on_error)
+        page = self._get_streamed_page(obj_type, url, raise_on_error)
+        if page is None:
+            return None
+        try:
+            result = list(page)
+        except ValueError as e:
+            raise ib_ex.InfobloxConnectionError(reason=e)
+        reply = dict(page.fields)
+        reply['result'] = result
+        return reply
+
+    @reraise_neutron_exception
+    def _get_streamed_page(self, obj_type, url, raise_on_error=False):
+        """Requests page of paged search without reading the reply
+
+        Returns json_stream.PagedReplyDecoder, which decodes objects
+        while the reply is being downloaded, or None if search failed
+        and raise_on_error is not set.
+        """
         opts = self._get_request_options()
+        opts['stream'] = True
         self._log_request('get', url, opts)
-        if self.session.cookies:
-            # the first 'get' or 'post' action will generate a cookie
-            # after that, we don't need to re-authenticate
-            self.session.auth = None
-        r = self.session.get(url, **opts)
+        try:
+            return self._send_request(
+                'get', obj_type, url, opts,
+                functools.partial(self._process_streamed_reply, obj_type,
+                                  url))
+        except ib_ex.InfobloxSearchError:
+            if raise_on_error:
+                raise
+            return None
 
+    def _process_streamed_reply(self, obj_type, url, r):
+        if r.status_code != requests.codes.ok:
+            try:
+                return self._process_get_reply(obj_type, url, r)
+            finally:
+                self._close_reply(r)
+        return json_stream.PagedReplyDecoder(self._iter_content(r))
+
+    def _iter_content(self, r):
+        """Yields chunks of streamed reply and closes it when done"""
+        try:
+            for chunk in r.iter_content(self.STREAM_CHUNK_SIZE):
+                yield chunk
+        except req_exc.Timeout as e:
+            raise ib_ex.InfobloxTimeoutError(e)
+        except req_exc.RequestException as e:
+            raise ib_ex.InfobloxConnectionError(reason=e)
+        finally:
+            self._close_reply(r)
+
+    def _send_request(self, method, obj_type, url, opts, process_reply):
+        """Sends request, returns reply processed by process_reply(r)
+
+        Request is measured and reported to metrics hooks, if any.
+        """
+        metrics = self._start_metrics(method, obj_type, url, opts)
+        if metrics is None:
+            return process_reply(self._make_request(method, url, opts))
+        try:
+            r = self._make_request(method, url, opts)
+            metrics.reply_received(r)
+            return metrics.decode(process_reply, r)
+        except Exception as e:
+            metrics.error = e
+            raise
+        finally:
+            self._finish_metrics(metrics)
+
+    def add_metrics_hook(self, hook):
+        """Registers hook, see metrics.MetricsHook"""
+        self.metrics_hooks.append(hook)
+
+    def _start_metrics(self, method, obj_type, url, opts):
+        if not self.metrics_hooks:
+            return None
+        metrics = ib_metrics.RequestMetrics(
+            method, obj_type, url, bytes_sent=len(opts.get('data') or ''),
+            streamed=bool(opts.get('stream')))
+        self._call_hooks('before_request', metrics)
+        return metrics
+
+    def _finish_metrics(self, metrics):
+        metrics.finish()
+        self._call_hooks('after_response', metrics)
+
+    def _call_hooks(self, name, metrics):
+        for hook in self.metrics_hooks:
+            try:
+                getattr(hook, name)(metrics)
+            except Exception as e:
+                LOG.warning("Metrics hook %s failed: %s", hook, e)
+
+    def _make_request(self, method, url, opts):
+        """Sends request, logging in first if there is no session cookie
+
+        Request rejected because of expired session cookie is sent again
+        with a newer cookie found in cookie store, if any, else after a new
+        login shared with other waiting requests.
+        """
+        # request is sent again with a cookie saved by another process,
+        # then after a new login
+        for _ in range(3):
+            token = self.auth_state.begin_request(self.session)
+            r = None
+            try:
+                r = self._request_with_retries(method, url, opts)
+            finally:
+                resend = self.auth_state.end_request(
+                    self.session, token,
+                    r.status_code if r is not None else None)
+            login = token[0]
+            if login and self.cookie_store is not None:
+                self._save_cookies(r)
+            if not resend:
+                break
+            # release connection of unread streamed reply
+            self._close_reply(r)
+        return r
+
+    @property
+    def _cookie_key(self):
+        return '%s@%s' % (self.username, self.host)
+
+    def _load_cookies(self):
+        """Restores session cookie saved by a previous login"""
+        if self.cookie_store is None:
+            return
+        try:
+            cookies = self.cookie_store.load(self._cookie_key)
+        except Exception as e:
+            LOG.warning("Failed to load session cookie: %s", e)
+            return
+        self._set_cookies(self.session, cookies)
+
+    @staticmethod
+    def _set_cookies(session, cookies):
+        for cookie in cookies or []:
+            session.cookies.set_cookie(
+                requests.cookies.create_cookie(**cookie))
+
+    def _reload_cookies(self, session):
+        """Called when session cookie is rejected as expired
+
+        Another process may have logged in and saved a new cookie since
+        this one was loaded, so it is tried (returns True) instead of
+        logging in again. Stored cookie is deleted only if it is the
+        rejected one, so a new cookie of another process is kept.
+        """
+        if self.cookie_store is None:
+            return False
+        rejected = cookie_store.dump_cookies(session.cookies)
+        try:
+            stored = self.cookie_store.discard(self._cookie_key, rejected)
+        except Exception as e:
+            LOG.warning("Failed to reload session cookie: %s", e)
+            return False
+        if not stored:
+            return False
+        LOG.info("Session cookie expired, using one saved by another "
+                 "login to %s", self.host)
+        session.cookies.clear()
+        self._set_cookies(session, stored)
+        return True
+
+    def _cookie_expired(self):
+        LOG.info("Session cookie expired, logging in to %s", self.host)
+
+    def _save_cookies(self, r):
+        """Stores session cookie set by a login"""
+        if cookie_store.AUTH_COOKIE not in r.cookies:
+            return
+        try:
+            self.cookie_store.save(
+                self._cookie_key,
+                cookie_store.dump_cookies(self.session.cookies))
+        except Exception as e:
+            LOG.warning("Failed to save session cookie: %s", e)
+
+    def _request_with_retries(self, method, url, opts):
+        attempt = 0
+        while True:
+            start = utils.monotonic()
+            try:
+                r = self._send_governed(method, url, opts)
+            except req_exc.Timeout as e:
+                self.retry_policy.record_attempt(
+                    method, attempt, utils.monotonic() - start,
+                    type(e).__name__)
+                if not self.retry_policy.should_retry(method, attempt,
+                                                      error=e):
+                    raise
+                reason = 'timeout'
+            else:
+                self.retry_policy.record_attempt(
+                    method, attempt, utils.monotonic() - start,
+                    r.status_code)
+                if not self.retry_policy.should_retry(
+                        method, attempt, status_code=r.status_code):
+                    return r
+                # release connection of unread streamed reply
+                self._close_reply(r)
+                reason = r.status_code
+            delay = self.retry_policy.get_delay(attempt)
+            LOG.warning("Retrying %s request to %s in %.2f seconds "
+                        "after failure: %s", method, url, delay, reason)
+            time.sleep(delay)
+            attempt += 1
+
+    def _send_governed(self, method, url, opts):
+        """Sends request within limits of its governor
+
+        Streamed reply holds the concurrency slot until it is closed
+        with _close_reply.
+        """
+        governor = self._get_governor(method)
+        if not opts.get('stream'):
+            with governor:
+                return getattr(self.session, method)(url, **opts)
+
+        slot = governor.acquire()
+        try:
+            r = getattr(self.session, method)(url, **opts)
+        except BaseException:
+            slot.release()
+            raise
+        r.governor_slot = slot
+        return r
+
+    @staticmethod
+    def _close_reply(r):
+        """Closes reply, freeing concurrency slot held by streamed one"""
+        try:
+            r.close()
+        finally:
+            slot = getattr(r, 'governor_slot', None)
+            if slot is not None:
+                slot.release()
+
+    def _get_governor(self, method):
+        if method == 'get':
+            return self._read_governor
+        return self._write_governor
+
+    def _get_object(self, obj_type, url, raise_on_error=False):
+        """Returns decoded reply, None if search failed
+
+        InfobloxSearchError is raised instead of returning None
+        if raise_on_error is set.
+        """
+        try:
+            if self.gets_in_flight is None:
+                return self._send_get(obj_type, url)
+            return self.gets_in_flight.do(
+                self.gets_in_flight.make_key(obj_type, url),
+                functools.partial(self._send_get, obj_type, url))
+        except ib_ex.InfobloxSearchError:
+            if raise_on_error:
+                raise
+            return None
+
+    def _send_get(self, obj_type, url):
+        opts = self._get_request_options()
+        self._log_request('get', url, opts)
+        return self._send_request('get', obj_type, url, opts,
+                                  functools.partial(self._process_get_reply,
+                                                    obj_type, url))
+
+    def _process_get_reply(self, obj_type, url, r):
         self._validate_authorized(r)
 
         if r.status_code != requests.codes.ok:
             LOG.warning("Failed on object search with url %s: %s",
                         url, r.content)
-            return None
-        return self._parse_reply(r)
+            raise ib_ex.InfobloxSearchError(
+                response=utils.safe_json_load(r.content, self.codec.loads),
+                obj_type=obj_type,
+                content=r.content,
+                code=r.status_code)
+        return self._parse_reply(r, self.codec.loads)
 
     @reraise_neutron_exception
     def create_object(self, obj_type, payload, return_fields=None):
@@ -354,25 +887,31 @@ class Connector(object):
             InfobloxException
         """
         self._validate_obj_type_or_die(obj_type)
+        self._invalidate_cache(obj_type)
 
         query_params = self._build_query_params(return_fields=return_fields)
 
         url = self._construct_url(obj_type, query_params)
         opts = self._get_request_options(data=payload)
         self._log_request('post', url, opts)
-        if self.session.cookies:
-            # the first 'get' or 'post' action will generate a cookie
-            # after that, we don't need to re-authenticate
-            self.session.auth = None
-        r = self.session.post(url, **opts)
-
+        try:
+            return self._send_request(
+                'post', obj_type, url, opts,
+                functools.partial(self._process_create_reply, obj_type,
+                                  payload))
+        finally:
+            self._change_done(obj_type)
+
+    def _process_create_reply(self, obj_type, payload, r):
         self._validate_authorized(r)
 
         if r.status_code != requests.codes.CREATED:
-            response = utils.safe_json_load(r.content)
-            already_assigned = 'is assigned to another network view'
-            if response and already_assigned in response.get('text'):
+            response = utils.safe_json_load(r.content, self.codec.loads)
+            text = (response or {}).get('text') or ''
+            if 'is assigned to another network view' in text:
                 exception = ib_ex.InfobloxMemberAlreadyAssigned
+            elif 'already exists' in text:
+                exception = ib_ex.InfobloxObjectAlreadyExists
             else:
                 exception = ib_ex.InfobloxCannotCreateObject
             raise exception(
@@ -382,7 +921,26 @@ class Connector(object):
                 args=payload,
                 code=r.status_code)
 
-        return self._parse_reply(r)
+        return self._parse_reply(r, self.codec.loads)
+
+    def _invalidate_cache(self, obj_type_or_ref):
+        """Drop cached search replies for type of object being changed
+
+        Searches of this type already in flight are not joined anymore,
+        so they can't return replies older than the change.
+        """
+        if self.cache is not None:
+            self.cache.invalidate(obj_type_or_ref)
+        if self.gets_in_flight is not None:
+            self.gets_in_flight.forget(obj_type_or_ref)
+
+    def _change_done(self, obj_type_or_ref):
+        """Drop cached search replies again once the change has returned
+
+        Searches completed or started in the meantime could have read
+        the object before the change, so they are not joined anymore.
+        """
+        self._invalidate_cache(obj_type_or_ref)
 
     def _check_service_availability(self, operation, resp, ref):
         if resp.status_code == requests.codes.SERVICE_UNAVAILABLE:
@@ -395,14 +953,21 @@ class Connector(object):
 
     @reraise_neutron_exception
     def call_func(self, func_name, ref, payload, return_fields=None):
+        self._invalidate_cache(ref)
         query_params = self._build_query_params(return_fields=return_fields)
         query_params['_function'] = func_name
 
         url = self._construct_url(ref, query_params)
         opts = self._get_request_options(data=payload)
         self._log_request('post', url, opts)
-        r = self.session.post(url, **opts)
+        try:
+            return self._send_request(
+                'post', utils.get_obj_type(ref), url, opts,
+                functools.partial(self._process_func_reply, func_name, ref))
+        finally:
+            self._change_done(ref)
 
+    def _process_func_reply(self, func_name, ref, r):
         self._validate_authorized(r)
 
         if r.status_code not in (requests.codes.CREATED,
@@ -410,13 +975,13 @@ class Connector(object):
             self._check_service_availability('call_func', r, ref)
 
             raise ib_ex.InfobloxFuncException(
-                response=jsonutils.loads(r.content),
+                response=self.codec.loads(r.content),
                 ref=ref,
                 func_name=func_name,
                 content=r.content,
                 code=r.status_code)
 
-        return self._parse_reply(r)
+        return self._parse_reply(r, self.codec.loads)
 
     @reraise_neutron_exception
     def update_object(self, ref, payload, return_fields=None):
@@ -430,25 +995,32 @@ class Connector(object):
         Raises:
             InfobloxException
         """
+        self._invalidate_cache(ref)
         query_params = self._build_query_params(return_fields=return_fields)
 
         opts = self._get_request_options(data=payload)
         url = self._construct_url(ref, query_params)
         self._log_request('put', url, opts)
-        r = self.session.put(url, **opts)
+        try:
+            return self._send_request(
+                'put', utils.get_obj_type(ref), url, opts,
+                functools.partial(self._process_update_reply, ref))
+        finally:
+            self._change_done(ref)
 
+    def _process_update_reply(self, ref, r):
         self._validate_authorized(r)
 
         if r.status_code != requests.codes.ok:
             self._check_service_availability('update', r, ref)
 
             raise ib_ex.InfobloxCannotUpdateObject(
-                response=jsonutils.loads(r.content),
+                response=self.codec.loads(r.content),
                 ref=ref,
                 content=r.content,
                 code=r.status_code)
 
-        return self._parse_reply(r)
+        return self._parse_reply(r, self.codec.loads)
 
     @reraise_neutron_exception
     def delete_object(self, ref, delete_arguments=None):
@@ -462,25 +1034,81 @@ class Connector(object):
         Raises:
             InfobloxException
         """
+        self._invalidate_cache(ref)
         opts = self._get_request_options()
         if not isinstance(delete_arguments, dict):
             delete_arguments = {}
         url = self._construct_url(ref, query_params=delete_arguments)
         self._log_request('delete', url, opts)
-        r = self.session.delete(url, **opts)
+        try:
+            return self._send_request(
+                'delete', utils.get_obj_type(ref), url, opts,
+                functools.partial(self._process_delete_reply, ref))
+        finally:
+            self._change_done(ref)
 
+    def _process_delete_reply(self, ref, r):
         self._validate_authorized(r)
 
         if r.status_code != requests.codes.ok:
             self._check_service_availability('delete', r, ref)
 
             raise ib_ex.InfobloxCannotDeleteObject(
-                response=jsonutils.loads(r.content),
+                response=self.codec.loads(r.content),
                 ref=ref,
                 content=r.content,
                 code=r.status_code)
 
-        return self._parse_reply(r)
+        return self._parse_reply(r, self.codec.loads)
+
+    @reraise_neutron_exception
+    def multi_request(self, requests_data):
+        """Execute several operations in one call to WAPI 'request' object
+
+        NIOS processes all operations as a single transaction,
+        so if one of them fails nothing is applied.
+
+        Args:
+            requests_data (list): List of dicts with 'method', 'object',
+                and optional 'data' and 'args' keys
+        Returns:
+            List of replies, one per operation in the same order
+        Raises:
+            InfobloxMultiRequestException
+        """
+        for request in requests_data:
+            self._invalidate_cache(request['object'])
+        url = self._construct_url('request')
+        opts = self._get_request_options(data=requests_data)
+        self._log_request('post', url, opts)
+        try:
+            return self._send_request('post', 'request', url, opts,
+                                      self._process_multi_reply)
+        finally:
+            for request in requests_data:
+                self._change_done(request['object'])
+
+    def _process_multi_reply(self, r):
+        self._validate_authorized(r)
+
+        if r.status_code not in (requests.codes.CREATED,
+                                 requests.codes.ok):
+            self._check_service_availability('multi_request', r, 'request')
+
+            raise ib_ex.InfobloxMultiRequestException(
+                response=utils.safe_json_load(r.content, self.codec.loads),
+                content=r.content,
+                code=r.status_code)
+
+        return self._parse_reply(r, self.codec.loads)
+
+    def batch(self, chunk_size=ib_batch.DEFAULT_CHUNK_SIZE):
+        """Queue create/update/delete operations to send them in bulk
+
+        Returns batch.Batch, which sends queued operations through
+        multi_request on exit from the 'with' block. See batch.Batch.
+        """
+        return ib_batch.Batch(self, chunk_size=chunk_size)
 
     @staticmethod
     def is_cloud_wapi(wapi_version):
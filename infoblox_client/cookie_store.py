@@ -0,0 +1,162 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import contextlib
+import json
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    # no advisory locks on Windows, files are still replaced atomically
+    fcntl = None
+
+import six
+
+LOG = logging.getLogger(__name__)
+
+AUTH_COOKIE = 'ibapauth'
+
+
+class CookieStore(object):
+    """Base class of persistent store of WAPI session cookies
+
+    Cookies are stored per key (user and grid master) as a list of dicts
+    with 'name', 'value', 'domain', 'path', 'secure' and 'expires' keys,
+    so workers can reuse the session of a previous login instead of
+    authenticating again.
+    """
+
+    def load(self, key):
+        """Returns stored cookies for key or None"""
+        raise NotImplementedError()
+
+    def save(self, key, cookies):
+        raise NotImplementedError()
+
+    def delete(self, key):
+        raise NotImplementedError()
+
+    def discard(self, key, cookies):
+        """Deletes cookies of key only if they are still the given ones
+
+        Returns cookies stored for key, if they are different ones.
+        Store shared by processes should override it to do it atomically.
+        """
+        stored = self.load(key)
+        if stored and not same_cookies(stored, cookies):
+            return stored
+        if stored:
+            self.delete(key)
+        return None
+
+
+class FileCookieStore(CookieStore):
+    """Stores cookies in JSON file shared by processes
+
+    Access is serialized by advisory lock on '<path>.lock' file, and
+    the file is replaced atomically, so readers never see partial data.
+    Files are created readable by owner only, as session cookie
+    gives the same access as the password.
+    """
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+        self.lock_path = self.path + '.lock'
+
+    @contextlib.contextmanager
+    def _locked(self, exclusive=False):
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            # closing the file releases the lock
+            os.close(fd)
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError):
+            return {}
+        except ValueError:
+            LOG.warning("Ignoring malformed cookie store %s", self.path)
+            return {}
+
+    def _write(self, data):
+        tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.rename(tmp_path, self.path)
+
+    def load(self, key):
+        with self._locked():
+            return self._read().get(key)
+
+    def save(self, key, cookies):
+        with self._locked(exclusive=True):
+            data = self._read()
+            data[key] = cookies
+            self._write(data)
+
+    def delete(self, key):
+        with self._locked(exclusive=True):
+            data = self._read()
+            if data.pop(key, None) is not None:
+                self._write(data)
+
+    def discard(self, key, cookies):
+        with self._locked(exclusive=True):
+            data = self._read()
+            stored = data.get(key)
+            if stored and not same_cookies(stored, cookies):
+                return stored
+            if stored:
+                del data[key]
+                self._write(data)
+            return None
+
+
+def get_cookie_store(store):
+    """Returns CookieStore for 'cookie_store' connector option
+
+    Option is a path to cookie file or CookieStore instance.
+    """
+    if isinstance(store, six.string_types):
+        return FileCookieStore(store)
+    return store
+
+
+def same_cookies(cookies, other_cookies):
+    """Returns True if lists of cookie dicts have the same values"""
+    def values(cookie_list):
+        return sorted((cookie['name'], cookie['value'])
+                      for cookie in cookie_list or [])
+    return values(cookies) == values(other_cookies)
+
+
+def dump_cookies(cookie_jar, name=AUTH_COOKIE):
+    """Returns list of cookies with given name from the jar as dicts"""
+    return [{'name': cookie.name,
+             'value': cookie.value,
+             'domain': cookie.domain,
+             'path': cookie.path,
+             'secure': cookie.secure,
+             'expires': cookie.expires}
+            for cookie in cookie_jar if cookie.name == name]
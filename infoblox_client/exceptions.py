@@ -51,6 +51,10 @@ class InfobloxMemberAlreadyAssigned(InfobloxCannotCreateObject):
     pass
 
 
+class InfobloxObjectAlreadyExists(InfobloxCannotCreateObject):
+    pass
+
+
 class InfobloxCannotDeleteObject(InfobloxException):
     message = "Cannot delete object with ref %(ref)s: " \
               "%(content)s [code %(code)s]"
@@ -66,6 +70,10 @@ class InfobloxFuncException(InfobloxException):
               "ref %(ref)s: %(content)s [code %(code)s]"
 
 
+class InfobloxMultiRequestException(InfobloxException):
+    message = "Multiple request failed: %(content)s [code %(code)s]"
+
+
 class InfobloxHostRecordIpAddrNotCreated(BaseExc):
     message = "Infoblox host record ipv4addr/ipv6addr has not been " \
               "created for IP %(ip)s, mac %(mac)s"
@@ -75,6 +83,10 @@ class InfobloxCannotAllocateIp(BaseExc):
     message = "Cannot allocate IP %(ip_data)s"
 
 
+class InfobloxCannotAllocateNetwork(BaseExc):
+    message = "Cannot allocate network %(net_data)s"
+
+
 class InfobloxDidNotReturnCreatedIPBack(BaseExc):
     message = "Infoblox did not return created IP back"
 
@@ -0,0 +1,210 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import logging
+import threading
+
+from infoblox_client import exceptions as ib_ex
+from infoblox_client import objects as obj
+from infoblox_client import utils
+
+LOG = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE = 16
+DEFAULT_TTL = 60
+
+CONFLICT_CODE = 'Client.Ibap.Data.Conflict'
+
+
+def is_ip_taken(error, ip):
+    """Returns True if NIOS rejected object because ip is already used"""
+    response = getattr(error, 'response', None)
+    if not isinstance(response, dict):
+        return False
+    return (response.get('code') == CONFLICT_CODE and
+            str(ip) in (response.get('text') or response.get('Error') or ''))
+
+
+class IPPool(object):
+    """Thread safe pool of free IPs of a network or range
+
+    Free IPs are got from NIOS in blocks of up to 'block_size' by a single
+    next_available_ip call and handed out by allocate() without asking
+    NIOS again, so concurrent workers do not contend for the next IP.
+    NIOS does not reserve returned IPs: an IP is taken once an object is
+    created with it. So IPs held longer than 'ttl' seconds are dropped
+    (someone else may have taken them), and IPs handed out during last
+    'ttl' seconds are excluded when the next block is requested.
+
+    A pool has to be shared by all workers of one process, as pools of
+    other processes (or other clients) get the same free IPs from NIOS.
+    An IP taken by them meanwhile makes the create fail with a conflict,
+    such IP is to be dropped by discard() and the next one tried.
+    """
+
+    def __init__(self, parent, block_size=DEFAULT_BLOCK_SIZE,
+                 ttl=DEFAULT_TTL, timer=utils.monotonic):
+        if block_size < 1:
+            raise ValueError("IP pool block size has to be positive.")
+        self.parent = parent
+        self.block_size = block_size
+        self.ttl = ttl
+        self._timer = timer
+        self._request_size = block_size
+        # free IPs as (ip, expires) in the order they were received
+        self._free = collections.deque()
+        # IPs handed out, ip -> expires
+        self._handed_out = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.blocks = 0
+        self.allocated = 0
+        self.expired = 0
+        self.discarded = 0
+
+    def __len__(self):
+        return len(self._free)
+
+    def _expire(self, now):
+        while self._free and self._free[0][1] <= now:
+            self._free.popleft()
+            self.expired += 1
+        while self._handed_out:
+            ip, expires = next(iter(self._handed_out.items()))
+            if expires > now:
+                break
+            del self._handed_out[ip]
+
+    def _refill(self, now):
+        """Gets the next block of free IPs from NIOS
+
+        If fewer IPs than requested are free, smaller blocks are requested
+        down to a single IP. Next blocks start from the size that was
+        given, doubling it back to 'block_size' while IPs are available.
+        """
+        exclude = list(self._handed_out)
+        num = self._request_size
+        while True:
+            try:
+                ips = obj.IPAllocation.next_available_ips(
+                    self.parent, num, exclude=exclude)
+                break
+            except (ib_ex.InfobloxCannotAllocateIp,
+                    ib_ex.InfobloxFuncException):
+                if num == 1:
+                    raise
+                num = max(1, num // 2)
+        if num == self._request_size:
+            num = min(self.block_size, num * 2)
+        self._request_size = num
+        self.blocks += 1
+        expires = now + self.ttl
+        self._free.extend((ip, expires) for ip in ips)
+
+    def allocate(self):
+        """Returns free IP, gets the next block from NIOS if needed"""
+        with self._lock:
+            now = self._timer()
+            self._expire(now)
+            if not self._free:
+                self._refill(now)
+            ip, _ = self._free.popleft()
+            self._handed_out[ip] = now + self.ttl
+            self.allocated += 1
+            return ip
+
+    def release(self, ip):
+        """Puts back IP that was allocated but not used"""
+        with self._lock:
+            expires = self._handed_out.pop(ip, None)
+            if expires is not None and expires > self._timer():
+                self._free.appendleft((ip, expires))
+
+    def discard(self, ip):
+        """Forgets allocated IP that was taken by someone else"""
+        with self._lock:
+            if self._handed_out.pop(ip, None) is not None:
+                self.discarded += 1
+
+    def close(self):
+        """Drops free IPs, returns number of dropped IPs"""
+        with self._lock:
+            dropped = len(self._free)
+            self._free.clear()
+            self._handed_out.clear()
+            return dropped
+
+
+class IPPools(object):
+    """IP pools of networks and ranges, created on first use
+
+    Can be passed to IPAllocation.next_available_ip_from_range and
+    next_available_ip_from_cidr, or to InfobloxObjectManager, to get
+    IPs from the pools instead of allocating them one by one on NIOS.
+    Like IPPool, pools are meant to be shared within one process.
+    """
+
+    def __init__(self, connector, block_size=DEFAULT_BLOCK_SIZE,
+                 ttl=DEFAULT_TTL, timer=utils.monotonic):
+        self.connector = connector
+        self.block_size = block_size
+        self.ttl = ttl
+        self._timer = timer
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return len(self._pools)
+
+    def _get_pool(self, key, build_parent):
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                pool = self._pools[key] = IPPool(
+                    build_parent(), block_size=self.block_size,
+                    ttl=self.ttl, timer=self._timer)
+            return pool
+
+    def get_range_pool(self, net_view_name, first_ip, last_ip):
+        return self._get_pool(
+            ('range', net_view_name, first_ip, last_ip),
+            lambda: obj.IPRange(self.connector,
+                                network_view=net_view_name,
+                                start_addr=first_ip,
+                                end_addr=last_ip))
+
+    def get_network_pool(self, net_view_name, cidr):
+        return self._get_pool(
+            ('network', net_view_name, cidr),
+            lambda: obj.Network(self.connector,
+                                network_view=net_view_name,
+                                cidr=cidr))
+
+    def close(self):
+        """Drops free IPs of all pools"""
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools.clear()
+        dropped = sum(pool.close() for pool in pools)
+        if dropped:
+            LOG.debug("Dropped %d unused IPs of %d pools",
+                      dropped, len(pools))
+        return dropped
@@ -0,0 +1,111 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import json
+
+import six
+from oslo_serialization import jsonutils
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from infoblox_client import exceptions as ib_ex
+
+AUTO = 'auto'
+
+
+class JsonCodec(object):
+    """Encodes request bodies and decodes replies using stdlib json
+
+    Codecs take and return bytes: dumps() returns UTF-8 encoded bytes,
+    which are sent as is, and loads() accepts reply content as bytes
+    or text. Decode errors are raised as ValueError.
+    Values not supported by JSON are converted with
+    jsonutils.to_primitive, as jsonutils.dumps does.
+    """
+
+    name = 'json'
+
+    @staticmethod
+    def available():
+        return True
+
+    def dumps(self, obj):
+        return json.dumps(obj, default=jsonutils.to_primitive).encode('utf-8')
+
+    def loads(self, data):
+        if isinstance(data, six.binary_type):
+            data = data.decode('utf-8')
+        return json.loads(data)
+
+
+class OsloCodec(JsonCodec):
+    """oslo_serialization jsonutils, produces text instead of bytes"""
+
+    name = 'oslo'
+
+    def dumps(self, obj):
+        return jsonutils.dumps(obj)
+
+    def loads(self, data):
+        return jsonutils.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson, encodes to and decodes from bytes without copies to text"""
+
+    name = 'orjson'
+
+    @staticmethod
+    def available():
+        return orjson is not None
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, default=jsonutils.to_primitive)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+# codecs in order of preference for 'auto'
+CODECS = [OrjsonCodec, JsonCodec, OsloCodec]
+
+
+def register_codec(codec_class):
+    """Adds codec class, preferred by 'auto' over already known ones"""
+    CODECS.insert(0, codec_class)
+
+
+def get_codec(codec=AUTO):
+    """Returns codec instance by name
+
+    'auto' picks the fastest installed codec. Codec instances (objects
+    with dumps and loads methods) are returned as is.
+    """
+    if not isinstance(codec, six.string_types):
+        return codec
+    for codec_class in CODECS:
+        if codec == AUTO and codec_class.available():
+            return codec_class()
+        if codec == codec_class.name:
+            if not codec_class.available():
+                msg = "JSON codec %s is not installed" % codec
+                raise ib_ex.InfobloxConfigException(msg=msg)
+            return codec_class()
+    msg = ("JSON codec %s is not supported, use one of %s" %
+           (codec, ', '.join([AUTO] + [c.name for c in CODECS])))
+    raise ib_ex.InfobloxConfigException(msg=msg)
@@ -0,0 +1,145 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import codecs
+import json
+
+from infoblox_client import utils
+
+WHITESPACE = ' \t\n\r'
+
+
+class PagedReplyDecoder(object):
+    """Incremental decoder of WAPI paged search reply
+
+    Reply is read from iterable of byte chunks. Iterating the decoder
+    yields objects of 'result' list as soon as each of them is received,
+    so the whole reply is never kept in memory. Other top level keys
+    ('next_page_id') are stored in 'fields' as they are decoded and are
+    complete once iteration is over.
+    Raises ValueError if reply is not a JSON object or is truncated.
+    """
+
+    def __init__(self, chunks, decoder=None):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder('utf-8')()
+        self._keys = {}
+        self._json_decoder = decoder or json.JSONDecoder(
+            object_pairs_hook=self._share_keys)
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self.fields = {}
+        self.bytes_read = 0
+        self.decode_time = 0.0
+
+    def _share_keys(self, pairs):
+        # json module shares equal keys only within one decode call,
+        # do the same across all objects of the reply
+        keys = self._keys
+        return dict((keys.setdefault(key, key), value)
+                    for key, value in pairs)
+
+    @property
+    def next_page_id(self):
+        return self.fields.get('next_page_id')
+
+    def _fill(self):
+        """Appends next chunk to buffer, returns False at end of reply"""
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            self.bytes_read += len(chunk)
+            # drop already decoded text, so buffer holds one object at most
+            self._buf = (self._buf[self._pos:] +
+                         self._text_decoder.decode(chunk))
+            self._pos = 0
+            return True
+        self._eof = True
+        return False
+
+    def _next_char(self):
+        """Skips whitespace, returns next character without consuming it"""
+        while True:
+            while self._pos < len(self._buf):
+                char = self._buf[self._pos]
+                if char not in WHITESPACE:
+                    return char
+                self._pos += 1
+            if not self._fill():
+                raise ValueError("Unexpected end of reply")
+
+    def _expect(self, *chars):
+        char = self._next_char()
+        if char not in chars:
+            raise ValueError("Expected %s at position %d, got %r" % (
+                ' or '.join(chars), self.bytes_read, char))
+        self._pos += 1
+        return char
+
+    def _decode_value(self):
+        self._next_char()
+        while True:
+            start = utils.monotonic()
+            try:
+                value, end = self._json_decoder.raw_decode(self._buf,
+                                                           self._pos)
+            except ValueError:
+                # value is not received completely yet
+                value, end = None, None
+            finally:
+                self.decode_time += utils.monotonic() - start
+            # number at the end of buffer may continue in the next chunk
+            if end is not None and (end < len(self._buf) or self._eof):
+                self._pos = end
+                return value
+            if not self._fill():
+                if end is None:
+                    raise ValueError("Unexpected end of reply")
+                self._pos = end
+                return value
+
+    def __iter__(self):
+        self._expect('{')
+        if self._next_char() == '}':
+            self._pos += 1
+        else:
+            for item in self._iter_object():
+                yield item
+        # read the rest of the reply, so the source of chunks is exhausted
+        while self._fill():
+            pass
+
+    def _iter_object(self):
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+            if key == 'result' and self._next_char() == '[':
+                for item in self._iter_list():
+                    yield item
+            else:
+                self.fields[key] = self._decode_value()
+            if self._expect(',', '}') == '}':
+                return
+
+    def _iter_list(self):
+        self._expect('[')
+        if self._next_char() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._decode_value()
+            if self._expect(',', ']') == ']':
+                return
@@ -0,0 +1,204 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import collections
+import threading
+
+from infoblox_client import utils
+
+# upper bounds of latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1, 2.5, 5, 10, float('inf'))
+
+
+class RequestMetrics(object):
+    """Measurements of a single WAPI request, passed to hooks
+
+    before_request hooks get method, obj_type, url and bytes_sent.
+    after_response hooks get the rest: status_code (None if no reply
+    was received), bytes_received, pages (1 if reply is a page of paged
+    search, 0 otherwise), decode_time (seconds spent decoding reply),
+    latency (wall time from sending the request, retries included,
+    to decoded reply) and error raised by request, if any.
+    Streamed replies are decoded while the caller consumes them, so
+    their bytes_received is taken from Content-Length header and
+    decode_time is not measured.
+    """
+
+    def __init__(self, method, obj_type, url, bytes_sent=0,
+                 streamed=False, timer=utils.monotonic):
+        self.method = method
+        self.obj_type = obj_type
+        self.url = url
+        self.bytes_sent = bytes_sent
+        self.streamed = streamed
+        self.status_code = None
+        self.bytes_received = 0
+        self.pages = 0
+        self.decode_time = 0.0
+        self.latency = None
+        self.error = None
+        self._timer = timer
+        self._start = timer()
+
+    def __repr__(self):
+        return "RequestMetrics: {0} {1} {2} in {3}s".format(
+            self.method, self.obj_type, self.status_code, self.latency)
+
+    def reply_received(self, reply):
+        self.status_code = reply.status_code
+        if self.streamed:
+            # reading content would download the whole reply
+            self.bytes_received = int(
+                reply.headers.get('Content-Length') or 0)
+        else:
+            self.bytes_received = len(reply.content or '')
+
+    def decode(self, decode_func, reply):
+        """Calls decode_func(reply) measuring time it takes"""
+        start = self._timer()
+        try:
+            result = decode_func(reply)
+        finally:
+            self.decode_time = self._timer() - start
+        if self.streamed:
+            # only pages of paged search are streamed
+            self.pages = int(result is not None)
+        elif isinstance(result, dict) and 'result' in result:
+            self.pages = 1
+        return result
+
+    def finish(self):
+        self.latency = self._timer() - self._start
+
+
+class MetricsHook(object):
+    """Base class for Connector metrics hooks
+
+    Hooks are registered with Connector.add_metrics_hook or passed in
+    'metrics_hooks' connector option. Hooks are called from the thread
+    (or event loop) making the request, so they have to be fast and
+    thread safe. Errors raised by hooks are logged and ignored.
+    """
+
+    def before_request(self, metrics):
+        pass
+
+    def after_response(self, metrics):
+        pass
+
+
+class HistogramCollector(MetricsHook):
+    """Collects request metrics in memory, per method and object type
+
+    Latencies are counted in histogram 'buckets' (upper bounds in
+    seconds), so memory use does not depend on the number of requests.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        if self.buckets[-1] != float('inf'):
+            self.buckets += (float('inf'),)
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _new_stats(self):
+        return {'count': 0,
+                'errors': 0,
+                'status_codes': collections.Counter(),
+                'bytes_sent': 0,
+                'bytes_received': 0,
+                'pages': 0,
+                'decode_time': 0.0,
+                'latency': 0.0,
+                'latency_max': 0.0,
+                'histogram': [0] * len(self.buckets)}
+
+    def after_response(self, metrics):
+        key = (metrics.method, metrics.obj_type)
+        bucket = bisect.bisect_left(self.buckets, metrics.latency)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = self._new_stats()
+            stats['count'] += 1
+            if metrics.error is not None:
+                stats['errors'] += 1
+            if metrics.status_code is not None:
+                stats['status_codes'][metrics.status_code] += 1
+            stats['bytes_sent'] += metrics.bytes_sent
+            stats['bytes_received'] += metrics.bytes_received
+            stats['pages'] += metrics.pages
+            stats['decode_time'] += metrics.decode_time
+            stats['latency'] += metrics.latency
+            stats['latency_max'] = max(stats['latency_max'], metrics.latency)
+            stats['histogram'][bucket] += 1
+
+    def get_stats(self, method, obj_type):
+        """Returns copy of collected stats for method and object type"""
+        with self._lock:
+            stats = self._stats.get((method, obj_type))
+            if stats is None:
+                return None
+            stats = dict(stats)
+            stats['status_codes'] = dict(stats['status_codes'])
+            stats['histogram'] = list(stats['histogram'])
+        return stats
+
+    def percentile(self, method, obj_type, percent):
+        """Returns upper bound of the bucket holding given percentile"""
+        stats = self.get_stats(method, obj_type)
+        if not stats:
+            return None
+        threshold = stats['count'] * percent / 100.0
+        seen = 0
+        for bound, count in zip(self.buckets, stats['histogram']):
+            seen += count
+            if count and seen >= threshold:
+                return bound
+
+    def summary(self):
+        """Returns list of per method and object type summaries
+
+        List is sorted by total latency, so object types that dominate
+        time spent waiting for WAPI come first.
+        """
+        with self._lock:
+            keys = list(self._stats)
+        summary = []
+        for method, obj_type in keys:
+            stats = self.get_stats(method, obj_type)
+            summary.append({
+                'method': method,
+                'obj_type': obj_type,
+                'count': stats['count'],
+                'errors': stats['errors'],
+                'bytes_sent': stats['bytes_sent'],
+                'bytes_received': stats['bytes_received'],
+                'pages': stats['pages'],
+                'decode_time': stats['decode_time'],
+                'total_latency': stats['latency'],
+                'mean_latency': stats['latency'] / stats['count'],
+                'max_latency': stats['latency_max'],
+                'p50': self.percentile(method, obj_type, 50),
+                'p95': self.percentile(method, obj_type, 95),
+                'p99': self.percentile(method, obj_type, 99)})
+        summary.sort(key=lambda item: item['total_latency'], reverse=True)
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
@@ -15,7 +15,9 @@
 
 import logging
 
+from infoblox_client import bulk
 from infoblox_client import exceptions as ib_ex
+from infoblox_client import ip_pool
 from infoblox_client import objects as obj
 from infoblox_client import utils as ib_utils
 
@@ -24,8 +26,83 @@ LOG = logging.getLogger(__name__)
 
 class InfobloxObjectManager(object):
 
-    def __init__(self, connector):
+    # pooled IPs tried before falling back to func:nextavailableip
+    POOLED_IP_ATTEMPTS = 3
+
+    def __init__(self, connector, ip_pools=None):
         self.connector = connector
+        # ip_pool.IPPools to take IPs of ranges and networks from,
+        # instead of allocating them one by one on NIOS
+        self.ip_pools = ip_pools
+
+    def _call_with_range_ip(self, func, network_view, first_ip, last_ip):
+        """Returns func(ip) called with next available IP of range"""
+        ip = obj.IPAllocation.next_available_ip_from_range(
+            network_view, first_ip, last_ip)
+        if self.ip_pools is None:
+            return func(ip)
+        pool = self.ip_pools.get_range_pool(network_view, first_ip, last_ip)
+        return self._call_with_pooled_ip(func, pool, first_ip, ip)
+
+    def _call_with_cidr_ip(self, func, network_view, cidr):
+        """Returns func(ip) called with next available IP of network"""
+        ip = obj.IPAllocation.next_available_ip_from_cidr(network_view, cidr)
+        if self.ip_pools is None:
+            return func(ip)
+        pool = self.ip_pools.get_network_pool(network_view, cidr)
+        return self._call_with_pooled_ip(func, pool, cidr, ip)
+
+    def _call_with_pooled_ip(self, func, pool, address, fallback_ip):
+        """Returns func(ip) called with IP from pool
+
+        NIOS does not reserve pooled IPs, so an IP can be taken by someone
+        else before func uses it. Such IP is dropped from the pool and the
+        next one is tried, after POOLED_IP_ATTEMPTS of them func is called
+        with fallback_ip (func:nextavailableip) allocated by NIOS.
+        IP of func failed for another reason is put back to the pool.
+        """
+        for _ in range(self.POOLED_IP_ATTEMPTS):
+            ip = pool.allocate()
+            try:
+                return func(obj.IPAllocation(address, ip))
+            except ib_ex.InfobloxException as e:
+                if not ip_pool.is_ip_taken(e, ip):
+                    pool.release(ip)
+                    raise
+                pool.discard(ip)
+                LOG.info("Pooled IP %s is already used, trying another "
+                         "one: %s", ip, e)
+            except Exception:
+                pool.release(ip)
+                raise
+        return func(fallback_ip)
+
+    def _bulk_call_with_ips(self, func, specs, parent, max_workers=None,
+                            **kwargs):
+        """Call func for each spec with next available IP of parent
+
+        IPs for all specs are got by a single next_available_ip call,
+        kwargs are passed to func along with each spec.
+        """
+        specs = [dict(spec, **kwargs) for spec in specs]
+        if not specs:
+            return []
+        ips = obj.IPAllocation.next_available_ips(parent, len(specs))
+        for spec, ip in zip(specs, ips):
+            spec['ip'] = ip
+        return self._bulk_call(func, specs, max_workers)
+
+    def _bulk_call(self, func, specs, max_workers=None):
+        """Call func for each spec concurrently
+
+        Number of workers is limited by http_pool_maxsize of connector,
+        so all of them share the connection pool of connector session.
+        Returns list of bulk.BulkResult in the order of specs.
+        """
+        pool_size = self.connector.http_pool_maxsize
+        if not max_workers or max_workers > pool_size:
+            max_workers = pool_size
+        return bulk.BulkExecutor(max_workers).map(func, specs)
 
     def create_network_view(self, network_view, extattrs):
         return obj.NetworkView.create(self.connector,
@@ -118,9 +195,8 @@ class InfobloxObjectManager(object):
             range.delete()
 
     def has_networks(self, network_view_name):
-        networks = obj.Network.search_all(self.connector,
-                                          network_view=network_view_name)
-        return bool(networks)
+        return obj.Network.exists(self.connector,
+                                  network_view=network_view_name)
 
     def network_exists(self, network_view, cidr):
         """Deprecated, use get_network() instead."""
@@ -140,6 +216,16 @@ class InfobloxObjectManager(object):
         if network:
             network.delete()
 
+    def delete_networks(self, specs, max_workers=None):
+        """Bulk version of delete_network()
+
+        :param specs: iterable of dicts with delete_network() arguments
+        :param max_workers: number of concurrent requests,
+            limited by http_pool_maxsize connector option
+        :returns: list of bulk.BulkResult in the order of specs
+        """
+        return self._bulk_call(self.delete_network, specs, max_workers)
+
     def create_network_from_template(self, network_view, cidr, template,
                                      extattrs):
         return obj.Network.create(self.connector,
@@ -151,14 +237,8 @@ class InfobloxObjectManager(object):
 
     def update_network_options(self, ib_network, extattrs=None):
         if extattrs:
-            if ib_network.extattrs:
-                # Merge EA values as dicts
-                ea_dict = ib_network.extattrs.ea_dict
-                ea_dict.update(extattrs.ea_dict)
-                merged_ea = obj.EA(ea_dict)
-                ib_network.extattrs = merged_ea
-            else:
-                ib_network.extattrs = extattrs
+            # sent as 'extattrs+', so EAs not given are kept on NIOS
+            ib_network.set_extattrs(extattrs)
         return ib_network.update()
 
     def get_host_record(self, dns_view, ip, network_view=None):
@@ -206,22 +286,61 @@ class InfobloxObjectManager(object):
                                      extattrs=extattrs,
                                      check_if_exists=False)
 
+    def create_host_records_for_given_ips(self, specs, max_workers=None):
+        """Bulk version of create_host_record_for_given_ip()
+
+        :param specs: iterable of dicts with
+            create_host_record_for_given_ip() arguments
+        :param max_workers: number of concurrent requests,
+            limited by http_pool_maxsize connector option
+        :returns: list of bulk.BulkResult in the order of specs
+        """
+        return self._bulk_call(self.create_host_record_for_given_ip,
+                               specs, max_workers)
+
     def create_host_record_from_range(self, dns_view, network_view_name,
                                       zone_auth, hostname, mac, first_ip,
                                       last_ip, extattrs, use_dhcp,
                                       use_dns=True):
         name = '.'.join([hostname, zone_auth])
-        ip_alloc = obj.IPAllocation.next_available_ip_from_range(
-            network_view_name, first_ip, last_ip)
-        ip_obj = obj.IP.create(ip=ip_alloc, mac=mac,
-                               configure_for_dhcp=use_dhcp)
-        return obj.HostRecord.create(self.connector,
-                                     view=dns_view,
-                                     name=name,
-                                     ip=ip_obj,
-                                     configure_for_dns=use_dns,
-                                     extattrs=extattrs,
-                                     check_if_exists=False)
+
+        def create(ip_alloc):
+            ip_obj = obj.IP.create(ip=ip_alloc, mac=mac,
+                                   configure_for_dhcp=use_dhcp)
+            return obj.HostRecord.create(self.connector,
+                                         view=dns_view,
+                                         name=name,
+                                         ip=ip_obj,
+                                         configure_for_dns=use_dns,
+                                         extattrs=extattrs,
+                                         check_if_exists=False)
+        return self._call_with_range_ip(create, network_view_name,
+                                        first_ip, last_ip)
+
+    def create_host_records_from_range(self, dns_view, network_view_name,
+                                       zone_auth, first_ip, last_ip, specs,
+                                       use_dhcp=True, use_dns=True,
+                                       max_workers=None):
+        """Bulk version of create_host_record_from_range()
+
+        Next available IPs for all host records are got from the range
+        by a single request, instead of one allocation per record.
+        :param specs: iterable of dicts with 'hostname', 'mac' and
+            'extattrs' arguments of create_host_record_for_given_ip()
+        :param max_workers: number of concurrent requests,
+            limited by http_pool_maxsize connector option
+        :returns: list of bulk.BulkResult in the order of specs
+        """
+        ip_range = obj.IPRange(self.connector,
+                               network_view=network_view_name,
+                               start_addr=first_ip,
+                               end_addr=last_ip)
+        return self._bulk_call_with_ips(self.create_host_record_for_given_ip,
+                                        specs, ip_range, max_workers,
+                                        dns_view=dns_view,
+                                        zone_auth=zone_auth,
+                                        use_dhcp=use_dhcp,
+                                        use_dns=use_dns)
 
     def delete_host_record(self, dns_view, ip_address, network_view=None):
         host_record = obj.HostRecord.search(self.connector,
@@ -239,25 +358,70 @@ class InfobloxObjectManager(object):
                                        extattrs=extattrs,
                                        check_if_exists=False)
 
+    def create_fixed_addresses_for_given_ips(self, specs,
+                                             max_workers=None):
+        """Bulk version of create_fixed_address_for_given_ip()
+
+        :param specs: iterable of dicts with
+            create_fixed_address_for_given_ip() arguments
+        :param max_workers: number of concurrent requests,
+            limited by http_pool_maxsize connector option
+        :returns: list of bulk.BulkResult in the order of specs
+        """
+        return self._bulk_call(self.create_fixed_address_for_given_ip,
+                               specs, max_workers)
+
     def create_fixed_address_from_range(self, network_view, mac, first_ip,
                                         last_ip, extattrs):
-        ip = obj.IPAllocation.next_available_ip_from_range(
-            network_view, first_ip, last_ip)
-        return obj.FixedAddress.create(self.connector,
-                                       ip=ip,
-                                       mac=mac,
-                                       network_view=network_view,
-                                       extattrs=extattrs,
-                                       check_if_exists=False)
+        def create(ip):
+            return obj.FixedAddress.create(self.connector,
+                                           ip=ip,
+                                           mac=mac,
+                                           network_view=network_view,
+                                           extattrs=extattrs,
+                                           check_if_exists=False)
+        return self._call_with_range_ip(create, network_view,
+                                        first_ip, last_ip)
 
     def create_fixed_address_from_cidr(self, netview, mac, cidr, extattrs):
-        ip = obj.IPAllocation.next_available_ip_from_cidr(netview, cidr)
-        return obj.FixedAddress.create(self.connector,
-                                       network_view=netview,
-                                       ip=ip,
-                                       mac=mac,
-                                       extattrs=extattrs,
-                                       check_if_exists=False)
+        def create(ip):
+            return obj.FixedAddress.create(self.connector,
+                                           network_view=netview,
+                                           ip=ip,
+                                           mac=mac,
+                                           extattrs=extattrs,
+                                           check_if_exists=False)
+        return self._call_with_cidr_ip(create, netview, cidr)
+
+    def create_fixed_addresses_from_range(self, network_view, first_ip,
+                                          last_ip, specs, max_workers=None):
+        """Bulk version of create_fixed_address_from_range()
+
+        Next available IPs for all fixed addresses are got from the range
+        by a single request.
+        :param specs: iterable of dicts with 'mac' and 'extattrs'
+        :returns: list of bulk.BulkResult in the order of specs
+        """
+        ip_range = obj.IPRange(self.connector,
+                               network_view=network_view,
+                               start_addr=first_ip,
+                               end_addr=last_ip)
+        return self._bulk_call_with_ips(
+            self.create_fixed_address_for_given_ip, specs, ip_range,
+            max_workers, network_view=network_view)
+
+    def create_fixed_addresses_from_cidr(self, netview, cidr, specs,
+                                         max_workers=None):
+        """Bulk version of create_fixed_address_from_cidr()
+
+        :param specs: iterable of dicts with 'mac' and 'extattrs'
+        :returns: list of bulk.BulkResult in the order of specs
+        """
+        network = obj.Network(self.connector, network_view=netview,
+                              cidr=cidr)
+        return self._bulk_call_with_ips(
+            self.create_fixed_address_for_given_ip, specs, network,
+            max_workers, network_view=netview)
 
     def delete_fixed_address(self, network_view, ip_address):
         fixed_address = obj.FixedAddress.search(self.connector,
@@ -272,26 +436,38 @@ class InfobloxObjectManager(object):
 
     def add_ip_to_record(self, host_record, ip, mac, use_dhcp=True):
         ip_obj = obj.IP.create(ip=ip, mac=mac, configure_for_dhcp=use_dhcp)
-        host_record.ip.append(ip_obj)
+        host_record.add_to_field('ip', [ip_obj])
         return host_record.update()
 
     def add_ip_to_host_record_from_range(self, host_record, network_view,
                                          mac, first_ip, last_ip,
                                          use_dhcp=True):
-        ip_alloc = obj.IPAllocation.next_available_ip_from_range(
-            network_view, first_ip, last_ip)
-        ip_obj = obj.IP.create(ip=ip_alloc, mac=mac,
-                               configure_for_dhcp=use_dhcp)
-        host_record.ip.append(ip_obj)
-        return host_record.update()
+        def add_ip(ip_alloc):
+            ip_obj = obj.IP.create(ip=ip_alloc, mac=mac,
+                                   configure_for_dhcp=use_dhcp)
+            host_record.add_to_field('ip', [ip_obj])
+            try:
+                return host_record.update()
+            except Exception:
+                # IP is not sent again if the update is retried
+                host_record._discard_from_field('ip', [ip_obj])
+                raise
+        return self._call_with_range_ip(add_ip, network_view,
+                                        first_ip, last_ip)
 
     def delete_ip_from_host_record(self, host_record, ip):
-        host_record.ip.remove(ip)
+        if isinstance(ip, obj.IP):
+            ip = ip.ip
+        # only the address identifies IP to remove
+        if ib_utils.determine_ip_version(ip) == 6:
+            ip_obj = obj.IPv6(ip=ip)
+        else:
+            ip_obj = obj.IPv4(ip=ip)
+        host_record.remove_from_field('ip', [ip_obj])
         return host_record.update()
 
     def has_dns_zones(self, dns_view):
-        zones = obj.DNSZone.search_all(self.connector, view=dns_view)
-        return bool(zones)
+        return obj.DNSZone.exists(self.connector, view=dns_view)
 
     def create_dns_zone(self, dns_view, dns_zone,
                         grid_primary=None, grid_secondaries=None,
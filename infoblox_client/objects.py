@@ -12,6 +12,8 @@
 #    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
 #    License for the specific language governing permissions and limitations
 #    under the License.
+import copy
+
 import six
 
 import logging
@@ -19,6 +21,10 @@ import logging
 from infoblox_client import exceptions as ib_ex
 from infoblox_client import utils as ib_utils
 
+if six.PY3:
+    # coroutines syntax is not available on Python 2
+    from infoblox_client import async_objects
+
 LOG = logging.getLogger(__name__)
 
 
@@ -33,11 +39,16 @@ class BaseObject(object):
      mapping is in effect on all stages (on init, getter and setter)
     - provides nice object representation that contains class
      and not None object fields (useful in python interpretter)
+    - records names of attributes set after change tracking was started
+     (see InfobloxObject.changed_fields)
     """
     _fields = []
     _shadow_fields = []
     _remap = {}
     _infoblox_type = None
+    # set of attribute names assigned since tracking was started,
+    # None while changes are not tracked
+    _changed_fields = None
 
     def __init__(self, **kwargs):
         mapped_args = self._remap_fields(kwargs)
@@ -62,6 +73,8 @@ class BaseObject(object):
             return setattr(self, self._remap[name], value)
         else:
             super(BaseObject, self).__setattr__(name, value)
+            if self._changed_fields is not None:
+                self._changed_fields.add(name)
 
     def __eq__(self, other):
         if isinstance(other, self.__class__):
@@ -216,6 +229,14 @@ class InfobloxObject(BaseObject):
     _custom_field_processing = {}
     _global_field_processing = {'extattrs': EA.from_dict}
     _ip_version = None
+    # values of fields as they were saved on NIOS, to detect changes done
+    # in place: NIOS format of lists, dicts and objects, or reply values
+    # of fields built into objects by from_dict (converted on comparison)
+    _saved_values = None
+    _received_values = None
+    # modifications of list fields and extattrs to be sent on update
+    # with WAPI '+'/'-' suffixes, e.g. {'ipv4addrs+': [...]}
+    _deltas = None
 
     def __new__(cls, connector, **kwargs):
         return super(InfobloxObject,
@@ -234,6 +255,65 @@ class InfobloxObject(BaseObject):
         for field in self._fields + self._shadow_fields:
             if field in ip_dict:
                 setattr(self, field, mapped_args[field])
+        if self._saved_values is None:
+            # fields set locally and not received are to be sent
+            self._track_changes(changed=self._fields)
+        self._mark_unchanged(ip_dict)
+
+    def _track_changes(self, changed=()):
+        self.__dict__['_changed_fields'] = set(changed)
+        self.__dict__['_saved_values'] = {}
+        self.__dict__['_received_values'] = {}
+
+    def _mark_unchanged(self, fields, received=None):
+        """Marks fields as having the same values as on NIOS
+
+        'received' holds reply values of fields built into objects.
+        """
+        for field in fields:
+            if field not in self._fields:
+                continue
+            self._changed_fields.discard(field)
+            self._changed_fields.discard(self._remap.get(field))
+            self._saved_values.pop(field, None)
+            self._received_values.pop(field, None)
+            if received and field in received:
+                self._received_values[field] = received[field]
+                continue
+            value = getattr(self, field, None)
+            if isinstance(value, (list, dict)) or hasattr(value, 'to_dict'):
+                # copy, so values changed in place are not shared
+                self._saved_values[field] = copy.deepcopy(
+                    self.field_to_dict(field))
+
+    def _get_saved_value(self, field):
+        if field in self._saved_values:
+            return self._saved_values[field]
+        mapping = self._global_field_processing.copy()
+        mapping.update(self._custom_field_processing)
+        value = mapping[field](self._received_values[field])
+        return self._value_to_nios(value)
+
+    @property
+    def changed_fields(self):
+        """Set of fields changed since object was received from NIOS
+
+        Fields assigned since then are changed, as well as lists, dicts
+        and objects (extattrs, ipv4addrs) modified in place.
+        None if object was built locally, so all fields are to be sent.
+        """
+        if self._saved_values is None:
+            return None
+        changed = set()
+        for field in self._fields:
+            if (field in self._changed_fields or
+                    self._remap.get(field) in self._changed_fields):
+                changed.add(field)
+            elif ((field in self._saved_values or
+                   field in self._received_values) and
+                  self.field_to_dict(field) != self._get_saved_value(field)):
+                changed.add(field)
+        return changed
 
     @classmethod
     def from_dict(cls, connector, ip_dict):
@@ -245,40 +325,169 @@ class InfobloxObject(BaseObject):
         """
         mapping = cls._global_field_processing.copy()
         mapping.update(cls._custom_field_processing)
+        received = {}
         # Process fields that require building themselves as objects
         for field in mapping:
             if field in ip_dict:
+                received[field] = ip_dict[field]
                 ip_dict[field] = mapping[field](ip_dict[field])
-        return cls(connector, **ip_dict)
+        ib_object = cls(connector, **ip_dict)
+        ib_object._track_changes()
+        ib_object._mark_unchanged(ip_dict, received)
+        return ib_object
 
     @staticmethod
     def value_to_dict(value):
         return value.to_dict() if hasattr(value, 'to_dict') else value
 
+    @classmethod
+    def _value_to_nios(cls, value):
+        if isinstance(value, (list, tuple)):
+            return [cls.value_to_dict(val) for val in value]
+        return cls.value_to_dict(value)
+
     def field_to_dict(self, field):
         """Read field value and converts to dict if possible"""
-        value = getattr(self, field)
-        if isinstance(value, (list, tuple)):
-            return [self.value_to_dict(val) for val in value]
-        return self.value_to_dict(value)
+        return self._value_to_nios(getattr(self, field))
 
-    def to_dict(self, search_fields=None):
-        """Builds dict without None object fields"""
-        fields = self._fields
+    def _get_field_names(self, search_fields=None):
         if search_fields == 'update':
-            fields = self._search_for_update_fields
+            return self._search_for_update_fields
         elif search_fields == 'all':
-            fields = self._all_searchable_fields
+            return self._all_searchable_fields
         elif search_fields == 'exclude':
             # exclude search fields for update actions,
             # but include updateable_search_fields
-            fields = [field for field in self._fields
-                      if field in self._updateable_search_fields or
-                      field not in self._search_for_update_fields]
+            return [field for field in self._fields
+                    if field in self._updateable_search_fields or
+                    field not in self._search_for_update_fields]
+        return self._fields
 
+    def _fields_to_dict(self, fields):
         return {field: self.field_to_dict(field) for field in fields
                 if getattr(self, field, None) is not None}
 
+    def to_dict(self, search_fields=None):
+        """Builds dict without None object fields"""
+        return self._fields_to_dict(self._get_field_names(search_fields))
+
+    def _is_assigned(self, field):
+        return (field in self._changed_fields or
+                self._remap.get(field) in self._changed_fields)
+
+    def get_update_fields(self, full=False):
+        """Builds dict of fields to be sent on update
+
+        Only changed fields are included unless full is True or object
+        was built locally. Fields modified by add_to_field(),
+        remove_from_field(), set_extattrs() and unset_extattrs() are sent
+        as WAPI '+'/'-' modifications, unless the whole field is sent.
+        """
+        fields = self._get_field_names('exclude')
+        deltas = self._deltas or {}
+        changed = None if full else self.changed_fields
+        if changed is not None:
+            delta_fields = set(key[:-1] for key in deltas)
+            # fields with modifications are sent whole only if assigned
+            fields = [field for field in fields if field in changed and
+                      (field not in delta_fields or self._is_assigned(field))]
+        update_fields = self._fields_to_dict(fields)
+        for key, value in deltas.items():
+            if value and key[:-1] not in update_fields:
+                update_fields[key] = copy.deepcopy(value)
+        return update_fields
+
+    def _add_delta(self, field, op, values):
+        """Stages values to be added (op '+') or removed (op '-')
+
+        Values are lists or dicts (for extattrs), staging a value cancels
+        the opposite modification of it.
+        """
+        deltas = self.__dict__.setdefault('_deltas', {})
+        opposite = deltas.get(field + ('-' if op == '+' else '+'))
+        staged = deltas.setdefault(field + op, type(values)())
+        if isinstance(values, dict):
+            staged.update(values)
+            for name in values if opposite else ():
+                opposite.pop(name, None)
+        else:
+            staged.extend(value for value in values if value not in staged)
+            if opposite:
+                opposite[:] = [value for value in opposite
+                               if value not in values]
+
+    def _check_delta_field(self, field):
+        field = self._remap.get(field, field)
+        if field not in self._fields:
+            raise ValueError("%s has no field '%s'" % (
+                self.__class__.__name__, field))
+        return field
+
+    def add_to_field(self, field, values):
+        """Adds values to list field, e.g. IP addresses of host record
+
+        Only added values are sent on update (as 'field+'), so values
+        added by others since the object was received are kept.
+        The field is changed locally too, if it was received.
+        """
+        field = self._check_delta_field(field)
+        values = list(values)
+        current = getattr(self, field, None)
+        if current is not None:
+            current.extend(value for value in values if value not in current)
+        self._add_delta(field, '+', self._value_to_nios(values))
+
+    def remove_from_field(self, field, values):
+        """Removes values from list field, sent on update as 'field-'"""
+        field = self._check_delta_field(field)
+        values = list(values)
+        current = getattr(self, field, None)
+        if current is not None:
+            current[:] = [value for value in current if value not in values]
+        self._add_delta(field, '-', self._value_to_nios(values))
+
+    def _discard_from_field(self, field, values):
+        """Undoes add_to_field() of values that were not saved"""
+        field = self._check_delta_field(field)
+        values = list(values)
+        current = getattr(self, field, None)
+        if current is not None:
+            current[:] = [value for value in current if value not in values]
+        staged = (self._deltas or {}).get(field + '+')
+        if staged:
+            nios_values = self._value_to_nios(values)
+            staged[:] = [value for value in staged
+                         if value not in nios_values]
+
+    def set_extattrs(self, extattrs):
+        """Sets given EAs, sent on update as 'extattrs+'
+
+        Accepts EA or dict in {ea_name: ea_value} format.
+        EAs not given are kept as they are on NIOS.
+        """
+        self._check_delta_field('extattrs')
+        if not isinstance(extattrs, EA):
+            extattrs = EA(extattrs)
+        if self.extattrs is not None:
+            for name, value in extattrs.ea_dict.items():
+                self.extattrs.set(name, value)
+        self._add_delta('extattrs', '+', extattrs.to_dict())
+
+    def unset_extattrs(self, names):
+        """Removes EAs with given names, sent on update as 'extattrs-'"""
+        self._check_delta_field('extattrs')
+        names = list(names)
+        if self.extattrs is not None:
+            for name in names:
+                self.extattrs._ea_dict.pop(name, None)
+        self._add_delta('extattrs', '-', {name: {} for name in names})
+
+    def _mark_saved(self):
+        """Marks current state as saved on NIOS after update"""
+        self._track_changes()
+        self._mark_unchanged(self._fields)
+        self.__dict__.pop('_deltas', None)
+
     @staticmethod
     def _object_from_reply(parse_class, connector, reply):
         if not reply:
@@ -293,20 +502,45 @@ class InfobloxObject(BaseObject):
 
     @classmethod
     def create_check_exists(cls, connector, check_if_exists=True,
-                            update_if_exists=False, **kwargs):
+                            update_if_exists=False, optimistic=False,
+                            **kwargs):
+        """Creates object unless it exists
+
+        optimistic=True sends create request right away and looks for
+        existing object only if NIOS replies that it already exists,
+        so one request is made instead of two if object does not exist.
+        Returns tuple (object, True if object was created).
+        """
         # obj_created is used to check if object is being created or
         # pre-exists. obj_created is True if object is not pre-exists
         # and getting created with this function call
         obj_created = False
+        exists = False
         local_obj = cls(connector, **kwargs)
-        if check_if_exists:
-            if local_obj.fetch(only_ref=True):
-                LOG.info(("Infoblox %(obj_type)s already exists: "
-                          "%(ib_obj)s"),
+        if check_if_exists and optimistic:
+            try:
+                reply = connector.create_object(local_obj.infoblox_type,
+                                                local_obj.to_dict(),
+                                                local_obj.return_fields)
+            except ib_ex.InfobloxObjectAlreadyExists:
+                exists = local_obj.fetch(only_ref=True)
+                if not exists:
+                    raise
+            else:
+                LOG.info("Infoblox %(obj_type)s was created: %(ib_obj)s",
                          {'obj_type': local_obj.infoblox_type,
                           'ib_obj': local_obj})
-                if not update_if_exists:
-                    return local_obj, obj_created
+                return cls._object_from_reply(local_obj, connector,
+                                              reply), True
+        elif check_if_exists:
+            exists = local_obj.fetch(only_ref=True)
+        if exists:
+            LOG.info(("Infoblox %(obj_type)s already exists: "
+                      "%(ib_obj)s"),
+                     {'obj_type': local_obj.infoblox_type,
+                      'ib_obj': local_obj})
+            if not update_if_exists:
+                return local_obj, obj_created
         reply = None
         if not local_obj.ref:
             reply = connector.create_object(local_obj.infoblox_type,
@@ -326,18 +560,20 @@ class InfobloxObject(BaseObject):
 
     @classmethod
     def create(cls, connector, check_if_exists=True,
-               update_if_exists=False, **kwargs):
+               update_if_exists=False, optimistic=False, **kwargs):
         ib_object, _ = (
             cls.create_check_exists(connector,
                                     check_if_exists=check_if_exists,
                                     update_if_exists=update_if_exists,
+                                    optimistic=optimistic,
                                     **kwargs))
         return ib_object
 
     @classmethod
-    def _search(cls, connector, return_fields=None,
-                search_extattrs=None, force_proxy=False,
-                max_results=None, **kwargs):
+    def _prepare_search(cls, connector, return_fields=None,
+                        search_extattrs=None, force_proxy=False,
+                        max_results=None, **kwargs):
+        """Build object for search and arguments for get_object"""
         ib_obj_for_search = cls(connector, **kwargs)
         search_dict = ib_obj_for_search.to_dict(search_fields='all')
         if return_fields is None and ib_obj_for_search.return_fields:
@@ -347,12 +583,29 @@ class InfobloxObject(BaseObject):
         extattrs = search_extattrs
         if hasattr(search_extattrs, 'to_dict'):
             extattrs = search_extattrs.to_dict()
+        search_args = dict(return_fields=return_fields,
+                           extattrs=extattrs,
+                           force_proxy=force_proxy,
+                           max_results=max_results)
+        return ib_obj_for_search, search_dict, search_args
+
+    @classmethod
+    def _prepare_ref_search(cls, connector, max_results=None, **kwargs):
+        """Build search that returns references of objects only"""
+        ib_obj_for_search, search_dict, search_args = cls._prepare_search(
+            connector, return_fields=[], max_results=max_results, **kwargs)
+        # empty return_fields stands for default fields in get_object,
+        # empty _return_fields makes NIOS return _ref only
+        search_dict['_return_fields'] = ''
+        return ib_obj_for_search, search_dict, search_args
+
+    @classmethod
+    def _search(cls, connector, **kwargs):
+        ib_obj_for_search, search_dict, search_args = cls._prepare_search(
+            connector, **kwargs)
         reply = connector.get_object(ib_obj_for_search.infoblox_type,
                                      search_dict,
-                                     return_fields=return_fields,
-                                     extattrs=extattrs,
-                                     force_proxy=force_proxy,
-                                     max_results=max_results)
+                                     **search_args)
         return reply, ib_obj_for_search
 
     @classmethod
@@ -371,6 +624,69 @@ class InfobloxObject(BaseObject):
                     for obj in ib_objects]
         return []
 
+    @classmethod
+    def exists(cls, connector, **kwargs):
+        """Returns True if any object matches search criteria
+
+        Only reference of one object is requested, search options
+        are equal to search().
+        """
+        ib_obj_for_search, search_dict, search_args = cls._prepare_ref_search(
+            connector, max_results=1, **kwargs)
+        reply = connector.get_object(ib_obj_for_search.infoblox_type,
+                                     search_dict, paging=False,
+                                     **search_args)
+        return bool(reply)
+
+    @classmethod
+    def count(cls, connector, page_size=None, **kwargs):
+        """Returns number of objects that match search criteria
+
+        Objects are scanned page by page with references only,
+        search options are equal to search_all().
+        Not supported with async_connector.AsyncConnector.
+        """
+        cls._check_sync_connector(connector, 'count')
+        ib_obj_for_search, search_dict, search_args = cls._prepare_ref_search(
+            connector, max_results=page_size, **kwargs)
+        page_size = search_args.pop('max_results')
+        return sum(1 for _ in connector.iter_objects(
+            ib_obj_for_search.infoblox_type, search_dict,
+            page_size=page_size, **search_args))
+
+    @classmethod
+    def iter_search(cls, connector, page_size=None, prefetch=False,
+                    **kwargs):
+        """Lazily iterate over all objects that match search criteria
+
+        Objects are requested page by page (see Connector.iter_objects)
+        and parsed one at a time. Search options are equal to search_all().
+        Not supported with async_connector.AsyncConnector.
+        """
+        # checked on call, not on first iteration of the generator
+        cls._check_sync_connector(connector, 'iter_search')
+        return cls._iter_search(connector, page_size=page_size,
+                                prefetch=prefetch, **kwargs)
+
+    @staticmethod
+    def _check_sync_connector(connector, method):
+        if getattr(connector, 'is_async', False) is True:
+            raise NotImplementedError(
+                "%s is not supported with AsyncConnector, "
+                "use asearch_all instead" % method)
+
+    @classmethod
+    def _iter_search(cls, connector, page_size, prefetch, **kwargs):
+        ib_obj_for_search, search_dict, search_args = cls._prepare_search(
+            connector, max_results=page_size, **kwargs)
+        page_size = search_args.pop('max_results')
+        for obj in connector.iter_objects(ib_obj_for_search.infoblox_type,
+                                          search_dict,
+                                          page_size=page_size,
+                                          prefetch=prefetch,
+                                          **search_args):
+            yield ib_obj_for_search.from_dict(connector, obj)
+
     def fetch(self, only_ref=False):
         """Fetch object from NIOS by _ref or searchfields
 
@@ -385,21 +701,37 @@ class InfobloxObject(BaseObject):
                 return True
 
         search_dict = self.to_dict(search_fields='update')
-        return_fields = [] if only_ref else self.return_fields
-        reply = self.connector.get_object(self.infoblox_type,
-                                          search_dict,
-                                          return_fields=return_fields)
+        if only_ref:
+            # reference of the first found object is enough
+            reply = self.connector.get_object(self.infoblox_type,
+                                              search_dict,
+                                              return_fields=[],
+                                              max_results=1,
+                                              paging=False)
+        else:
+            reply = self.connector.get_object(self.infoblox_type,
+                                              search_dict,
+                                              return_fields=self.return_fields)
         if reply:
             self.update_from_dict(reply[0], only_ref=only_ref)
             return True
         return False
 
-    def update(self):
-        update_fields = self.to_dict(search_fields='exclude')
+    def update(self, full=False):
+        """Updates object on NIOS with fields changed since it was received
+
+        full=True sends all fields, like for object built locally.
+        Nothing is sent if no field was changed.
+        """
+        update_fields = self.get_update_fields(full=full)
+        if not update_fields and not full:
+            LOG.debug('Infoblox object was not changed: %s', self.ref)
+            return self
         ib_obj = self.connector.update_object(self.ref,
                                               update_fields,
                                               self.return_fields)
         LOG.info('Infoblox object was updated: %s', self.ref)
+        self._mark_saved()
         return self._object_from_reply(self, self.connector, ib_obj)
 
     def delete(self):
@@ -408,6 +740,37 @@ class InfobloxObject(BaseObject):
         except ib_ex.InfobloxCannotDeleteObject as e:
             LOG.info("Failed to delete an object: %s", e)
 
+    # Awaitable counterparts of the CRUD interface (Python 3 only),
+    # to be used with async_connector.AsyncConnector.
+    @classmethod
+    def acreate_check_exists(cls, connector, **kwargs):
+        return async_objects.create_check_exists(cls, connector, **kwargs)
+
+    @classmethod
+    def acreate(cls, connector, **kwargs):
+        return async_objects.create(cls, connector, **kwargs)
+
+    @classmethod
+    def asearch(cls, connector, **kwargs):
+        return async_objects.search(cls, connector, **kwargs)
+
+    @classmethod
+    def asearch_all(cls, connector, **kwargs):
+        return async_objects.search_all(cls, connector, **kwargs)
+
+    @classmethod
+    def aexists(cls, connector, **kwargs):
+        return async_objects.exists(cls, connector, **kwargs)
+
+    def afetch(self, only_ref=False):
+        return async_objects.fetch(self, only_ref=only_ref)
+
+    def aupdate(self, full=False):
+        return async_objects.update(self, full=full)
+
+    def adelete(self):
+        return async_objects.delete(self)
+
     @property
     def infoblox_type(self):
         return self._infoblox_type
@@ -560,15 +923,74 @@ class IPAllocation(object):
         return str(self.next_available_ip)
 
     @classmethod
-    def next_available_ip_from_cidr(cls, net_view_name, cidr):
+    def next_available_ip_from_cidr(cls, net_view_name, cidr, pools=None):
+        """Allocates next available IP of network on object creation
+
+        If ip_pool.IPPools are given, IP is taken from the pool instead.
+        """
+        if pools is not None:
+            pool = pools.get_network_pool(net_view_name, cidr)
+            return cls(cidr, pool.allocate())
         return cls(cidr, 'func:nextavailableip:'
                          '{cidr:s},{net_view_name:s}'.format(**locals()))
 
     @classmethod
-    def next_available_ip_from_range(cls, net_view_name, first_ip, last_ip):
+    def next_available_ip_from_range(cls, net_view_name, first_ip, last_ip,
+                                     pools=None):
+        """Allocates next available IP of range on object creation
+
+        If ip_pool.IPPools are given, IP is taken from the pool instead.
+        """
+        if pools is not None:
+            pool = pools.get_range_pool(net_view_name, first_ip, last_ip)
+            return cls(first_ip, pool.allocate())
         return cls(first_ip, 'func:nextavailableip:{first_ip}-{last_ip},'
                              '{net_view_name}'.format(**locals()))
 
+    @staticmethod
+    def _call_next_available(parent, func_name, payload, exclude):
+        if exclude:
+            payload['exclude'] = list(exclude)
+        if not parent.ref and not parent.fetch(only_ref=True):
+            return None
+        return getattr(parent, func_name)(payload)
+
+    @classmethod
+    def next_available_ips(cls, parent, num, exclude=None):
+        """Returns list of 'num' next available IPs of network or range
+
+        'parent' is Network or IPRange object, it is looked up by search
+        fields if its _ref is not known. All IPs are got by a single
+        next_available_ip function call. NIOS does not reserve returned
+        IPs, they are taken by objects created with them.
+        """
+        reply = cls._call_next_available(parent, 'next_available_ip',
+                                         {'num': num}, exclude)
+        ips = reply.get('ips', []) if reply else []
+        if len(ips) < num:
+            raise ib_ex.InfobloxCannotAllocateIp(
+                ip_data="%d IPs from %s" % (num, parent))
+        return ips
+
+    @classmethod
+    def next_available_networks(cls, container, prefixlen, num,
+                                exclude=None):
+        """Returns list of 'num' next available networks of container
+
+        'container' is NetworkContainer or Network object, 'prefixlen' is
+        prefix length of networks, e.g. 24. Networks are not reserved,
+        like IPs returned by next_available_ips().
+        """
+        reply = cls._call_next_available(
+            container, 'next_available_network',
+            {'cidr': prefixlen, 'num': num}, exclude)
+        networks = reply.get('networks', []) if reply else []
+        if len(networks) < num:
+            raise ib_ex.InfobloxCannotAllocateNetwork(
+                net_data="%d /%s networks from %s" % (num, prefixlen,
+                                                      container))
+        return networks
+
 
 WAPI_VERSION = "2.10.1"
 
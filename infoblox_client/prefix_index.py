@@ -0,0 +1,307 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import bisect
+import threading
+
+import netaddr
+
+from infoblox_client import objects as obj
+from infoblox_client import replica
+
+NETWORKS = 'networks'
+CONTAINERS = 'containers'
+RANGES = 'ranges'
+
+KINDS_BY_TYPE = {
+    'network': NETWORKS,
+    'ipv6network': NETWORKS,
+    'networkcontainer': CONTAINERS,
+    'ipv6networkcontainer': CONTAINERS,
+    'range': RANGES,
+    'ipv6range': RANGES,
+}
+
+DEFAULT_CLASSES = (obj.Network, obj.NetworkContainer, obj.IPRange)
+
+
+class PrefixTable(object):
+    """Prefixes of one IP version, looked up by longest match
+
+    Prefixes are kept in a hash table per prefix length, keyed by
+    network bits only, so lookup of an IP takes one dict lookup per
+    distinct prefix length, from the longest one.
+    """
+
+    def __init__(self, bits):
+        self.bits = bits
+        self._tables = {}
+        # prefix lengths in use, longest first
+        self._lengths = []
+
+    def __len__(self):
+        return sum(len(table) for table in self._tables.values())
+
+    def add(self, value, prefixlen, item):
+        table = self._tables.get(prefixlen)
+        if table is None:
+            table = self._tables[prefixlen] = {}
+            self._lengths = sorted(self._tables, reverse=True)
+        table[value >> (self.bits - prefixlen)] = item
+
+    def remove(self, value, prefixlen):
+        table = self._tables.get(prefixlen)
+        if table is None:
+            return
+        table.pop(value >> (self.bits - prefixlen), None)
+        if not table:
+            del self._tables[prefixlen]
+            self._lengths = sorted(self._tables, reverse=True)
+
+    def iter_containing(self, value):
+        """Yields items of prefixes containing value, longest first"""
+        for prefixlen in self._lengths:
+            table = self._tables.get(prefixlen, {})
+            item = table.get(value >> (self.bits - prefixlen))
+            if item is not None:
+                yield item
+
+    def longest_match(self, value):
+        for item in self.iter_containing(value):
+            return item
+        return None
+
+
+class RangeTable(object):
+    """Non overlapping address ranges, looked up by binary search
+
+    NIOS does not allow ranges of the same network view to overlap.
+    """
+
+    def __init__(self):
+        self._starts = []
+        self._ranges = {}
+
+    def __len__(self):
+        return len(self._starts)
+
+    def add(self, start, end, item):
+        if start not in self._ranges:
+            bisect.insort(self._starts, start)
+        self._ranges[start] = (end, item)
+
+    def remove(self, start):
+        if self._ranges.pop(start, None) is not None:
+            del self._starts[bisect.bisect_left(self._starts, start)]
+
+    def find(self, value):
+        i = bisect.bisect_right(self._starts, value)
+        if not i:
+            return None
+        end, item = self._ranges[self._starts[i - 1]]
+        return item if value <= end else None
+
+
+class IndexState(object):
+    """Tables of index with locations of objects in them"""
+
+    def __init__(self):
+        # (network view, version, kind) -> table
+        self.tables = {}
+        # key (unique_id or _ref) -> (table key, address key)
+        self.locations = {}
+        # (table key, address key) -> key, an address holds one object
+        self.keys = {}
+
+    @staticmethod
+    def _new_table(kind, version):
+        if kind == RANGES:
+            return RangeTable()
+        return PrefixTable(32 if version == 4 else 128)
+
+    @staticmethod
+    def get_location(ib_obj):
+        """Returns ((network view, version, kind), address key)"""
+        kind = KINDS_BY_TYPE[ib_obj.infoblox_type]
+        network_view = ib_obj.network_view or 'default'
+        if kind == RANGES:
+            start = netaddr.IPAddress(ib_obj.start_addr)
+            end = netaddr.IPAddress(ib_obj.end_addr)
+            return (network_view, start.version, kind), (int(start),
+                                                         int(end))
+        network = netaddr.IPNetwork(ib_obj.network)
+        return ((network_view, network.version, kind),
+                (network.value, network.prefixlen))
+
+    def add(self, key, ib_obj):
+        location = self.get_location(ib_obj)
+        self.remove(key)
+        # object indexed under other key (e.g. _ref) is replaced
+        self.locations.pop(self.keys.get(location), None)
+        table_key, address_key = location
+        table = self.tables.get(table_key)
+        if table is None:
+            table = self.tables[table_key] = self._new_table(table_key[2],
+                                                             table_key[1])
+        table.add(address_key[0], address_key[1], ib_obj)
+        self.locations[key] = location
+        self.keys[location] = key
+
+    def remove(self, key):
+        location = self.locations.pop(key, None)
+        if location is None:
+            return
+        del self.keys[location]
+        table_key, address_key = location
+        if table_key[2] == RANGES:
+            self.tables[table_key].remove(address_key[0])
+        else:
+            self.tables[table_key].remove(*address_key)
+
+
+class PrefixIndex(object):
+    """Local index of networks, network containers and ranges
+
+    Answers which network, container or range contains an IP without
+    requests to NIOS. Objects are indexed per network view and IP
+    version, both v4 and v6 classes of given classes are indexed.
+
+    build() streams a db_objects snapshot page by page and swaps the
+    index at once. apply_events() applies change_feed.ChangeEvent lists,
+    so the index can be refreshed incrementally by subscribing it to
+    a ChangeFeed. Both key objects by unique_id, deleted objects are
+    reported by it only. Lookups hold the lock like changes do, since
+    a table is changed in place.
+    """
+
+    def __init__(self, connector, object_classes=DEFAULT_CLASSES):
+        self.connector = connector
+        self._classes = [cls for ib_class in object_classes
+                         for cls in replica.get_versioned_classes(ib_class)]
+        self._state = IndexState()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._state.locations)
+
+    @property
+    def object_types(self):
+        return sorted(set(cls._infoblox_type for cls in self._classes))
+
+    def add(self, ib_obj, key=None):
+        """Indexes object under key, its _ref by default"""
+        with self._lock:
+            self._state.add(key or ib_obj.ref, ib_obj)
+
+    def remove(self, key):
+        with self._lock:
+            self._state.remove(key)
+
+    def _iter_db_objects(self, page_size):
+        payload = {'object_types': ','.join(self.object_types)}
+        return self.connector.iter_objects(
+            replica.DB_OBJECTS, payload,
+            return_fields=obj.DbObjects._return_fields,
+            page_size=page_size, raise_on_error=True)
+
+    def build(self, page_size=None, **search_kwargs):
+        """Replaces index with objects streamed from db_objects
+
+        Objects are indexed by unique_id like by apply_events(), so
+        changes and deletions reported by a change feed after the build
+        are applied to them. search_kwargs (e.g. network_view) limit
+        indexed objects, they are matched with object fields locally.
+        Index is kept as is if the snapshot cannot be read.
+        """
+        state = IndexState()
+        for entry in self._iter_db_objects(page_size):
+            ib_obj = self._from_dict(entry.get('object_type'),
+                                     entry.get('object'))
+            if ib_obj is None or not all(
+                    getattr(ib_obj, field, None) == value
+                    for field, value in search_kwargs.items()):
+                continue
+            state.add(entry['unique_id'], ib_obj)
+        with self._lock:
+            self._state = state
+        return len(state.locations)
+
+    def _get_class(self, obj_type):
+        for cls in self._classes:
+            if cls._infoblox_type == obj_type:
+                return cls
+        return None
+
+    def _from_dict(self, obj_type, data):
+        cls = self._get_class(obj_type)
+        if cls is None or not isinstance(data, dict):
+            return None
+        return cls.from_dict(self.connector, dict(data))
+
+    def apply_events(self, events):
+        """Applies change_feed.ChangeEvent list, keyed by unique_id"""
+        with self._lock:
+            for event in events:
+                if self._get_class(event.object_type) is None:
+                    continue
+                if event.deleted:
+                    self._state.remove(event.unique_id)
+                else:
+                    self._state.add(event.unique_id,
+                                    self._from_dict(event.object_type,
+                                                    event.object))
+
+    def subscribe(self, feed):
+        """Keeps index up to date with change_feed.ChangeFeed"""
+        for obj_type in self.object_types:
+            feed.subscribe(obj_type, self.apply_events)
+
+    def _find(self, ip, network_view, kind, lookup):
+        """Returns lookup(table, address) for table of kind or None"""
+        address = netaddr.IPAddress(ip)
+        with self._lock:
+            table = self._state.tables.get((network_view, address.version,
+                                            kind))
+            if table is None:
+                return None
+            return lookup(table, int(address))
+
+    def find_network(self, ip, network_view='default'):
+        """Returns the most specific network containing ip or None"""
+        return self._find(ip, network_view, NETWORKS,
+                          PrefixTable.longest_match)
+
+    def find_network_container(self, ip, network_view='default'):
+        """Returns the most specific network container containing ip"""
+        return self._find(ip, network_view, CONTAINERS,
+                          PrefixTable.longest_match)
+
+    def find_range(self, ip, network_view='default'):
+        return self._find(ip, network_view, RANGES, RangeTable.find)
+
+    def find_containing(self, ip, network_view='default'):
+        """Returns networks and containers containing ip
+
+        Objects are sorted from the most specific one.
+        """
+        found = []
+        for kind in (NETWORKS, CONTAINERS):
+            found.extend(self._find(
+                ip, network_view, kind,
+                lambda table, value: list(table.iter_containing(value)))
+                or [])
+        return sorted(found,
+                      key=lambda ib_obj: -netaddr.IPNetwork(
+                          ib_obj.network).prefixlen)
@@ -0,0 +1,100 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+
+from infoblox_client import exceptions as ib_ex
+from infoblox_client import utils
+
+FALLBACK = 'fallback'
+GM = 'gm'
+LOCAL = 'local'
+ADAPTIVE = 'adaptive'
+PROBE = 'probe'
+
+STRATEGIES = (FALLBACK, GM, LOCAL, ADAPTIVE, PROBE)
+
+
+class ProxySearchStrategy(object):
+    """Decides where searches are processed on cloud WAPI
+
+    Search that is not proxied is processed by the member connector
+    talks to, search with '_proxy_search=GM' is processed on Grid Master,
+    which has data of the whole grid. Strategies:
+    - 'fallback': search locally, repeat search on GM if nothing is found.
+      Every negative lookup costs two requests (default);
+    - 'gm': always search on GM, one request per lookup;
+    - 'local': never search on GM unless force_proxy is set;
+    - 'adaptive': per object type, search on GM directly once GM has
+      answered a search that was not answered locally, and search locally
+      with fallback to GM while local searches keep answering;
+    - 'probe': behave as 'fallback' until the first search repeated on GM.
+      If GM found something, search on GM from now on,
+      otherwise search locally without fallback.
+
+    Search on GM is authoritative, so a miss there is never repeated.
+    'counters' show how many searches were repeated on GM
+    ('second_requests') and how many misses were not repeated
+    ('second_requests_saved') compared to 'fallback' strategy.
+    """
+
+    def __init__(self, strategy=FALLBACK):
+        if strategy not in STRATEGIES:
+            msg = ("Proxy search strategy %s is not supported, "
+                   "use one of %s" % (strategy, ', '.join(STRATEGIES)))
+            raise ib_ex.InfobloxConfigException(msg=msg)
+        self.strategy = strategy
+        self._gm_types = set()
+        self._probe_result = None
+        self._lock = threading.Lock()
+        self.counters = {'second_requests': 0,
+                         'second_requests_saved': 0}
+
+    def _count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+    def use_gm(self, obj_type):
+        """Returns True if search has to be sent to GM first"""
+        if self.strategy == GM:
+            return True
+        if self.strategy == ADAPTIVE:
+            return utils.get_obj_type(obj_type) in self._gm_types
+        if self.strategy == PROBE:
+            return self._probe_result == GM
+        return False
+
+    def first_search_done(self, obj_type, proxied, found, forced=False):
+        """Records result of the first search
+
+        Returns True if search has to be repeated on GM.
+        """
+        if self.strategy == ADAPTIVE and found and not proxied:
+            self._gm_types.discard(utils.get_obj_type(obj_type))
+        if found or forced:
+            return False
+        if (proxied or self.strategy == LOCAL or
+                (self.strategy == PROBE and self._probe_result == LOCAL)):
+            self._count('second_requests_saved')
+            return False
+        self._count('second_requests')
+        return True
+
+    def second_search_done(self, obj_type, found):
+        """Records result of the search repeated on GM"""
+        if self.strategy == ADAPTIVE and found:
+            self._gm_types.add(utils.get_obj_type(obj_type))
+        elif self.strategy == PROBE and self._probe_result is None:
+            self._probe_result = GM if found else LOCAL
@@ -0,0 +1,393 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import copy
+import json
+import logging
+import os
+import threading
+
+import six
+
+from infoblox_client import exceptions as ib_ex
+from infoblox_client import objects as obj
+from infoblox_client import utils
+
+LOG = logging.getLogger(__name__)
+
+DB_OBJECTS = obj.DbObjects._infoblox_type
+
+
+def get_versioned_classes(ib_class):
+    """Returns classes of given class with known WAPI object type
+
+    Network stands for NetworkV4 and NetworkV6, for example.
+    """
+    if ib_class._infoblox_type is not None:
+        return [ib_class]
+    return [cls for cls in (ib_class.get_v4_class(),
+                            ib_class.get_v6_class())
+            if cls is not None and cls._infoblox_type is not None]
+
+
+def _get_search_fields(cls, kwargs):
+    """Maps search kwargs to fields of objects as returned by NIOS"""
+    known_fields = cls._fields + cls._shadow_fields
+    fields = {}
+    for field, value in cls._remap_fields(kwargs).items():
+        if field not in known_fields:
+            raise ValueError("Replica cannot search %s by '%s'" % (
+                cls.__name__, field))
+        fields[field] = cls._value_to_nios(value)
+    return fields
+
+
+def _item_matches(item, value, key):
+    """Matches item of list field, e.g. host record IP by address"""
+    if item == value:
+        return True
+    if not isinstance(item, dict):
+        return False
+    if isinstance(value, dict):
+        return all(item.get(name) == val for name, val in value.items())
+    return item.get(key) == value
+
+
+def _field_matches(data, field, value):
+    if field not in data:
+        # search only fields, e.g. mac of host record, are found
+        # in items of lists like ipv4addrs
+        for items in data.values():
+            if (isinstance(items, list) and
+                    any(isinstance(item, dict) and field in item
+                        for item in items)):
+                return any(_item_matches(item, value, field)
+                           for item in items)
+        return False
+    data_value = data[field]
+    if data_value == value:
+        return True
+    if not isinstance(data_value, list):
+        return False
+    # items of address lists are matched by address, e.g. 'ipv4addr'
+    # in 'ipv4addrs'
+    key = field[:-1]
+    values = value if isinstance(value, list) else [value]
+    return all(any(_item_matches(item, val, key) for item in data_value)
+               for val in values)
+
+
+def _extattrs_match(data, extattrs):
+    """Matches EAs given in NIOS format, e.g. {'Site': {'value': 'HQ'}}"""
+    if not extattrs:
+        return True
+    data_extattrs = data.get('extattrs') or {}
+    for name, expected in extattrs.items():
+        if name not in data_extattrs:
+            return False
+        value = data_extattrs[name].get('value')
+        expected = expected.get('value')
+        if value == expected:
+            continue
+        values = value if isinstance(value, list) else [value]
+        expected = expected if isinstance(expected, list) else [expected]
+        if not all(val in values for val in expected):
+            return False
+    return True
+
+
+class ReplicaCheckpoint(object):
+    """Base class of persistent store of replica state
+
+    State is a dict with 'sequence_id', 'object_types' and 'objects'
+    keys, saved after each sync that changed the replica, so replica
+    restarted from it only applies changes done since then.
+    """
+
+    def load(self):
+        """Returns saved state or None"""
+        raise NotImplementedError()
+
+    def save(self, state):
+        raise NotImplementedError()
+
+
+class FileReplicaCheckpoint(ReplicaCheckpoint):
+    """Stores replica state in JSON file, replaced atomically"""
+
+    def __init__(self, path):
+        self.path = os.path.expanduser(path)
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (IOError, OSError):
+            return None
+        except ValueError:
+            LOG.warning("Ignoring malformed replica checkpoint %s",
+                        self.path)
+            return None
+
+    def save(self, state):
+        tmp_path = '%s.%d.tmp' % (self.path, os.getpid())
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(state, f)
+        os.rename(tmp_path, self.path)
+
+
+class Replica(object):
+    """Local replica of grid objects of given classes
+
+    The first sync() takes a snapshot of objects through db_objects
+    requested page by page, next syncs apply changes done since the last
+    returned sequence ID (db_objects with start_sequence_id). start()
+    runs syncs every 'poll_interval' seconds in a background thread.
+
+    search() and search_all() look objects up locally. Replica synced
+    more than 'max_staleness' seconds ago is synced before the lookup,
+    so replies are never older than that (None disables the bound).
+    Objects are matched by fields as they are returned by NIOS, address
+    fields like 'ip' of host record match addresses in its lists, and
+    search_extattrs match EAs of objects. Searching by fields the object
+    class does not have raises ValueError.
+
+    With 'checkpoint' (ReplicaCheckpoint or path to a file) replica state
+    is saved after each sync that changed it and is restored on init, so
+    restarted replica does not take a full snapshot again.
+    """
+
+    def __init__(self, connector, object_classes, poll_interval=30,
+                 max_staleness=None, checkpoint=None, page_size=None,
+                 timer=utils.monotonic):
+        self.connector = connector
+        self.poll_interval = poll_interval
+        self.max_staleness = max_staleness
+        if isinstance(checkpoint, six.string_types):
+            checkpoint = FileReplicaCheckpoint(checkpoint)
+        self.checkpoint = checkpoint
+        self.page_size = page_size
+        self._timer = timer
+        # WAPI object type -> classes, e.g. HostRecordV4 and HostRecordV6
+        self._classes = collections.defaultdict(list)
+        for ib_class in object_classes:
+            for cls in get_versioned_classes(ib_class):
+                if cls not in self._classes[cls._infoblox_type]:
+                    self._classes[cls._infoblox_type].append(cls)
+        # WAPI object type -> {unique_id: object as returned by NIOS}
+        self._objects = {obj_type: {} for obj_type in self._classes}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self.sequence_id = None
+        self.synced_at = None
+        self.snapshots = 0
+        self.changes = 0
+        self._stop = threading.Event()
+        self._thread = None
+        if self.checkpoint is not None:
+            self._restore()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(objects) for objects in self._objects.values())
+
+    @property
+    def object_types(self):
+        return sorted(self._classes)
+
+    @property
+    def staleness(self):
+        """Seconds since the last successful sync, None if never synced"""
+        if self.synced_at is None:
+            return None
+        return self._timer() - self.synced_at
+
+    def _iter_db_objects(self, payload):
+        payload = dict(payload, object_types=','.join(self.object_types))
+        return self.connector.iter_objects(
+            DB_OBJECTS, payload, return_fields=obj.DbObjects._return_fields,
+            page_size=self.page_size, raise_on_error=True)
+
+    def _apply(self, objects, entry):
+        """Applies db_objects entry, returns True if it changed objects"""
+        typed_objects = objects.get(entry.get('object_type'))
+        if typed_objects is None:
+            return False
+        data = entry.get('object')
+        if isinstance(data, dict):
+            typed_objects[entry['unique_id']] = data
+        elif typed_objects.pop(entry['unique_id'], None) is None:
+            return False
+        return True
+
+    def _snapshot(self):
+        objects = {obj_type: {} for obj_type in self._classes}
+        sequence_id = None
+        for entry in self._iter_db_objects({}):
+            self._apply(objects, entry)
+            sequence_id = entry.get('last_sequence_id', sequence_id)
+        with self._lock:
+            self._objects = objects
+            self.sequence_id = sequence_id
+        self.snapshots += 1
+        LOG.info("Replica snapshot of %s: %d objects, sequence ID %s",
+                 self.object_types, len(self), sequence_id)
+        return True
+
+    def _apply_changes(self):
+        changed = False
+        for entry in self._iter_db_objects(
+                {'start_sequence_id': self.sequence_id, 'all_events': True}):
+            with self._lock:
+                if self._apply(self._objects, entry):
+                    changed = True
+                    self.changes += 1
+                self.sequence_id = entry.get('last_sequence_id',
+                                             self.sequence_id)
+        return changed
+
+    def _restore(self):
+        state = self.checkpoint.load()
+        if not state or state.get('object_types') != self.object_types:
+            return False
+        with self._lock:
+            self._objects = {obj_type: state['objects'].get(obj_type, {})
+                             for obj_type in self._classes}
+            self.sequence_id = state['sequence_id']
+        LOG.info("Replica restored from checkpoint at sequence ID %s",
+                 self.sequence_id)
+        return True
+
+    def _save(self):
+        # objects are changed only by sync, which is running the save
+        state = {'sequence_id': self.sequence_id,
+                 'object_types': self.object_types,
+                 'objects': self._objects}
+        try:
+            self.checkpoint.save(state)
+        except Exception as e:
+            LOG.warning("Cannot save replica checkpoint: %s", e)
+
+    def sync(self):
+        """Brings replica up to date, returns True if objects changed
+
+        Takes a snapshot if replica is empty or the sequence ID is not
+        accepted by NIOS anymore. InfobloxSearchError is raised if the
+        snapshot cannot be taken, objects and synced_at are kept as is.
+        """
+        with self._sync_lock:
+            if self.sequence_id is None:
+                changed = self._snapshot()
+            else:
+                try:
+                    changed = self._apply_changes()
+                except ib_ex.InfobloxSearchError as e:
+                    LOG.warning("Cannot get changes since sequence ID %s, "
+                                "taking a snapshot: %s", self.sequence_id, e)
+                    changed = self._snapshot()
+            self.synced_at = self._timer()
+            if changed and self.checkpoint is not None:
+                self._save()
+            return changed
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                LOG.warning("Replica sync failed: %s", e)
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Starts syncing replica in background thread"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run,
+                                        name='infoblox-replica')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _ensure_fresh(self, max_staleness):
+        if max_staleness is None:
+            max_staleness = self.max_staleness
+        if self.synced_at is None or (
+                max_staleness is not None and
+                self.staleness > max_staleness):
+            self.sync()
+
+    def _get_class(self, obj_type, data):
+        """Returns class of object, the first one having all its fields"""
+        classes = self._classes[obj_type]
+        for cls in classes:
+            known_fields = cls._fields + cls._shadow_fields
+            if all(field in known_fields for field in data):
+                return cls
+        return classes[0]
+
+    def _iter_matching(self, ib_class, kwargs):
+        kwargs = dict(kwargs)
+        extattrs = kwargs.pop('search_extattrs', None)
+        if hasattr(extattrs, 'to_dict'):
+            extattrs = extattrs.to_dict()
+        # like in NIOS search, fields set to None are not searched by
+        kwargs = dict((field, value) for field, value in kwargs.items()
+                      if value is not None)
+        obj_types = sorted(set(
+            cls._infoblox_type for cls in get_versioned_classes(ib_class)))
+        for obj_type in obj_types:
+            if obj_type not in self._classes:
+                raise ValueError("'%s' objects are not replicated" %
+                                 obj_type)
+            with self._lock:
+                candidates = list(self._objects[obj_type].values())
+            fields_by_class = {}
+            for data in candidates:
+                cls = self._get_class(obj_type, data)
+                if cls not in fields_by_class:
+                    fields_by_class[cls] = _get_search_fields(cls, kwargs)
+                if (all(_field_matches(data, field, value)
+                        for field, value in fields_by_class[cls].items()) and
+                        _extattrs_match(data, extattrs)):
+                    yield cls, data
+
+    def search_all(self, ib_class, max_staleness=None, **kwargs):
+        """Returns all replicated objects of ib_class matching kwargs"""
+        self._ensure_fresh(max_staleness)
+        return [cls.from_dict(self.connector, copy.deepcopy(data))
+                for cls, data in self._iter_matching(ib_class, kwargs)]
+
+    def search(self, ib_class, max_staleness=None, **kwargs):
+        """Returns the first replicated object matching kwargs or None"""
+        self._ensure_fresh(max_staleness)
+        for cls, data in self._iter_matching(ib_class, kwargs):
+            return cls.from_dict(self.connector, copy.deepcopy(data))
+        return None
@@ -0,0 +1,85 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import collections
+import random
+import threading
+
+# POST is not idempotent: repeated create or function call may be
+# applied twice, so it is not retried unless requested explicitly
+IDEMPOTENT_METHODS = ('get', 'put', 'delete')
+RETRY_STATUS_CODES = (503,)
+
+
+class RetryPolicy(object):
+    """Decides if and when failed request is retried
+
+    Request is retried up to 'attempts' times if it timed out or
+    NIOS replied with one of 'status_codes', and its HTTP method is
+    in 'methods'. Delay before retry N (starting from 0) is
+    min(backoff_max, backoff_base * 2 ** N); with 'jitter' the actual
+    delay is random between 0 and that value ("full jitter"), so
+    clients that failed together do not retry together.
+
+    'stats' counts requests, attempts, retries and requests that
+    failed after all retries ('exhausted'). 'latencies' keeps last
+    attempts as tuples (method, attempt, seconds, outcome), where
+    outcome is status code or exception class name.
+    """
+
+    def __init__(self, attempts=0, backoff_base=0.5, backoff_max=30,
+                 jitter=True, status_codes=RETRY_STATUS_CODES,
+                 methods=IDEMPOTENT_METHODS, history_size=1000):
+        self.attempts = attempts or 0
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.status_codes = tuple(status_codes)
+        self.methods = tuple(method.lower() for method in methods)
+        self.latencies = collections.deque(maxlen=history_size)
+        self.stats = {'requests': 0, 'attempts': 0, 'retries': 0,
+                      'exhausted': 0}
+        self._lock = threading.Lock()
+
+    def record_attempt(self, method, attempt, latency, outcome):
+        with self._lock:
+            if attempt == 0:
+                self.stats['requests'] += 1
+            self.stats['attempts'] += 1
+            self.latencies.append((method, attempt, latency, outcome))
+
+    def is_retryable(self, method, status_code=None, error=None):
+        """Checks if the failure is worth retrying, ignores attempts"""
+        if method.lower() not in self.methods:
+            return False
+        return error is not None or status_code in self.status_codes
+
+    def should_retry(self, method, attempt, status_code=None, error=None):
+        if not self.is_retryable(method, status_code=status_code,
+                                 error=error):
+            return False
+        with self._lock:
+            if attempt >= self.attempts:
+                if self.attempts:
+                    self.stats['exhausted'] += 1
+                return False
+            self.stats['retries'] += 1
+        return True
+
+    def get_delay(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        if self.jitter:
+            delay = random.uniform(0, delay)
+        return delay
@@ -0,0 +1,111 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import copy
+import sys
+import threading
+
+import six
+
+from infoblox_client import utils
+
+
+class Call(object):
+    """Call in flight, shared by its caller and callers waiting for it"""
+
+    def __init__(self, done):
+        self.done = done
+        self.followers = 0
+        self.result = None
+        self.exc_info = None
+        # set when leader task was cancelled without getting any result
+        self.cancelled = False
+
+
+class SingleFlight(object):
+    """Coalesces identical concurrent calls into one
+
+    The first caller of do() for a key runs the function, callers that
+    come while it runs wait for it and get the same result or exception.
+    Result is deep copied for each caller when it is shared, so callers
+    are free to modify it.
+    Keys are grouped by object type like QueryCache keys, forget() makes
+    calls started before a change of some type not to be joined after it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(obj_type, url):
+        return utils.get_obj_type(obj_type), url
+
+    @staticmethod
+    def _new_call():
+        return Call(threading.Event())
+
+    def __len__(self):
+        return len(self._calls)
+
+    def _join(self, key):
+        """Returns tuple (call, True if caller has to run it)"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.followers += 1
+                self.coalesced += 1
+                return call, False
+            call = self._calls[key] = self._new_call()
+            return call, True
+
+    def _leave(self, key, call):
+        """Stops sharing call, returns number of callers waiting for it"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+            return call.followers
+
+    @staticmethod
+    def _get_result(call, shared):
+        if call.exc_info is not None:
+            six.reraise(*call.exc_info)
+        if shared:
+            return copy.deepcopy(call.result)
+        return call.result
+
+    def do(self, key, func):
+        """Returns func() result, sharing it with concurrent callers"""
+        call, leader = self._join(key)
+        if not leader:
+            call.done.wait()
+            return self._get_result(call, shared=True)
+        try:
+            call.result = func()
+        except BaseException:
+            call.exc_info = sys.exc_info()
+            raise
+        finally:
+            followers = self._leave(key, call)
+            call.done.set()
+        return self._get_result(call, shared=bool(followers))
+
+    def forget(self, obj_type_or_ref):
+        """Makes calls for given object type not to be joined anymore"""
+        obj_type = utils.get_obj_type(obj_type_or_ref)
+        with self._lock:
+            for key in [key for key in self._calls if key[0] == obj_type]:
+                del self._calls[key]
@@ -0,0 +1,106 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import threading
+import time
+
+from infoblox_client import utils
+
+
+class TokenBucket(object):
+    """Thread safe token bucket
+
+    Bucket is refilled with 'rate' tokens per second and holds up to
+    'capacity' tokens (one second worth of tokens by default), so short
+    bursts are allowed while average rate stays limited.
+    """
+
+    def __init__(self, rate, capacity=None, timer=utils.monotonic):
+        if rate <= 0:
+            raise ValueError("Rate has to be positive.")
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1, rate))
+        self._timer = timer
+        self._tokens = self.capacity
+        self._last = timer()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token, returns delay in seconds before it can be used
+
+        Balance may go below zero, so concurrent callers are queued
+        one after another instead of competing for the next token.
+        """
+        with self._lock:
+            now = self._timer()
+            self._tokens = min(self.capacity,
+                               self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+
+class RequestGovernor(object):
+    """Limits rate and concurrency of requests
+
+    Used as a context manager around a request: waits for a token of
+    'rate' limiter and for a free slot of 'max_in_flight' semaphore.
+    Limits set to None are not applied.
+    """
+
+    def __init__(self, rate=None, max_in_flight=None, sleep=time.sleep):
+        self.bucket = TokenBucket(rate) if rate else None
+        self.semaphore = None
+        if max_in_flight:
+            self.semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._sleep = sleep
+
+    def __enter__(self):
+        if self.bucket is not None:
+            delay = self.bucket.reserve()
+            if delay:
+                self._sleep(delay)
+        if self.semaphore is not None:
+            self.semaphore.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.semaphore is not None:
+            self.semaphore.release()
+
+    def acquire(self):
+        """Waits like entering the governor, returns Slot to release
+
+        For requests holding their slot after the call returns,
+        e.g. until streamed reply is read.
+        """
+        self.__enter__()
+        return Slot(self.semaphore)
+
+
+class Slot(object):
+    """Slot of RequestGovernor, freed by the first call of release()"""
+
+    def __init__(self, semaphore):
+        self._semaphore = semaphore
+        self._lock = threading.Lock()
+
+    def release(self):
+        with self._lock:
+            semaphore, self._semaphore = self._semaphore, None
+        if semaphore is not None:
+            semaphore.release()
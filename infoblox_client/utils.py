@@ -15,6 +15,8 @@
 
 import netaddr
 import six
+import threading
+import time
 
 import logging
 
@@ -25,6 +27,9 @@ except ImportError:  # pragma: no cover
 
 LOG = logging.getLogger(__name__)
 
+# time.monotonic is not available on Python 2
+monotonic = getattr(time, 'monotonic', time.time)
+
 
 def is_valid_ip(ip):
     try:
@@ -71,9 +76,14 @@ def determine_ip_version(ip_in):
     return ip_ver
 
 
-def safe_json_load(data):
+def get_obj_type(obj_type_or_ref):
+    """Returns object type for object type or object reference"""
+    return obj_type_or_ref.split('/', 1)[0]
+
+
+def safe_json_load(data, loads=jsonutils.loads):
     try:
-        return jsonutils.loads(data)
+        return loads(data)
     except ValueError:
         LOG.warning("Could not decode reply into json: %s", data)
 
@@ -108,3 +118,32 @@ def try_value_to_bool(value, strict_mode=True):
     elif val in false_list:
         return False
     return value
+
+
+class BackgroundCall(object):
+    """Runs function in background thread
+
+    Call the instance to wait for the function to finish and get
+    its result. Exception raised by the function is re-raised
+    in the calling thread.
+    """
+
+    def __init__(self, func, *args, **kwargs):
+        self._result = None
+        self._error = None
+        self._thread = threading.Thread(target=self._run,
+                                        args=(func, args, kwargs))
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _run(self, func, args, kwargs):
+        try:
+            self._result = func(*args, **kwargs)
+        except Exception as e:
+            self._error = e
+
+    def __call__(self):
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
@@ -37,6 +37,10 @@ setup(
                  'infoblox_client'},
     include_package_data=True,
     install_requires=requirements,
+    extras_require={
+        'async': ['aiohttp>=3.0'],
+        'fast-json': ['orjson'],
+    },
     license="Apache",
     zip_safe=False,
     keywords='infoblox-client',
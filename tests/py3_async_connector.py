@@ -0,0 +1,404 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+# Tests of asyncio support, using syntax and mock.AsyncMock which are
+# not available on py27. Collected through test_async_connector.py.
+import asyncio
+import unittest
+
+import mock
+import six
+
+try:
+    from oslo_serialization import jsonutils
+except ImportError:  # pragma: no cover
+    import json as jsonutils
+
+from infoblox_client import async_connector
+from infoblox_client import cache
+from infoblox_client import cookie_store
+from infoblox_client import exceptions
+from infoblox_client import objects
+
+HAS_AIOHTTP = async_connector.aiohttp is not None
+
+
+def run(coro):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def response(status_code, content):
+    if not isinstance(content, six.binary_type):
+        content = jsonutils.dumps(content).encode('utf-8')
+    return async_connector.AsyncResponse(status_code, content)
+
+
+@unittest.skipUnless(HAS_AIOHTTP, "AsyncConnector requires aiohttp")
+class TestAsyncConnector(unittest.TestCase):
+
+    def setUp(self):
+        super(TestAsyncConnector, self).setUp()
+        self.connector = async_connector.AsyncConnector(
+            {'host': 'infoblox.example.org',
+             'wapi_version': '1.1',
+             'username': 'admin',
+             'password': 'password'})
+        self.connector._request = mock.AsyncMock()
+
+    def test_get_object(self):
+        self.connector._request.return_value = response(
+            200, [{'_ref': 'network/1'}])
+        result = run(self.connector.get_object('network', {'ip': '0.0.0.0'}))
+        self.assertEqual([{'_ref': 'network/1'}], result)
+        self.connector._request.assert_called_once_with(
+            'get', 'https://infoblox.example.org/wapi/v1.1/network'
+                   '?ip=0.0.0.0',
+            {'headers': self.connector.DEFAULT_HEADER})
+
+    def test_get_object_not_found_returns_none(self):
+        self.connector._request.return_value = response(400, b'not found')
+        self.assertIsNone(run(self.connector.get_object('network')))
+
+    def test_get_object_error_is_not_cached(self):
+        self.connector.cache = cache.QueryCache(60, 10)
+        self.connector._request.side_effect = [
+            response(503, b'Service unavailable'),
+            response(200, [{'_ref': 'network/1'}])]
+        self.assertIsNone(run(self.connector.get_object('network')))
+        for _ in range(2):
+            self.assertEqual([{'_ref': 'network/1'}],
+                             run(self.connector.get_object('network')))
+        self.assertEqual(2, self.connector._request.call_count)
+
+    def test_get_object_with_paging(self):
+        self.connector._request.side_effect = [
+            response(200, {'result': [{'_ref': 'network/1'}],
+                           'next_page_id': 'page2'}),
+            response(200, {'result': [{'_ref': 'network/2'}]})]
+        result = run(self.connector.get_object('network', paging=True))
+        self.assertEqual([{'_ref': 'network/1'}, {'_ref': 'network/2'}],
+                         result)
+        second_url = self.connector._request.call_args_list[1][0][1]
+        self.assertIn('_page_id=page2', second_url)
+
+    def test_get_object_cloud_does_proxied_search_on_miss(self):
+        self.connector.cloud_api_enabled = True
+        self.connector._request.side_effect = [
+            response(200, []),
+            response(200, [{'_ref': 'network/1'}])]
+        result = run(self.connector.get_object('network'))
+        self.assertEqual([{'_ref': 'network/1'}], result)
+        second_url = self.connector._request.call_args_list[1][0][1]
+        self.assertIn('_proxy_search=GM', second_url)
+
+    def test_create_object(self):
+        payload = {'network': '192.168.1.0/24'}
+        self.connector._request.return_value = response(201, 'network/1')
+        self.assertEqual('network/1',
+                         run(self.connector.create_object('network',
+                                                          payload)))
+        self.connector._request.assert_called_once_with(
+            'post', 'https://infoblox.example.org/wapi/v1.1/network',
+            {'headers': self.connector.DEFAULT_HEADER,
+             'data': self.connector.codec.dumps(payload)})
+
+    def test_create_object_raises_cannot_create(self):
+        self.connector._request.return_value = response(
+            400, {'text': 'some error'})
+        self.assertRaises(exceptions.InfobloxCannotCreateObject,
+                          run, self.connector.create_object(
+                              'network', {'network': '192.168.1.0/24'}))
+
+    def test_update_object_raises_grid_unavailable(self):
+        self.connector._request.return_value = response(503, b'busy')
+        self.assertRaises(exceptions.InfobloxGridTemporaryUnavailable,
+                          run, self.connector.update_object('network/1',
+                                                            {}))
+
+    def test_delete_object_raises_cannot_delete(self):
+        self.connector._request.return_value = response(400, {})
+        self.assertRaises(exceptions.InfobloxCannotDeleteObject,
+                          run, self.connector.delete_object('network/1'))
+
+    def test_call_func(self):
+        self.connector._request.return_value = response(200, {'ips': []})
+        run(self.connector.call_func('next_available_ip', 'network/1',
+                                     {'num': 1}))
+        url = self.connector._request.call_args[0][1]
+        self.assertIn('_function=next_available_ip', url)
+
+    def test_multi_request(self):
+        requests_data = [{'method': 'DELETE', 'object': 'network/1'}]
+        self.connector._request.return_value = response(200, ['network/1'])
+        self.assertEqual(['network/1'],
+                         run(self.connector.multi_request(requests_data)))
+        self.connector._request.assert_called_once_with(
+            'post', 'https://infoblox.example.org/wapi/v1.1/request',
+            {'headers': self.connector.DEFAULT_HEADER,
+             'data': self.connector.codec.dumps(requests_data)})
+
+    def test_multi_request_raises_multi_request_exception(self):
+        self.connector._request.return_value = response(
+            400, {'text': 'some error'})
+        self.assertRaises(exceptions.InfobloxMultiRequestException,
+                          run, self.connector.multi_request(
+                              [{'method': 'DELETE', 'object': 'network/1'}]))
+
+    def test_sync_only_methods_are_not_implemented(self):
+        self.assertRaises(NotImplementedError,
+                          self.connector.iter_objects, 'network')
+        self.assertRaises(NotImplementedError, self.connector.batch)
+
+    def test_cookie_store_is_not_supported(self):
+        self.assertRaises(exceptions.InfobloxConfigException,
+                          async_connector.AsyncConnector,
+                          {'host': 'infoblox.example.org',
+                           'username': 'admin', 'password': 'password',
+                           'cookie_store': cookie_store.CookieStore()})
+
+    def test_count_and_iter_search_are_not_supported(self):
+        self.assertRaisesRegex(NotImplementedError, 'asearch_all',
+                               objects.Network.count, self.connector)
+        self.assertRaisesRegex(NotImplementedError, 'asearch_all',
+                               objects.Network.iter_search, self.connector)
+        self.assertFalse(self.connector._request.called)
+
+    def test_non_authorized_raises_bad_credential(self):
+        self.connector._request.return_value = response(401, b'')
+        self.assertRaises(exceptions.InfobloxBadWAPICredential,
+                          run, self.connector.get_object('network'))
+
+    def test_timeout_is_reraised(self):
+        self.connector._request.side_effect = asyncio.TimeoutError()
+        self.assertRaises(exceptions.InfobloxTimeoutError,
+                          run, self.connector.get_object('network'))
+
+    def test_client_error_is_reraised(self):
+        self.connector._request.side_effect = (
+            async_connector.aiohttp.ClientError())
+        self.assertRaises(exceptions.InfobloxConnectionError,
+                          run, self.connector.get_object('network'))
+
+    def test_request_drops_basic_auth_once_cookie_is_set(self):
+        conn = async_connector.AsyncConnector(
+            {'host': 'infoblox.example.org', 'username': 'admin',
+             'password': 'password'})
+        resp = mock.Mock(status=200)
+        resp.read = mock.AsyncMock(return_value=b'[]')
+        ctx = mock.MagicMock()
+        ctx.__aenter__ = mock.AsyncMock(return_value=resp)
+        session = mock.Mock(closed=False, cookie_jar=[])
+        session.request.return_value = ctx
+        conn.session = session
+
+        reply = run(conn._send('get', 'url', {'headers': {}}))
+        self.assertEqual(200, reply.status_code)
+        self.assertEqual(b'[]', reply.content)
+        headers = session.request.call_args[1]['headers']
+        self.assertEqual('Basic YWRtaW46cGFzc3dvcmQ=',
+                         headers['Authorization'])
+
+        session.cookie_jar = ['ibapauth']
+        run(conn._send('get', 'url', {'headers': {}}))
+        headers = session.request.call_args[1]['headers']
+        self.assertNotIn('Authorization', headers)
+
+    def test_expired_cookie_is_renewed_by_single_login(self):
+        conn = async_connector.AsyncConnector(
+            {'host': 'infoblox.example.org', 'username': 'admin',
+             'password': 'password'})
+        session = mock.Mock(closed=False, cookie_jar=['expired'])
+        logins = []
+
+        def request(method, url, headers):
+            if 'Authorization' in headers:
+                logins.append(1)
+                session.cookie_jar = ['renewed']
+            status = 200 if session.cookie_jar != ['expired'] else 401
+
+            async def read():
+                await asyncio.sleep(0)
+                return b'[]'
+
+            resp = mock.Mock(status=status, read=read)
+            ctx = mock.MagicMock()
+            ctx.__aenter__ = mock.AsyncMock(return_value=resp)
+            return ctx
+
+        session.request.side_effect = request
+        conn.session = session
+
+        async def send_requests():
+            return await asyncio.gather(*[
+                conn._send('get', 'url', {'headers': {}})
+                for _ in range(3)])
+
+        replies = run(send_requests())
+        self.assertEqual([200] * 3, [r.status_code for r in replies])
+        self.assertEqual(1, len(logins))
+        self.assertEqual(6, session.request.call_count)
+
+    def test_request_goes_through_governor(self):
+        conn = async_connector.AsyncConnector(
+            {'host': 'infoblox.example.org', 'username': 'admin',
+             'password': 'password', 'write_rate_limit': 1000,
+             'max_writes_in_flight': 1})
+        governor = conn._get_governor('post')
+        self.assertIsInstance(governor,
+                              async_connector.AsyncRequestGovernor)
+        self.assertIsNot(governor, conn._get_governor('get'))
+        resp = mock.Mock(status=201)
+        resp.read = mock.AsyncMock(return_value=b'"network/1"')
+        ctx = mock.MagicMock()
+        ctx.__aenter__ = mock.AsyncMock(return_value=resp)
+        conn.session = mock.Mock(closed=False, cookie_jar=[])
+        conn.session.request.return_value = ctx
+
+        async def create_objects():
+            return await asyncio.gather(*[
+                conn.create_object('network', {}) for _ in range(3)])
+
+        self.assertEqual(['network/1'] * 3, run(create_objects()))
+        self.assertFalse(governor._semaphore.locked())
+
+    def test_metrics_hooks(self):
+        hook = mock.Mock()
+        self.connector.add_metrics_hook(hook)
+        self.connector._request.return_value = response(
+            200, {'result': [{'_ref': 'network/1'}]})
+        run(self.connector.get_object('network', paging=True))
+        metrics = hook.after_response.call_args[0][0]
+        self.assertIs(metrics, hook.before_request.call_args[0][0])
+        self.assertEqual(('get', 'network', 200, 1),
+                         (metrics.method, metrics.obj_type,
+                          metrics.status_code, metrics.pages))
+
+    def test_identical_gets_are_coalesced(self):
+        async def request(method, url, opts):
+            await asyncio.sleep(0.01)
+            return response(200, [{'_ref': 'network/1'}])
+
+        async def get_objects():
+            return await asyncio.gather(
+                *[self.connector.get_object('network') for _ in range(3)] +
+                [self.connector.get_object('network', {'ip': '0.0.0.0'})])
+
+        self.connector._request.side_effect = request
+        results = run(get_objects())
+        self.assertEqual([[{'_ref': 'network/1'}]] * 4, results)
+        self.assertEqual(2, self.connector._request.call_count)
+        self.assertEqual(2, self.connector.coalesced_requests)
+        # every caller gets own copy of the reply
+        self.assertIsNot(results[0], results[1])
+        self.assertEqual(0, len(self.connector.gets_in_flight))
+
+    def test_cancelled_get_is_rerun_for_coalesced_callers(self):
+        started = []
+
+        async def request(method, url, opts):
+            started.append(1)
+            await asyncio.sleep(0.01)
+            return response(200, [{'_ref': 'network/1'}])
+
+        async def get_objects():
+            leader = asyncio.ensure_future(
+                self.connector.get_object('network'))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(
+                self.connector.get_object('network'))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        self.connector._request.side_effect = request
+        self.assertEqual([{'_ref': 'network/1'}], run(get_objects()))
+        self.assertEqual(2, len(started))
+        self.assertEqual(0, len(self.connector.gets_in_flight))
+
+    def test_ssl_setting(self):
+        self.assertFalse(self.connector._get_ssl_setting())
+        self.connector.ssl_verify = 'true'
+        self.assertIsNone(self.connector._get_ssl_setting())
+
+
+@unittest.skipUnless(HAS_AIOHTTP, "AsyncConnector requires aiohttp")
+class TestAsyncObjects(unittest.TestCase):
+
+    def _mock_connector(self, get_object=None, create_object=None,
+                        update_object=None):
+        connector = mock.Mock()
+        connector.get_object = mock.AsyncMock(return_value=get_object)
+        connector.create_object = mock.AsyncMock(return_value=create_object)
+        connector.update_object = mock.AsyncMock(return_value=update_object)
+        connector.delete_object = mock.AsyncMock()
+        return connector
+
+    def test_asearch(self):
+        connector = self._mock_connector(
+            get_object=[{'_ref': 'network/1', 'network': '10.0.0.0/24',
+                         'network_view': 'default'}])
+        network = run(objects.Network.asearch(connector,
+                                              network_view='default',
+                                              cidr='10.0.0.0/24'))
+        self.assertIsInstance(network, objects.NetworkV4)
+        self.assertEqual('network/1', network.ref)
+        connector.get_object.assert_called_once_with(
+            'network',
+            {'network_view': 'default', 'network': '10.0.0.0/24'},
+            extattrs=None, force_proxy=False, return_fields=mock.ANY,
+            max_results=None)
+
+    def test_asearch_all_empty(self):
+        connector = self._mock_connector()
+        self.assertEqual([], run(objects.Network.asearch_all(connector)))
+
+    def test_acreate_skips_existing(self):
+        connector = self._mock_connector(get_object=[{'_ref': 'view/1'}])
+        view = run(objects.DNSView.acreate(connector, name='view'))
+        self.assertEqual('view/1', view.ref)
+        self.assertFalse(connector.create_object.called)
+
+    def test_acreate(self):
+        connector = self._mock_connector(create_object={'_ref': 'view/1',
+                                                        'name': 'view'})
+        view = run(objects.DNSView.acreate(connector, name='view'))
+        self.assertEqual('view/1', view.ref)
+        connector.create_object.assert_called_once_with(
+            'view', {'name': 'view'}, mock.ANY)
+
+    def test_acreate_optimistic(self):
+        connector = self._mock_connector(get_object=[{'_ref': 'view/1'}])
+        connector.create_object.side_effect = (
+            exceptions.InfobloxObjectAlreadyExists(
+                response=None, obj_type='view', content='', args={},
+                code=400))
+        view, created = run(objects.DNSView.acreate_check_exists(
+            connector, name='view', optimistic=True))
+        self.assertFalse(created)
+        self.assertEqual('view/1', view.ref)
+        self.assertEqual(1, connector.get_object.call_count)
+
+    def test_aupdate_and_adelete(self):
+        connector = self._mock_connector(update_object='view/1')
+        view = objects.DNSView(connector, name='view', _ref='view/1')
+        run(view.aupdate())
+        connector.update_object.assert_called_once_with(
+            'view/1', mock.ANY, mock.ANY)
+        run(view.adelete())
+        connector.delete_object.assert_called_once_with('view/1')
@@ -0,0 +1,196 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import unittest
+
+import mock
+import netaddr
+
+from infoblox_client import address_space
+from infoblox_client import objects
+
+
+class TestIntervalSet(unittest.TestCase):
+
+    def test_add_merges_intervals(self):
+        intervals = address_space.IntervalSet()
+        intervals.add(10, 20)
+        intervals.add(30, 40)
+        self.assertEqual([(10, 20), (30, 40)], list(intervals))
+        # adjacent
+        intervals.add(21, 22)
+        self.assertEqual([(10, 22), (30, 40)], list(intervals))
+        # overlapping both
+        intervals.add(15, 35)
+        self.assertEqual([(10, 40)], list(intervals))
+        intervals.add(1, 2)
+        intervals.add(50, 50)
+        self.assertEqual([(1, 2), (10, 40), (50, 50)], list(intervals))
+        self.assertEqual(34, intervals.count)
+        self.assertIn(40, intervals)
+        self.assertNotIn(41, intervals)
+        self.assertNotIn(0, intervals)
+
+    def test_iter_gaps(self):
+        intervals = address_space.IntervalSet()
+        self.assertEqual([(0, 9)], list(intervals.iter_gaps(0, 9)))
+        intervals.add(2, 3)
+        intervals.add(6, 7)
+        self.assertEqual([(0, 1), (4, 5), (8, 9)],
+                         list(intervals.iter_gaps(0, 9)))
+        self.assertEqual([(4, 5)], list(intervals.iter_gaps(3, 6)))
+        self.assertEqual([], list(intervals.iter_gaps(6, 7)))
+
+
+class TestAddressSpace(unittest.TestCase):
+
+    def test_utilization(self):
+        space = address_space.AddressSpace('10.0.0.0/24')
+        self.assertEqual(254, space.size)
+        self.assertEqual(0.0, space.utilization)
+        space.add_ip('10.0.0.1')
+        space.add_range('10.0.0.100', '10.0.0.226')
+        # out of network
+        space.add_ip('10.0.1.1')
+        space.add_range('9.0.0.0', '10.0.0.0')
+        self.assertEqual(128, space.used_count)
+        self.assertEqual(126, space.free_count)
+        self.assertAlmostEqual(50.39, space.utilization, places=2)
+
+    def test_free_blocks_and_subnets(self):
+        space = address_space.AddressSpace('10.0.0.0/24')
+        space.add_range('10.0.0.1', '10.0.0.63')
+        space.add_range('10.0.0.129', '10.0.0.254')
+        self.assertEqual([netaddr.IPRange('10.0.0.64', '10.0.0.128')],
+                         list(space.iter_free_blocks()))
+        self.assertEqual([netaddr.IPNetwork('10.0.0.64/26'),
+                          netaddr.IPNetwork('10.0.0.128/32')],
+                         list(space.iter_free_subnets()))
+        self.assertEqual(netaddr.IPNetwork('10.0.0.64/26'),
+                         space.largest_free_subnet())
+
+    def test_container_subnets(self):
+        space = address_space.AddressSpace('10.0.0.0/16',
+                                           exclude_reserved=False)
+        self.assertEqual(65536, space.size)
+        self.assertEqual(netaddr.IPNetwork('10.0.0.0/16'),
+                         space.largest_free_subnet())
+        space.add_range('10.0.0.0', '10.0.0.255')
+        self.assertEqual(netaddr.IPNetwork('10.0.128.0/17'),
+                         space.largest_free_subnet())
+        space.add_range('10.0.0.0', '10.0.255.255')
+        self.assertIsNone(space.largest_free_subnet())
+        self.assertEqual(100.0, space.utilization)
+
+    def test_large_ipv6_prefix(self):
+        space = address_space.AddressSpace('fd00::/32')
+        self.assertEqual(2 ** 96, space.size)
+        space.add_range('fd00::', 'fd00::1')
+        space.add_range('fd00:0:8000::',
+                        'fd00:0:ffff:ffff:ffff:ffff:ffff:ffff')
+        self.assertEqual(1, len(list(space.iter_free_blocks())))
+        self.assertEqual(netaddr.IPNetwork('fd00:0:4000::/34'),
+                         space.largest_free_subnet())
+        self.assertEqual(2 ** 95 - 2, space.free_count)
+
+    def test_add_object(self):
+        space = address_space.AddressSpace('10.0.0.0/24')
+        fixed = mock.Mock(infoblox_type='fixedaddress', ip='10.0.0.1')
+        host = mock.Mock(infoblox_type='record:host',
+                         ip=[mock.Mock(ip='10.0.0.2'),
+                             mock.Mock(ip='10.0.1.2')])
+        active = mock.Mock(infoblox_type='lease', address='10.0.0.3',
+                           binding_state='ACTIVE')
+        free = mock.Mock(infoblox_type='lease', address='10.0.0.4',
+                         binding_state='FREE')
+        ip_range = mock.Mock(infoblox_type='range', start_addr='10.0.0.10',
+                             end_addr='10.0.0.19')
+        for ib_obj in (fixed, host, active, free, ip_range):
+            space.add_object(ib_obj)
+        self.assertEqual([(1, 3), (10, 19)],
+                         [(start - space.network.value,
+                           end - space.network.value)
+                          for start, end in space.used])
+
+
+class TestLoadAddressSpaces(unittest.TestCase):
+
+    def setUp(self):
+        super(TestLoadAddressSpaces, self).setUp()
+        self.objects = {
+            'fixedaddress': [{'_ref': 'fixedaddress/1',
+                              'ipv4addr': '10.0.0.1'},
+                             {'_ref': 'fixedaddress/2',
+                              'ipv4addr': '10.0.1.1'},
+                             {'_ref': 'fixedaddress/3',
+                              'ipv4addr': '192.168.0.1'}],
+            'record:host': [{'_ref': 'record:host/1',
+                             'ipv4addrs': [{'ipv4addr': '10.0.0.2'},
+                                           {'ipv4addr': '10.0.1.2'}]}],
+            'lease': [{'_ref': 'lease/1', 'address': '10.0.0.3',
+                       'binding_state': 'ACTIVE'},
+                      {'_ref': 'lease/2', 'address': '10.0.0.4',
+                       'binding_state': 'FREE'}],
+            'range': [{'_ref': 'range/1', 'start_addr': '10.0.0.100',
+                       'end_addr': '10.0.0.199'}],
+        }
+        self.connector = mock.Mock()
+        self.connector.iter_objects.side_effect = self._iter_objects
+
+    def _iter_objects(self, obj_type, payload, **kwargs):
+        return iter(self.objects.get(obj_type, []))
+
+    def test_load_address_spaces(self):
+        spaces = address_space.load_address_spaces(
+            self.connector, ['10.0.0.0/24', '10.0.1.0/24', '10.0.0.0/16'],
+            network_view='test', page_size=1000)
+        self.assertEqual(103, spaces['10.0.0.0/24'].used_count)
+        self.assertEqual(2, spaces['10.0.1.0/24'].used_count)
+        self.assertEqual(105, spaces['10.0.0.0/16'].used_count)
+        # only IPv4 classes are requested for IPv4 spaces
+        obj_types = sorted(call[0][0] for call
+                           in self.connector.iter_objects.call_args_list)
+        self.assertEqual(['fixedaddress', 'lease', 'range', 'record:host'],
+                         obj_types)
+        self.connector.iter_objects.assert_any_call(
+            'lease', {'network_view': 'test'}, page_size=1000,
+            return_fields=['address', 'network_view', 'binding_state'])
+
+    def test_host_records_are_streamed_once_for_both_versions(self):
+        self.objects['record:host'][0]['ipv6addrs'] = [
+            {'ipv6addr': 'fd00::2'}]
+        spaces = address_space.load_address_spaces(
+            self.connector, ['10.0.0.0/24', 'fd00::/64'],
+            object_classes=[objects.HostRecord])
+        self.assertEqual(1, spaces['10.0.0.0/24'].used_count)
+        self.assertEqual(1, spaces['fd00::/64'].used_count)
+        self.connector.iter_objects.assert_called_once_with(
+            'record:host', {'network_view': 'default'}, page_size=None,
+            return_fields=['extattrs', 'ipv4addrs', 'name', 'view',
+                           'aliases', 'ipv6addrs'])
+
+    def test_range_crossing_space_boundary(self):
+        self.objects['range'] = [{'_ref': 'range/1',
+                                  'start_addr': '10.0.0.100',
+                                  'end_addr': '10.0.1.9'}]
+        spaces = address_space.load_address_spaces(
+            self.connector, ['10.0.0.0/25', '10.0.0.128/25', '10.0.0.160/28',
+                             '10.0.1.0/24', '10.0.2.0/24'],
+            object_classes=[objects.IPRange])
+        # .100 - .126, network and broadcast addresses are excluded
+        self.assertEqual(27, spaces['10.0.0.0/25'].used_count)
+        self.assertEqual(126, spaces['10.0.0.128/25'].used_count)
+        self.assertEqual(14, spaces['10.0.0.160/28'].used_count)
+        self.assertEqual(9, spaces['10.0.1.0/24'].used_count)
+        self.assertEqual(0, spaces['10.0.2.0/24'].used_count)
@@ -0,0 +1,176 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+import unittest
+
+import mock
+from six.moves import queue
+
+from benchmarks import fake_wapi
+from infoblox_client import auth
+from infoblox_client import connector
+
+CREDENTIALS = ('admin', 'password')
+
+
+class TestAuthState(unittest.TestCase):
+
+    def setUp(self):
+        super(TestAuthState, self).setUp()
+        self.session = mock.Mock(cookies=[], auth=None)
+        self.on_expired = mock.Mock()
+        self.state = auth.AuthState(CREDENTIALS, on_expired=self.on_expired)
+        self.state.reset(self.session)
+
+    def _login(self):
+        token = self.state.begin_request(self.session)
+        self.session.cookies = ['ibapauth']
+        self.assertFalse(self.state.end_request(self.session, token, 200))
+        return token
+
+    def test_reset(self):
+        self.assertEqual(auth.LOGGED_OUT, self.state.state)
+        self.assertEqual(CREDENTIALS, self.session.auth)
+        self.session.cookies = ['ibapauth']
+        self.state.reset(self.session)
+        self.assertEqual(auth.LOGGED_IN, self.state.state)
+        self.assertIsNone(self.session.auth)
+
+    def test_login(self):
+        token = self.state.begin_request(self.session)
+        self.assertEqual((True, 0), token)
+        self.assertEqual(auth.LOGGING_IN, self.state.state)
+        self.assertEqual(CREDENTIALS, self.session.auth)
+        self.session.cookies = ['ibapauth']
+        self.state.end_request(self.session, token, 200)
+        self.assertEqual(auth.LOGGED_IN, self.state.state)
+        self.assertIsNone(self.session.auth)
+        self.assertEqual((False, 1), self.state.begin_request(self.session))
+        self.assertEqual(1, self.state.logins)
+
+    def test_login_without_cookie_keeps_credentials(self):
+        token = self.state.begin_request(self.session)
+        self.state.end_request(self.session, token, 200)
+        self.assertEqual(auth.LOGGED_IN, self.state.state)
+        self.assertEqual(CREDENTIALS, self.session.auth)
+
+    def test_failed_login(self):
+        for status_code in (401, None):
+            token = self.state.begin_request(self.session)
+            self.assertFalse(
+                self.state.end_request(self.session, token, status_code))
+            self.assertEqual(auth.LOGGED_OUT, self.state.state)
+        self.assertEqual(2, self.state.logins)
+        self.assertFalse(self.on_expired.called)
+
+    def test_expired_cookie(self):
+        self._login()
+        first = self.state.begin_request(self.session)
+        second = self.state.begin_request(self.session)
+        self.assertTrue(self.state.end_request(self.session, first, 401))
+        self.assertEqual(auth.LOGGED_OUT, self.state.state)
+        self.assertEqual([], self.session.cookies)
+        self.on_expired.assert_called_once_with()
+        # request sent with the same cookie is sent again without logout
+        self.assertTrue(self.state.end_request(self.session, second, 401))
+        self.assertEqual(1, self.on_expired.call_count)
+
+    def test_expired_cookie_reloaded(self):
+        self._login()
+        self.state.reload_cookies = mock.Mock(return_value=True)
+        first = self.state.begin_request(self.session)
+        second = self.state.begin_request(self.session)
+        self.assertTrue(self.state.end_request(self.session, first, 401))
+        self.state.reload_cookies.assert_called_once_with(self.session)
+        self.assertEqual(auth.LOGGED_IN, self.state.state)
+        self.assertEqual(['ibapauth'], self.session.cookies)
+        self.assertFalse(self.on_expired.called)
+        self.assertTrue(self.state.end_request(self.session, second, 401))
+        self.assertEqual((False, 2), self.state.begin_request(self.session))
+        self.assertEqual(1, self.state.reload_cookies.call_count)
+
+    def test_requests_wait_for_login(self):
+        login = self.state.begin_request(self.session)
+        tokens = queue.Queue()
+        threads = [threading.Thread(
+            target=lambda: tokens.put(self.state.begin_request(self.session)))
+            for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        self.assertTrue(tokens.empty())
+        self.session.cookies = ['ibapauth']
+        self.state.end_request(self.session, login, 201)
+        for thread in threads:
+            thread.join()
+        self.assertEqual([(False, 1)] * 5,
+                         [tokens.get() for _ in range(5)])
+        self.assertEqual(1, self.state.logins)
+
+    def test_next_request_logs_in_after_failed_login(self):
+        login = self.state.begin_request(self.session)
+        tokens = queue.Queue()
+        thread = threading.Thread(
+            target=lambda: tokens.put(self.state.begin_request(self.session)))
+        thread.start()
+        self.state.end_request(self.session, login, None)
+        thread.join()
+        self.assertEqual((True, 0), tokens.get())
+
+
+class TestSharedConnector(unittest.TestCase):
+
+    def setUp(self):
+        super(TestSharedConnector, self).setUp()
+        wapi = fake_wapi.FakeWapi()
+        for network in fake_wapi.make_networks(3, ea_count=1):
+            wapi.add('network', network)
+        self.server = fake_wapi.FakeWapiServer(wapi, latency=0.01,
+                                               credentials=CREDENTIALS)
+        thread = threading.Thread(target=self.server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.connector = connector.Connector(
+            {'host': '127.0.0.1', 'username': CREDENTIALS[0],
+             'password': CREDENTIALS[1], 'http_pool_maxsize': 8})
+        self.connector.wapi_url = self.server.wapi_url('2.1')
+
+    def _get_networks_concurrently(self, threads=8):
+        results = queue.Queue()
+
+        def get():
+            try:
+                results.put(len(self.connector.get_object('network')))
+            except Exception as e:
+                results.put(e)
+
+        workers = [threading.Thread(target=get) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return [results.get() for _ in range(threads)]
+
+    def test_one_login_is_shared(self):
+        self.assertEqual([3] * 8, self._get_networks_concurrently())
+        self.assertEqual(1, self.server.logins)
+        self.assertIsNone(self.connector.session.auth)
+
+    def test_expired_session_is_renewed_once(self):
+        self._get_networks_concurrently()
+        self.server.expire_sessions()
+        self.assertEqual([3] * 8, self._get_networks_concurrently())
+        self.assertEqual(2, self.server.logins)
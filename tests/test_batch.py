@@ -0,0 +1,172 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import unittest
+
+import mock
+import requests
+from mock import patch
+
+from infoblox_client import batch
+from infoblox_client import connector
+from infoblox_client import exceptions
+from infoblox_client import objects
+
+
+class TestBatch(unittest.TestCase):
+
+    def setUp(self):
+        super(TestBatch, self).setUp()
+        self.connector = connector.Connector({'host': 'infoblox.example.org',
+                                              'wapi_version': '2.1',
+                                              'username': 'admin',
+                                              'password': 'password'})
+
+    def test_multi_request(self):
+        data = [{'method': 'DELETE', 'object': 'network/1'}]
+        with patch.object(requests.Session, 'post',
+                          return_value=mock.Mock()) as patched_post:
+            patched_post.return_value.status_code = 200
+            patched_post.return_value.content = '["network/1"]'
+            self.assertEqual(['network/1'],
+                             self.connector.multi_request(data))
+            patched_post.assert_called_once_with(
+                'https://infoblox.example.org/wapi/v2.1/request',
+                data=self.connector.codec.dumps(data),
+                headers=self.connector.DEFAULT_HEADER,
+                timeout=self.connector.http_request_timeout,
+                verify=False)
+
+    def test_multi_request_with_http_error(self):
+        with patch.object(requests.Session, 'post',
+                          return_value=mock.Mock()) as patched_post:
+            patched_post.return_value.status_code = 400
+            patched_post.return_value.content = '{"text": "error"}'
+            self.assertRaises(exceptions.InfobloxMultiRequestException,
+                              self.connector.multi_request, [])
+
+    def test_batch_packs_operations_into_chunks(self):
+        self.connector.multi_request = mock.Mock(
+            side_effect=lambda data: ['ref%s' % i for i in range(len(data))])
+        with self.connector.batch(chunk_size=2) as b:
+            first = b.create_object('network', {'network': '10.0.0.0/24'})
+            b.update_object('network/1', {'comment': 'test'}, ['comment'])
+            b.delete_object('network/2')
+
+        self.assertEqual(2, self.connector.multi_request.call_count)
+        self.connector.multi_request.assert_any_call(
+            [{'method': 'POST', 'object': 'network',
+              'data': {'network': '10.0.0.0/24'}},
+             {'method': 'PUT', 'object': 'network/1',
+              'data': {'comment': 'test'},
+              'args': {'_return_fields': 'comment'}}])
+        self.connector.multi_request.assert_any_call(
+            [{'method': 'DELETE', 'object': 'network/2'}])
+        self.assertEqual('ref0', first.result)
+        self.assertEqual([], b.errors)
+
+    def test_batch_maps_results_to_objects(self):
+        self.connector.multi_request = mock.Mock(return_value=[
+            {'_ref': 'view/1', 'name': 'view1'}, 'view/2'])
+        view1 = objects.DNSView(self.connector, name='view1')
+        view2 = objects.DNSView(self.connector, name='view2')
+        with self.connector.batch() as b:
+            b.create(view1)
+            b.create(view2)
+        self.assertEqual('view/1', view1.ref)
+        self.assertEqual('view/2', view2.ref)
+
+    def test_batch_update_sends_changed_fields(self):
+        self.connector.multi_request = mock.Mock(return_value=['view/1'])
+        view = objects.DNSView.from_dict(
+            self.connector, {'_ref': 'view/1', 'name': 'view1',
+                             'comment': 'old'})
+        view.comment = 'new'
+        view.set_extattrs({'Site': 'HQ'})
+        with self.connector.batch() as b:
+            b.update(view)
+        self.connector.multi_request.assert_called_once_with(
+            [{'method': 'PUT', 'object': 'view/1',
+              'data': {'comment': 'new',
+                       'extattrs+': {'Site': {'value': 'HQ'}}},
+              'args': mock.ANY}])
+        self.assertEqual(set(), view.changed_fields)
+        self.assertEqual({}, view.get_update_fields())
+
+    def test_batch_update_skips_unchanged_object(self):
+        self.connector.multi_request = mock.Mock(return_value=['view/2'])
+        unchanged = objects.DNSView.from_dict(
+            self.connector, {'_ref': 'view/1', 'name': 'view1'})
+        changed = objects.DNSView.from_dict(
+            self.connector, {'_ref': 'view/2', 'name': 'view2'})
+        changed.comment = 'new'
+        with self.connector.batch() as b:
+            self.assertIsNone(b.update(unchanged))
+            b.update(changed)
+        self.assertEqual(1, len(b.items))
+        self.connector.multi_request.assert_called_once_with(
+            [{'method': 'PUT', 'object': 'view/2',
+              'data': {'comment': 'new'}, 'args': mock.ANY}])
+
+    def test_batch_update_of_unchanged_objects_sends_nothing(self):
+        self.connector.multi_request = mock.Mock()
+        view = objects.DNSView.from_dict(
+            self.connector, {'_ref': 'view/1', 'name': 'view1'})
+        with self.connector.batch() as b:
+            b.update(view)
+        self.assertEqual([], b.items)
+        self.assertFalse(self.connector.multi_request.called)
+
+    def test_batch_raises_per_item_exceptions(self):
+        self.connector.multi_request = mock.Mock(side_effect=[
+            exceptions.InfobloxMultiRequestException(
+                response={'text': 'error'}, content='error', code=400),
+            ['network/3']])
+        with self.connector.batch(chunk_size=3) as b:
+            create = b.create_object('network', {'network': '10.0.0.0/24'})
+            update = b.update_object('network/1', {'comment': 'test'})
+            delete = b.delete_object('network/2')
+            last = b.delete_object('network/3')
+
+        self.assertEqual(3, len(b.errors))
+        self.assertRaises(exceptions.InfobloxCannotCreateObject,
+                          lambda: create.result)
+        self.assertRaises(exceptions.InfobloxCannotUpdateObject,
+                          lambda: update.result)
+        self.assertRaises(exceptions.InfobloxCannotDeleteObject,
+                          lambda: delete.result)
+        self.assertEqual('network/3', last.result)
+
+    def test_batch_not_executed_on_exception(self):
+        self.connector.multi_request = mock.Mock()
+        try:
+            with self.connector.batch() as b:
+                b.delete_object('network/1')
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertFalse(self.connector.multi_request.called)
+
+    def test_execute_sends_only_pending_items(self):
+        self.connector.multi_request = mock.Mock(return_value=['ref'])
+        b = batch.Batch(self.connector)
+        b.delete_object('network/1')
+        self.assertEqual(1, len(b.execute()))
+        b.delete_object('network/2')
+        self.assertEqual(1, len(b.execute()))
+        self.connector.multi_request.assert_called_with(
+            [{'method': 'DELETE', 'object': 'network/2'}])
+
+    def test_invalid_chunk_size(self):
+        self.assertRaises(ValueError, batch.Batch, self.connector, 0)
@@ -0,0 +1,100 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+import unittest
+
+from benchmarks import fake_wapi
+from benchmarks import run
+from infoblox_client import connector
+from infoblox_client import objects
+
+
+class TestFakeWapi(unittest.TestCase):
+
+    def setUp(self):
+        super(TestFakeWapi, self).setUp()
+        self.wapi = fake_wapi.FakeWapi(page_size=2)
+        for network in fake_wapi.make_networks(5, ea_count=1):
+            self.wapi.add('network', network)
+
+    def test_paged_search(self):
+        params = {'_paging': '1', '_max_results': '10',
+                  'network_view': 'default'}
+        code, reply = self.wapi.search('network', params)
+        self.assertEqual(200, code)
+        self.assertEqual(2, len(reply['result']))
+        params['_page_id'] = reply['next_page_id']
+        _, reply = self.wapi.search('network', params)
+        params['_page_id'] = reply['next_page_id']
+        _, reply = self.wapi.search('network', params)
+        self.assertEqual(1, len(reply['result']))
+        self.assertNotIn('next_page_id', reply)
+
+    def test_search_by_extattr(self):
+        _, reply = self.wapi.search('network',
+                                    {'*Attribute 0': 'value 3'})
+        self.assertEqual(['10.0.3.0/24'], [n['network'] for n in reply])
+
+    def test_crud(self):
+        code, ref = self.wapi.handle('POST', 'network', {},
+                                     {'network': '172.16.0.0/24'})
+        self.assertEqual(201, code)
+        self.assertTrue(ref.startswith('network/'))
+        self.assertEqual(200, self.wapi.handle('PUT', ref, {},
+                                               {'comment': 'x'})[0])
+        self.assertEqual('x', self.wapi.get(ref)[1]['comment'])
+        self.assertEqual((200, ref), self.wapi.handle('DELETE', ref, {},
+                                                      None))
+        self.assertEqual(404, self.wapi.get(ref)[0])
+
+
+class TestFakeWapiServer(unittest.TestCase):
+
+    def test_connector_against_server(self):
+        wapi = fake_wapi.FakeWapi(page_size=3)
+        for network in fake_wapi.make_networks(7):
+            wapi.add('network', network)
+        server = fake_wapi.FakeWapiServer(wapi)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        conn = connector.Connector({'host': '127.0.0.1',
+                                    'username': 'admin',
+                                    'password': 'admin',
+                                    'wapi_version': '2.5',
+                                    'max_results': 3,
+                                    'paging': True})
+        conn.wapi_url = server.wapi_url('2.5')
+        networks = objects.Network.search_all(conn, network_view='default')
+        self.assertEqual(7, len(networks))
+        network = objects.Network.create(conn, network_view='default',
+                                         cidr='172.16.0.0/24')
+        self.assertTrue(network.ref.startswith('network/'))
+
+
+class TestCompare(unittest.TestCase):
+
+    def test_regressions(self):
+        baseline = {'a': {'ops_per_sec': 100.0},
+                    'b': {'ops_per_sec': 100.0}}
+        results = {'a': {'ops_per_sec': 95.0},
+                   'b': {'ops_per_sec': 80.0},
+                   'c': {'ops_per_sec': 1.0}}
+        regressions = run.compare(results, baseline, threshold=10)
+        self.assertEqual(1, len(regressions))
+        self.assertTrue(regressions[0].startswith('b:'))
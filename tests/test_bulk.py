@@ -0,0 +1,98 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+import time
+import unittest
+
+import mock
+
+from infoblox_client import bulk
+from infoblox_client import object_manager as om
+
+
+class TestBulkExecutor(unittest.TestCase):
+
+    def test_map_keeps_input_order(self):
+        def func(value):
+            time.sleep(0.001 * (10 - value))
+            return value * 2
+
+        results = bulk.BulkExecutor(4).map(
+            func, ({'value': i} for i in range(10)))
+        self.assertEqual([i * 2 for i in range(10)],
+                         [r.result for r in results])
+
+    def test_map_stores_errors_per_item(self):
+        def func(value):
+            if value == 1:
+                raise ValueError('bad value')
+            return value
+
+        results = bulk.BulkExecutor(2).map(func, [(0,), (1,), (2,)])
+        self.assertEqual([True, False, True], [r.ok for r in results])
+        self.assertIsInstance(results[1].error, ValueError)
+        self.assertEqual((1,), results[1].spec)
+
+    def test_map_limits_concurrency(self):
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+
+        def func():
+            with lock:
+                state['running'] += 1
+                state['max'] = max(state['max'], state['running'])
+            time.sleep(0.005)
+            with lock:
+                state['running'] -= 1
+
+        bulk.BulkExecutor(3).map(func, [()] * 20)
+        self.assertEqual(3, state['max'])
+
+    def test_map_applies_backpressure(self):
+        consumed = []
+        release = threading.Event()
+
+        def specs():
+            for i in range(10):
+                consumed.append(i)
+                yield (i,)
+
+        def func(value):
+            release.wait()
+
+        thread = threading.Thread(
+            target=bulk.BulkExecutor(1, max_pending=2).map,
+            args=(func, specs()))
+        thread.start()
+        time.sleep(0.05)
+        # one spec is processed, two are queued and one is blocked on put
+        self.assertTrue(len(consumed) <= 4)
+        release.set()
+        thread.join()
+        self.assertEqual(10, len(consumed))
+
+    def test_invalid_number_of_workers(self):
+        self.assertRaises(ValueError, bulk.BulkExecutor, 0)
+
+
+class TestObjectManagerBulk(unittest.TestCase):
+
+    def test_max_workers_limited_by_pool_size(self):
+        connector = mock.Mock()
+        connector.http_pool_maxsize = 2
+        ibom = om.InfobloxObjectManager(connector)
+        with mock.patch.object(bulk, 'BulkExecutor') as executor:
+            ibom.delete_networks([], max_workers=10)
+            executor.assert_called_once_with(2)
@@ -0,0 +1,181 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+import unittest
+
+import mock
+
+from infoblox_client import cache
+from infoblox_client import connector
+
+
+class TestQueryCache(unittest.TestCase):
+
+    def setUp(self):
+        super(TestQueryCache, self).setUp()
+        self.now = 0
+        self.cache = cache.QueryCache(10, 2, timer=lambda: self.now)
+
+    def test_get_returns_copy(self):
+        key = self.cache.make_key('network', {'network': '10.0.0.0/8'})
+        self.cache.set(key, [{'extattrs': {}}])
+        found, reply = self.cache.get(key)
+        self.assertTrue(found)
+        reply[0]['extattrs'] = 'changed'
+        self.assertEqual((True, [{'extattrs': {}}]), self.cache.get(key))
+        self.assertEqual(2, self.cache.hits)
+
+    def test_key_does_not_depend_on_dict_order(self):
+        self.assertEqual(self.cache.make_key('network', {'a': 1, 'b': 2}),
+                         self.cache.make_key('network', {'b': 2, 'a': 1}))
+        self.assertNotEqual(self.cache.make_key('network', None, ['a']),
+                            self.cache.make_key('network', None, ['b']))
+
+    def test_entries_expire(self):
+        self.cache.set('key', None)
+        self.now = 9
+        self.assertEqual((True, None), self.cache.get('key'))
+        self.now = 10
+        self.assertEqual((False, None), self.cache.get('key'))
+        self.assertEqual(0, len(self.cache))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        keys = [self.cache.make_key('network', i) for i in range(3)]
+        self.cache.set(keys[0], 0)
+        self.cache.set(keys[1], 1)
+        self.cache.get(keys[0])
+        self.cache.set(keys[2], 2)
+        self.assertEqual(2, len(self.cache))
+        self.assertEqual((True, 0), self.cache.get(keys[0]))
+        self.assertEqual((False, None), self.cache.get(keys[1]))
+
+    def test_invalidate_by_ref(self):
+        network_key = self.cache.make_key('network', {'network': 'net'})
+        ref_key = self.cache.make_key('network/ZG5z:10.0.0.0/8/default')
+        view_key = self.cache.make_key('view', {'name': 'default'})
+        self.cache.max_size = 10
+        for key in (network_key, ref_key, view_key):
+            self.cache.set(key, [])
+        self.cache.invalidate('network/ZG5z:10.0.0.0/8/default')
+        self.assertEqual(1, len(self.cache))
+        self.assertTrue(self.cache.get(view_key)[0])
+
+    def test_set_drops_reply_of_search_started_before_invalidate(self):
+        key = self.cache.make_key('network', {'network': 'net'})
+        generation = self.cache.generation(key)
+        self.cache.invalidate('network/ZG5z:10.0.0.0/8/default')
+        self.cache.set(key, [], generation)
+        self.assertEqual(0, len(self.cache))
+
+        self.cache.set(key, [], self.cache.generation(key))
+        self.assertEqual(1, len(self.cache))
+
+
+class TestConnectorCache(unittest.TestCase):
+
+    def setUp(self):
+        super(TestConnectorCache, self).setUp()
+        self.connector = connector.Connector({'host': 'infoblox.example.org',
+                                              'username': 'admin',
+                                              'password': 'password',
+                                              'cache_ttl': 60})
+        self.connector._get_object = mock.Mock(
+            return_value=[{'_ref': 'network/1'}])
+
+    def test_cache_disabled_by_default(self):
+        conn = connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password'})
+        self.assertIsNone(conn.cache)
+
+    def test_get_object_is_cached(self):
+        for _ in range(3):
+            reply = self.connector.get_object('network',
+                                              {'network': '10.0.0.0/8'},
+                                              return_fields=['network'])
+            self.assertEqual([{'_ref': 'network/1'}], reply)
+        self.assertEqual(1, self.connector._get_object.call_count)
+
+        self.connector.get_object('network', {'network': '10.0.0.0/8'},
+                                  return_fields=['comment'])
+        self.assertEqual(2, self.connector._get_object.call_count)
+
+    def test_error_reply_is_not_cached(self):
+        del self.connector._get_object
+        self.connector.cloud_api_enabled = False
+        replies = [mock.Mock(status_code=code, content=content)
+                   for code, content in ((503, 'Service unavailable'),
+                                         (500, '{"Error": "failed"}'),
+                                         (200, '[{"_ref": "network/1"}]'))]
+        with mock.patch.object(self.connector.session, 'get',
+                               side_effect=replies) as get:
+            for _ in range(2):
+                self.assertIsNone(self.connector.get_object('network'))
+            for _ in range(2):
+                self.assertEqual([{'_ref': 'network/1'}],
+                                 self.connector.get_object('network'))
+        self.assertEqual(3, get.call_count)
+
+    def test_failed_page_is_not_cached(self):
+        del self.connector._get_object
+        self.connector.cloud_api_enabled = False
+        replies = [
+            mock.Mock(status_code=200,
+                      content='{"result": [1], "next_page_id": "p2"}'),
+            mock.Mock(status_code=503, content='Service unavailable'),
+            mock.Mock(status_code=200, content='{"result": [1]}')]
+        with mock.patch.object(self.connector.session, 'get',
+                               side_effect=replies):
+            self.assertIsNone(self.connector.get_object('network',
+                                                        paging=True))
+            self.assertEqual([1], self.connector.get_object('network',
+                                                            paging=True))
+
+    def test_write_invalidates_cache(self):
+        self.connector.get_object('network')
+        with mock.patch.object(self.connector.session, 'delete') as delete:
+            delete.return_value.status_code = 200
+            delete.return_value.content = '"network/1"'
+            self.connector.delete_object('network/1')
+        self.connector.get_object('network')
+        self.assertEqual(2, self.connector._get_object.call_count)
+
+    def test_search_running_alongside_update_is_not_cached(self):
+        search_sent = threading.Event()
+        update_done = threading.Event()
+
+        def get_object(obj_type, url, raise_on_error=False):
+            search_sent.set()
+            update_done.wait(5)
+            return [{'_ref': 'network/1', 'comment': 'old'}]
+
+        self.connector._get_object = mock.Mock(side_effect=get_object)
+        search = threading.Thread(target=self.connector.get_object,
+                                  args=('network',))
+        search.start()
+        search_sent.wait(5)
+        with mock.patch.object(self.connector.session, 'put') as put:
+            put.return_value.status_code = 200
+            put.return_value.content = '"network/1"'
+            self.connector.update_object('network/1', {'comment': 'new'})
+        update_done.set()
+        search.join()
+
+        self.connector._get_object.side_effect = None
+        self.connector._get_object.return_value = [
+            {'_ref': 'network/1', 'comment': 'new'}]
+        self.assertEqual([{'_ref': 'network/1', 'comment': 'new'}],
+                         self.connector.get_object('network'))
+        self.assertEqual(2, self.connector._get_object.call_count)
@@ -0,0 +1,174 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+try:
+    from oslo_serialization import jsonutils
+except ImportError:  # pragma: no cover
+    import json as jsonutils
+
+from infoblox_client import change_feed
+from infoblox_client import connector
+from infoblox_client import exceptions
+from infoblox_client import objects
+from tests import test_connector
+
+
+def entry(unique_id, obj_type, obj, sequence_id):
+    return {'unique_id': unique_id, 'object_type': obj_type,
+            'object': obj, 'last_sequence_id': sequence_id}
+
+
+class TestChangeFeed(unittest.TestCase):
+
+    def setUp(self):
+        super(TestChangeFeed, self).setUp()
+        self.connector = mock.Mock()
+        self.snapshot = [entry('h1', 'record:host', {'_ref': 'host/1'}, '5')]
+        self.changes = []
+        self.connector.iter_objects.side_effect = self._iter_objects
+        self.events = []
+
+    def _iter_objects(self, obj_type, payload, return_fields=None,
+                      page_size=None, raise_on_error=False):
+        self.assertTrue(raise_on_error)
+        if 'start_sequence_id' in payload:
+            return iter(self.changes)
+        return iter(self.snapshot)
+
+    def _feed(self, **kwargs):
+        feed = change_feed.ChangeFeed(self.connector, **kwargs)
+        feed.subscribe(objects.HostRecord, self.events.append)
+        return feed
+
+    def test_first_poll_learns_position(self):
+        feed = self._feed()
+        self.assertEqual(0, feed.poll())
+        self.assertEqual('5', feed.sequence_id)
+        self.assertEqual([], self.events)
+        self.connector.iter_objects.assert_called_once_with(
+            'db_objects', {'object_types': 'record:host'},
+            return_fields=mock.ANY, page_size=1000,
+            raise_on_error=True)
+
+    def test_initial_objects_are_delivered(self):
+        feed = self._feed(initial=True)
+        self.assertEqual(1, feed.poll())
+        self.assertTrue(self.events[0][0].initial)
+        self.assertEqual('host/1', self.events[0][0].ref)
+
+    def test_changes_are_delivered_in_batches_per_type(self):
+        feed = self._feed(batch_size=2)
+        fixed = []
+        feed.subscribe('fixedaddress', fixed.append)
+        feed.poll()
+        self.changes = [entry('h2', 'record:host', {'_ref': 'host/2'}, '6'),
+                        entry('f1', 'fixedaddress', None, '7'),
+                        entry('h1', 'record:host', None, '8')]
+        self.assertEqual(3, feed.poll())
+        self.connector.iter_objects.assert_called_with(
+            'db_objects', {'object_types': 'fixedaddress,record:host',
+                           'start_sequence_id': '5', 'all_events': True},
+            return_fields=mock.ANY, page_size=2,
+            raise_on_error=True)
+        self.assertEqual([['h2'], ['h1']],
+                         [[e.unique_id for e in batch]
+                          for batch in self.events])
+        self.assertTrue(self.events[1][0].deleted)
+        self.assertEqual([['f1']], [[e.unique_id for e in batch]
+                                    for batch in fixed])
+        self.assertEqual('8', feed.sequence_id)
+
+    def test_failed_callback_keeps_position(self):
+        feed = self._feed()
+        feed.poll()
+        self.changes = [entry('h2', 'record:host', {'_ref': 'host/2'}, '6')]
+        feed.subscribe('record:host', mock.Mock(side_effect=ValueError))
+        self.assertRaises(ValueError, feed.poll)
+        self.assertEqual('5', feed.sequence_id)
+
+    def _feed_of_replies(self, *replies, **kwargs):
+        self.connector = connector.Connector(
+            test_connector.TestInfobloxConnector._prepare_options())
+        self.connector.session = mock.Mock()
+        self.connector.session.get.side_effect = [
+            mock.Mock(status_code=code, content=jsonutils.dumps(content))
+            for code, content in replies]
+        return self._feed(**kwargs)
+
+    def test_rejected_position_is_resynced(self):
+        feed = self._feed_of_replies(
+            (200, {'result': self.snapshot}),
+            (400, {'Error': 'AdmConProtoError: Invalid sequence ID'}),
+            (200, {'result': [
+                entry('h2', 'record:host', {'_ref': 'host/2'}, '9')]}),
+            initial=True)
+        feed.poll()
+        self.assertEqual(1, feed.poll())
+        self.assertEqual('9', feed.sequence_id)
+        self.assertEqual('host/2', self.events[1][0].ref)
+        self.assertTrue(self.events[1][0].initial)
+        self.assertNotIn('start_sequence_id',
+                         self.connector.session.get.call_args[0][0])
+
+    def test_failed_query_keeps_position(self):
+        feed = self._feed_of_replies(
+            (200, {'result': self.snapshot}),
+            (503, {'Error': 'Service unavailable'}))
+        feed.poll()
+        self.assertRaises(exceptions.InfobloxSearchError, feed.poll)
+        self.assertEqual('5', feed.sequence_id)
+        self.assertEqual([], self.events)
+
+    def test_unsubscribe(self):
+        feed = self._feed()
+        feed.unsubscribe(objects.HostRecord, self.events.append)
+        self.assertEqual([], feed.object_types)
+        self.assertEqual(0, feed.poll())
+        self.assertFalse(self.connector.iter_objects.called)
+
+    def test_checkpoint(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'feed.json')
+        self._feed(checkpoint=path).poll()
+        self.changes = [entry('h2', 'record:host', {'_ref': 'host/2'}, '6')]
+        feed = self._feed(checkpoint=path)
+        self.assertEqual('5', feed.sequence_id)
+        self.assertEqual(1, feed.poll())
+        self.assertEqual('6', self._feed(checkpoint=path).sequence_id)
+
+    def test_interval_adapts_to_changes(self):
+        feed = self._feed(min_interval=1, max_interval=5)
+        self.assertEqual(2, feed._next_interval(0))
+        feed.interval = 4
+        self.assertEqual(5, feed._next_interval(0))
+        self.assertEqual(1, feed._next_interval(3))
+        self.assertRaises(ValueError, change_feed.ChangeFeed,
+                          self.connector, min_interval=2, max_interval=1)
+
+    def test_background_polling(self):
+        with self._feed(min_interval=0.01, max_interval=0.01) as feed:
+            for _ in range(100):
+                if feed.sequence_id is not None:
+                    break
+                feed._stop.wait(0.01)
+        self.assertEqual('5', feed.sequence_id)
+        self.assertIsNone(feed._thread)
@@ -51,6 +51,24 @@ class TestInfobloxConnector(unittest.TestCase):
         opts.max_retries = 3
         opts.max_results = None
         opts.paging = False
+        opts.cache_ttl = None
+        opts.cache_max_size = 1000
+        opts.proxy_strategy = 'fallback'
+        opts.read_rate_limit = None
+        opts.write_rate_limit = None
+        opts.max_reads_in_flight = None
+        opts.max_writes_in_flight = None
+        opts.retry_attempts = 0
+        opts.retry_backoff_base = 0.5
+        opts.retry_backoff_max = 30
+        opts.retry_jitter = True
+        opts.retry_status_codes = (503,)
+        opts.retry_methods = ('get', 'put', 'delete')
+        opts.metrics_hooks = None
+        opts.stream_pages = False
+        opts.json_codec = 'auto'
+        opts.cookie_store = None
+        opts.coalesce_gets = True
         return opts
 
     def test_create_object(self):
@@ -65,7 +83,7 @@ class TestInfobloxConnector(unittest.TestCase):
             self.connector.create_object(objtype, payload)
             patched_create.assert_called_once_with(
                 'https://infoblox.example.org/wapi/v1.1/network',
-                data=jsonutils.dumps(payload),
+                data=self.connector.codec.dumps(payload),
                 headers=self.connector.DEFAULT_HEADER,
                 timeout=self.default_opts.http_request_timeout,
                 verify=self.default_opts.ssl_verify,
@@ -85,7 +103,7 @@ class TestInfobloxConnector(unittest.TestCase):
             self.connector.create_object(objtype, payload)
             patched_create.assert_called_once_with(
                 'https://infoblox.example.org/wapi/v1.1/network',
-                data=jsonutils.dumps(payload),
+                data=self.connector.codec.dumps(payload),
                 headers=self.connector.DEFAULT_HEADER,
                 timeout=self.default_opts.http_request_timeout,
                 verify=self.default_opts.ssl_verify,
@@ -107,6 +125,22 @@ class TestInfobloxConnector(unittest.TestCase):
                               self.connector.create_object,
                               'network', {'network': '192.178.1.0/24'})
 
+    def test_create_object_raises_already_exists(self):
+        nios_error = (
+            '{ "Error": "AdmConDataError: None (IBDataConflictError: '
+            'IB.Data.Conflict:The network 192.178.1.0/24 already exists.  '
+            'Select another network.)",'
+            '"code": "Client.Ibap.Data.Conflict",'
+            '"text": "The network 192.178.1.0/24 already exists.  '
+            'Select another network."}')
+        with patch.object(requests.Session, 'post',
+                          return_value=mock.Mock()) as patched_create:
+            patched_create.return_value.status_code = 400
+            patched_create.return_value.content = nios_error
+            self.assertRaises(exceptions.InfobloxObjectAlreadyExists,
+                              self.connector.create_object,
+                              'network', {'network': '192.178.1.0/24'})
+
     def test_get_object(self):
         objtype = 'network'
         payload = {'ip': '0.0.0.0'}
@@ -247,7 +281,7 @@ class TestInfobloxConnector(unittest.TestCase):
             self.connector.update_object(ref, payload)
             patched_update.assert_called_once_with(
                 'https://infoblox.example.org/wapi/v1.1/network',
-                data=jsonutils.dumps(payload),
+                data=self.connector.codec.dumps(payload),
                 headers=self.connector.DEFAULT_HEADER,
                 timeout=self.default_opts.http_request_timeout,
                 verify=self.default_opts.ssl_verify,
@@ -377,6 +411,17 @@ class TestInfobloxConnector(unittest.TestCase):
         result = self.connector.get_object('network', paging=True)
         self.assertEqual(["data"], result)
 
+    def test_get_object_paging_false_overrides_option(self):
+        self.connector.paging = True
+        self.connector._get_object = mock.MagicMock(
+            return_value=[{'_ref': 'network/1'}])
+        result = self.connector.get_object('network', return_fields=[],
+                                           max_results=1, paging=False)
+        self.assertEqual([{'_ref': 'network/1'}], result)
+        self.connector._get_object.assert_called_once_with(
+            'network', 'https://infoblox.example.org/wapi/v1.1/network'
+                       '?_max_results=1', raise_on_error=False)
+
     def test__handle_get_object_with_pagination_with_no_record(self):
         query_params = {"_paging": 1,
                         "_return_as_object": 1,
@@ -437,6 +482,118 @@ class TestInfobloxConnector(unittest.TestCase):
                                                    None, False)
         self.assertEqual(["data"], result)
 
+    def _get_pages(self, obj_type, url, raise_on_error=False):
+        if '_page_id=2' in url:
+            return {'result': [3]}
+        if '_page_id=1' in url:
+            return {'result': [2], 'next_page_id': 2}
+        return {'result': [1], 'next_page_id': 1}
+
+    def test_iter_objects_fetches_pages_lazily(self):
+        self.connector._get_object = mock.MagicMock(
+            side_effect=self._get_pages)
+        items = self.connector.iter_objects('network', {'comment': 'test'},
+                                            page_size=1)
+        self.assertEqual(1, next(items))
+        self.assertEqual(1, self.connector._get_object.call_count)
+        self.assertEqual([2, 3], list(items))
+        self.assertEqual(3, self.connector._get_object.call_count)
+        first_url = self.connector._get_object.call_args_list[0][0][1]
+        self.assertIn('_paging=1', first_url)
+        self.assertIn('_max_results=1', first_url)
+        self.assertIn('_return_as_object=1', first_url)
+
+    def test_iter_objects_with_prefetch(self):
+        self.connector._get_object = mock.MagicMock(
+            side_effect=self._get_pages)
+        items = self.connector.iter_objects('network', prefetch=True)
+        self.assertEqual([1, 2, 3], list(items))
+        self.assertEqual(3, self.connector._get_object.call_count)
+
+    def test_iter_objects_prefetch_reraises_errors(self):
+        self.connector._get_object = mock.MagicMock(side_effect=[
+            {'result': [1], 'next_page_id': 1}, req_exc.Timeout()])
+        items = self.connector.iter_objects('network', prefetch=True)
+        self.assertEqual(1, next(items))
+        self.assertRaises(exceptions.InfobloxTimeoutError, next, items)
+
+    def test_iter_objects_cloud_does_proxied_search_on_miss(self):
+        self.connector.cloud_api_enabled = True
+        self.connector._get_object = mock.MagicMock(side_effect=[
+            {'result': []}, {'result': [1]}])
+        self.assertEqual([1],
+                         list(self.connector.iter_objects('network')))
+        second_url = self.connector._get_object.call_args_list[1][0][1]
+        self.assertIn('_proxy_search=GM', second_url)
+
+    def test_iter_objects_validates_obj_type(self):
+        self.assertRaises(ValueError, self.connector.iter_objects, '')
+
+    @staticmethod
+    def _streamed_reply(content, chunk_size=5):
+        reply = mock.Mock(status_code=200)
+        reply.iter_content.return_value = [
+            content[i:i + chunk_size]
+            for i in range(0, len(content), chunk_size)]
+        return reply
+
+    def test_get_object_with_streamed_pages(self):
+        self.connector.stream_pages = True
+        pages = [self._streamed_reply(b'{"result": [{"_ref": "network/1"}],'
+                                      b' "next_page_id": "page2"}'),
+                 self._streamed_reply(b'{"result": [{"_ref": "network/2"}]}')]
+        with patch.object(requests.Session, 'get',
+                          side_effect=pages) as patched_get:
+            result = self.connector.get_object('network', paging=True)
+        self.assertEqual([{'_ref': 'network/1'}, {'_ref': 'network/2'}],
+                         result)
+        self.assertTrue(patched_get.call_args[1]['stream'])
+        self.assertIn('_page_id=page2', patched_get.call_args[0][0])
+        pages[0].close.assert_called_once_with()
+
+    def test_iter_objects_with_streamed_pages(self):
+        self.connector.stream_pages = True
+        reply = self._streamed_reply(b'{"result": [1, 2, 3]}', chunk_size=1)
+        with patch.object(requests.Session, 'get', return_value=reply):
+            items = self.connector.iter_objects('network', prefetch=True)
+            self.assertEqual(1, next(items))
+            self.assertFalse(reply.close.called)
+            self.assertEqual([2, 3], list(items))
+        reply.close.assert_called_once_with()
+
+    def test_streamed_page_errors(self):
+        self.connector.stream_pages = True
+        reply = self._streamed_reply(b'{"result": [1, 2')
+        with patch.object(requests.Session, 'get', return_value=reply):
+            self.assertRaises(exceptions.InfobloxConnectionError,
+                              self.connector.get_object, 'network',
+                              paging=True)
+        reply.iter_content.side_effect = req_exc.ChunkedEncodingError()
+        with patch.object(requests.Session, 'get', return_value=reply):
+            self.assertRaises(exceptions.InfobloxConnectionError, list,
+                              self.connector.iter_objects('network'))
+        not_found = mock.Mock(status_code=404, content=b'not found')
+        with patch.object(requests.Session, 'get', return_value=not_found):
+            self.assertEqual([], list(self.connector.iter_objects('network')))
+            self.assertRaises(exceptions.InfobloxSearchError, list,
+                              self.connector.iter_objects(
+                                  'network', raise_on_error=True))
+        not_found.close.assert_called_with()
+
+    def test_iter_objects_raise_on_error(self):
+        first = mock.Mock(status_code=200,
+                          content='{"result": [1], "next_page_id": 1}')
+        failed = mock.Mock(status_code=503, content='{"Error": "busy"}')
+        with patch.object(requests.Session, 'get',
+                          side_effect=[first, failed]):
+            items = self.connector.iter_objects('network',
+                                                raise_on_error=True)
+            self.assertEqual(1, next(items))
+            with self.assertRaises(exceptions.InfobloxSearchError) as cm:
+                next(items)
+        self.assertEqual({'Error': 'busy'}, cm.exception.response)
+        self.assertIn('[code 503]', str(cm.exception))
+
     def test_call_func(self):
         objtype = 'network'
         payload = {'ip': '0.0.0.0'}
@@ -448,7 +605,7 @@ class TestInfobloxConnector(unittest.TestCase):
             self.connector.call_func(objtype, "_ref", payload)
             patched_call_func.assert_called_once_with(
                 'https://infoblox.example.org/wapi/v1.1/_ref?_function=network',  # noqa: E501
-                data=jsonutils.dumps(payload),
+                data=self.connector.codec.dumps(payload),
                 headers=self.connector.DEFAULT_HEADER,
                 timeout=self.default_opts.http_request_timeout,
                 verify=self.default_opts.ssl_verify,
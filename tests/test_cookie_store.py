@@ -0,0 +1,230 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import functools
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import unittest
+
+import mock
+import requests
+
+from infoblox_client import connector
+from infoblox_client import cookie_store
+from infoblox_client import exceptions
+
+COOKIE = {'name': 'ibapauth', 'value': 'ip=10.0.0.1,client=API',
+          'domain': 'infoblox.example.org', 'path': '/', 'secure': True,
+          'expires': None}
+
+
+def make_response(status_code, content=b'[{"_ref": "network/1"}]',
+                  cookie=None):
+    cookies = {'ibapauth': cookie} if cookie else {}
+    return mock.Mock(status_code=status_code, content=content,
+                     cookies=requests.cookies.cookiejar_from_dict(cookies))
+
+
+class TestFileCookieStore(unittest.TestCase):
+
+    def setUp(self):
+        super(TestFileCookieStore, self).setUp()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, 'cookies.json')
+        self.store = cookie_store.FileCookieStore(self.path)
+
+    def test_save_load_delete(self):
+        self.assertIsNone(self.store.load('admin@grid'))
+        self.store.save('admin@grid', [COOKIE])
+        self.store.save('user@grid', [])
+        self.assertEqual([COOKIE],
+                         cookie_store.FileCookieStore(self.path).load(
+                             'admin@grid'))
+        self.assertEqual(0o600, stat.S_IMODE(os.stat(self.path).st_mode))
+        self.store.delete('admin@grid')
+        self.assertIsNone(self.store.load('admin@grid'))
+        self.assertEqual([], self.store.load('user@grid'))
+
+    def test_discard(self):
+        fresh = dict(COOKIE, value='fresh')
+        self.store.save('admin@grid', [fresh])
+        self.assertEqual([fresh], self.store.discard('admin@grid', [COOKIE]))
+        self.assertEqual([fresh], self.store.load('admin@grid'))
+        self.assertIsNone(self.store.discard('admin@grid', [fresh]))
+        self.assertIsNone(self.store.load('admin@grid'))
+        self.assertIsNone(self.store.discard('admin@grid', [fresh]))
+
+    def test_malformed_file_is_ignored(self):
+        with open(self.path, 'w') as f:
+            f.write('{"admin@grid": [')
+        self.assertIsNone(self.store.load('admin@grid'))
+        self.store.save('admin@grid', [COOKIE])
+        self.assertEqual([COOKIE], self.store.load('admin@grid'))
+
+    def test_concurrent_saves(self):
+        def save(i):
+            for n in range(20):
+                self.store.save('user%d@grid' % i, [dict(COOKIE, value=n)])
+
+        threads = [threading.Thread(target=save, args=(i,))
+                   for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for i in range(5):
+            self.assertEqual(19, self.store.load('user%d@grid' % i)[0][
+                'value'])
+
+
+class TestConnectorCookieStore(unittest.TestCase):
+
+    def _connector(self, store):
+        return connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password',
+                                    'cookie_store': store})
+
+    def test_cookie_is_loaded_at_startup(self):
+        store = mock.Mock()
+        store.load.return_value = [COOKIE]
+        conn = self._connector(store)
+        store.load.assert_called_once_with('admin@infoblox.example.org')
+        self.assertIsNone(conn.session.auth)
+        self.assertEqual(COOKIE['value'],
+                         conn.session.cookies.get('ibapauth'))
+
+    def test_cookie_is_saved_after_login(self):
+        store = mock.Mock()
+        store.load.return_value = None
+        conn = self._connector(store)
+        self.assertEqual(('admin', 'password'), conn.session.auth)
+
+        def login(url, **kwargs):
+            conn.session.cookies.set('ibapauth', 'new')
+            return make_response(200, cookie='new')
+
+        with mock.patch.object(conn.session, 'get', side_effect=login):
+            conn.get_object('network')
+        key, cookies = store.save.call_args[0]
+        self.assertEqual('admin@infoblox.example.org', key)
+        self.assertEqual(['new'], [cookie['value'] for cookie in cookies])
+
+    def test_path_option(self):
+        conn = self._connector('~/cookies.json')
+        self.assertIsInstance(conn.cookie_store,
+                              cookie_store.FileCookieStore)
+
+    def test_store_errors_are_ignored(self):
+        store = mock.Mock()
+        store.load.side_effect = IOError()
+        conn = self._connector(store)
+        self.assertEqual(('admin', 'password'), conn.session.auth)
+
+
+class TestSessionRenewal(unittest.TestCase):
+
+    def setUp(self):
+        super(TestSessionRenewal, self).setUp()
+        self.store = mock.Mock()
+        self.store.load.return_value = [COOKIE]
+        self.store.discard.side_effect = functools.partial(
+            cookie_store.CookieStore.discard, self.store)
+        self.connector = connector.Connector(
+            {'host': 'infoblox.example.org', 'username': 'admin',
+             'password': 'password', 'cookie_store': self.store})
+
+    def test_expired_cookie_is_renewed_once(self):
+        conn = self.connector
+        logins = []
+        expired = threading.Barrier(4) if hasattr(threading,
+                                                  'Barrier') else None
+
+        def get(url, **kwargs):
+            if conn.session.auth is not None:
+                logins.append(url)
+                conn.session.cookies.set('ibapauth', 'renewed')
+                return make_response(200, cookie='renewed')
+            if conn.session.cookies.get('ibapauth') == 'renewed':
+                return make_response(200)
+            if expired is not None:
+                # all requests are sent with the expired cookie
+                expired.wait()
+            return make_response(401, b'')
+
+        def get_object(i):
+            # different searches, so requests are not coalesced
+            results.append(conn.get_object('network', {'comment': str(i)}))
+
+        results = []
+        with mock.patch.object(conn.session, 'get', side_effect=get):
+            threads = [threading.Thread(target=get_object, args=(i,))
+                       for i in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(1, len(logins))
+        self.assertEqual([[{'_ref': 'network/1'}]] * 4, results)
+        self.store.delete.assert_called_once_with(
+            'admin@infoblox.example.org')
+        self.assertEqual(['renewed'], [
+            cookie['value'] for cookie in self.store.save.call_args[0][1]])
+
+    def test_cookie_saved_by_other_process_is_used(self):
+        conn = self.connector
+        self.store.load.return_value = [dict(COOKIE, value='fresh')]
+        sent_cookies = []
+
+        def get(url, **kwargs):
+            sent_cookies.append(conn.session.cookies.get('ibapauth'))
+            if conn.session.cookies.get('ibapauth') == 'fresh':
+                return make_response(200)
+            return make_response(401, b'')
+
+        with mock.patch.object(conn.session, 'get', side_effect=get):
+            self.assertEqual([{'_ref': 'network/1'}],
+                             conn.get_object('network'))
+        self.assertEqual([COOKIE['value'], 'fresh'], sent_cookies)
+        self.assertEqual(0, conn.auth_state.logins)
+        self.assertFalse(self.store.delete.called)
+
+    def test_rejected_cookie_of_other_process_is_deleted(self):
+        conn = self.connector
+        self.store.load.return_value = [dict(COOKIE, value='fresh')]
+
+        def get(url, **kwargs):
+            if conn.session.auth is not None:
+                conn.session.cookies.set('ibapauth', 'renewed')
+                return make_response(200, cookie='renewed')
+            return make_response(401, b'')
+
+        with mock.patch.object(conn.session, 'get', side_effect=get) as g:
+            self.assertEqual([{'_ref': 'network/1'}],
+                             conn.get_object('network'))
+        self.assertEqual(3, g.call_count)
+        self.assertEqual(1, conn.auth_state.logins)
+        self.store.delete.assert_called_once_with(
+            'admin@infoblox.example.org')
+
+    def test_bad_credentials(self):
+        with mock.patch.object(self.connector.session, 'get',
+                               return_value=make_response(401, b'')) as get:
+            self.assertRaises(exceptions.InfobloxBadWAPICredential,
+                              self.connector.get_object, 'network')
+        self.assertEqual(2, get.call_count)
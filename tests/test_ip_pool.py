@@ -0,0 +1,204 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+import unittest
+
+import mock
+
+from infoblox_client import exceptions
+from infoblox_client import ip_pool
+from infoblox_client import object_manager as om
+from infoblox_client import objects
+from tests import fakes
+
+
+class TestIPPool(unittest.TestCase):
+
+    def setUp(self):
+        super(TestIPPool, self).setUp()
+        self.connector = mock.Mock()
+        self.connector.get_object.return_value = [{'_ref': 'range/1'}]
+        self.next_ip = 0
+        self.connector.call_func.side_effect = self._next_available_ip
+        self.timer = fakes.FakeTimer()
+        self.pools = ip_pool.IPPools(self.connector, block_size=3, ttl=10,
+                                     timer=self.timer)
+
+    def _next_available_ip(self, func_name, ref, payload):
+        ips = []
+        while len(ips) < payload['num']:
+            self.next_ip += 1
+            ip = '10.0.0.%d' % self.next_ip
+            if ip not in payload.get('exclude', ()):
+                ips.append(ip)
+        return {'ips': ips}
+
+    def _pool(self):
+        return self.pools.get_range_pool('default', '10.0.0.1', '10.0.0.99')
+
+    def test_allocates_by_blocks(self):
+        pool = self._pool()
+        self.assertEqual(['10.0.0.%d' % i for i in range(1, 5)],
+                         [pool.allocate() for _ in range(4)])
+        self.assertEqual(2, self.connector.call_func.call_count)
+        self.connector.call_func.assert_called_with(
+            'next_available_ip', 'range/1',
+            {'num': 3, 'exclude': ['10.0.0.1', '10.0.0.2', '10.0.0.3']})
+        self.assertEqual(1, self.connector.get_object.call_count)
+        self.assertIs(pool, self._pool())
+
+    def test_expired_ips_are_dropped(self):
+        pool = self._pool()
+        self.assertEqual('10.0.0.1', pool.allocate())
+        self.timer.now = 10
+        self.assertEqual('10.0.0.4', pool.allocate())
+        self.assertEqual(2, pool.expired)
+        self.connector.call_func.assert_called_with(
+            'next_available_ip', 'range/1', {'num': 3})
+
+    def test_release(self):
+        pool = self._pool()
+        ip = pool.allocate()
+        pool.release(ip)
+        self.assertEqual(3, len(pool))
+        self.assertEqual(ip, pool.allocate())
+        pool.release('10.0.0.99')
+        self.assertEqual(2, len(pool))
+
+    def test_close(self):
+        self._pool().allocate()
+        self.pools.get_network_pool('default', '10.0.0.0/24').allocate()
+        self.assertEqual(2, len(self.pools))
+        self.assertEqual(4, self.pools.close())
+        self.assertEqual(0, len(self.pools))
+
+    def test_concurrent_allocations_get_distinct_ips(self):
+        pool = self._pool()
+        ips = []
+
+        def allocate():
+            for _ in range(10):
+                ips.append(pool.allocate())
+
+        threads = [threading.Thread(target=allocate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(40, len(set(ips)))
+        self.assertEqual(14, pool.blocks)
+
+    def test_nearly_full_range(self):
+        free = ['10.0.0.97', '10.0.0.98', '10.0.0.99']
+
+        def next_available_ip(func_name, ref, payload):
+            ips = [ip for ip in free if ip not in payload.get('exclude', ())]
+            if len(ips) < payload['num']:
+                raise exceptions.InfobloxFuncException(
+                    response={}, ref=ref, func_name=func_name,
+                    content='Cannot find available IP addresses', code=400)
+            return {'ips': ips[:payload['num']]}
+
+        self.connector.call_func.side_effect = next_available_ip
+        pool = ip_pool.IPPool(objects.IPRange(self.connector,
+                                              network_view='default',
+                                              start_addr='10.0.0.1',
+                                              end_addr='10.0.0.99'),
+                              block_size=16, timer=self.timer)
+        self.assertEqual(free, [pool.allocate() for _ in range(3)])
+        self.assertEqual([16, 8, 4, 2, 2, 1],
+                         [call[0][2]['num'] for call in
+                          self.connector.call_func.call_args_list])
+        self.assertRaises(exceptions.InfobloxFuncException, pool.allocate)
+
+    def test_object_manager_uses_pools(self):
+        ibom = om.InfobloxObjectManager(self.connector, ip_pools=self.pools)
+        for mac in ('aa:bb:cc:dd:ee:01', 'aa:bb:cc:dd:ee:02'):
+            ibom.create_fixed_address_from_range(
+                'default', mac, '10.0.0.1', '10.0.0.99', None)
+        self.assertEqual(
+            ['10.0.0.1', '10.0.0.2'],
+            [call[0][1]['ipv4addr']
+             for call in self.connector.create_object.call_args_list])
+        self.assertEqual(1, self.connector.call_func.call_count)
+
+    @staticmethod
+    def _conflict(ip):
+        return exceptions.InfobloxCannotCreateObject(
+            response={'code': 'Client.Ibap.Data.Conflict',
+                      'text': 'The IP address %s is in use.' % ip},
+            obj_type='fixedaddress', content='', args={}, code=400)
+
+    def _created_ips(self):
+        return [str(call[0][1]['ipv4addr'])
+                for call in self.connector.create_object.call_args_list]
+
+    def test_taken_ip_is_discarded(self):
+        ibom = om.InfobloxObjectManager(self.connector, ip_pools=self.pools)
+        self.connector.create_object.side_effect = [
+            self._conflict('10.0.0.1'), mock.DEFAULT]
+        ibom.create_fixed_address_from_range(
+            'default', 'aa:bb:cc:dd:ee:01', '10.0.0.1', '10.0.0.99', None)
+        self.assertEqual(['10.0.0.1', '10.0.0.2'], self._created_ips())
+        pool = self._pool()
+        self.assertEqual(1, pool.discarded)
+        self.assertEqual(1, len(pool))
+
+    def test_fallback_to_next_available_ip_on_conflicts(self):
+        ibom = om.InfobloxObjectManager(self.connector, ip_pools=self.pools)
+        self.connector.create_object.side_effect = [
+            self._conflict('10.0.0.%d' % i) for i in range(1, 4)] + [
+            mock.DEFAULT]
+        ibom.create_fixed_address_from_cidr(
+            'default', 'aa:bb:cc:dd:ee:01', '10.0.0.0/24', None)
+        self.assertEqual(['10.0.0.1', '10.0.0.2', '10.0.0.3',
+                          'func:nextavailableip:10.0.0.0/24,default'],
+                         self._created_ips())
+
+    def test_ip_of_failed_create_is_released(self):
+        ibom = om.InfobloxObjectManager(self.connector, ip_pools=self.pools)
+        error = self._conflict('10.0.0.50')
+        self.connector.create_object.side_effect = error
+        self.assertRaises(exceptions.InfobloxCannotCreateObject,
+                          ibom.create_fixed_address_from_range,
+                          'default', 'aa:bb:cc:dd:ee:01', '10.0.0.1',
+                          '10.0.0.99', None)
+        self.assertEqual(3, len(self._pool()))
+        self.connector.create_object.side_effect = None
+        ibom.create_fixed_address_from_range(
+            'default', 'aa:bb:cc:dd:ee:01', '10.0.0.1', '10.0.0.99', None)
+        self.assertEqual(['10.0.0.1', '10.0.0.1'], self._created_ips())
+
+    def test_taken_ip_is_not_added_to_host_record(self):
+        ibom = om.InfobloxObjectManager(self.connector, ip_pools=self.pools)
+        host = objects.HostRecordV4(self.connector, name='host.test.com',
+                                    view='default')
+        host._ref = 'record:host/1'
+        self.connector.update_object.side_effect = [
+            exceptions.InfobloxCannotUpdateObject(
+                response={'code': 'Client.Ibap.Data.Conflict',
+                          'text': 'The IP address 10.0.0.1 is in use.'},
+                ref=host.ref, content='', code=400),
+            {'_ref': 'record:host/1'}]
+        ibom.add_ip_to_host_record_from_range(
+            host, 'default', 'aa:bb:cc:dd:ee:01', '10.0.0.1', '10.0.0.99')
+        payload = self.connector.update_object.call_args[0][1]
+        self.assertEqual(['10.0.0.2'], [str(ip['ipv4addr'])
+                                        for ip in payload['ipv4addrs+']])
+
+    def test_allocation_without_pools(self):
+        ip = objects.IPAllocation.next_available_ip_from_cidr(
+            'default', '10.0.0.0/24')
+        self.assertEqual('func:nextavailableip:10.0.0.0/24,default', str(ip))
@@ -0,0 +1,100 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import unittest
+
+import mock
+import six
+
+from infoblox_client import connector
+from infoblox_client import exceptions
+from infoblox_client import json_codec
+
+
+class TestJsonCodecs(unittest.TestCase):
+
+    payload = {'network': '10.0.0.0/24',
+               'comment': u'\u0441\u0435\u0442\u044c',
+               'extattrs': {'Tenant ID': {'value': 'tenant'}},
+               'members': [{'_struct': 'dhcpmember', 'name': 'member'}],
+               'disable': False,
+               'options': None}
+
+    def _check_codec(self, codec):
+        data = codec.dumps(self.payload)
+        self.assertEqual(self.payload, codec.loads(data))
+        if not isinstance(codec, json_codec.OsloCodec):
+            self.assertIsInstance(data, six.binary_type)
+            self.assertEqual(self.payload,
+                             codec.loads(data.decode('utf-8')))
+        self.assertRaises(ValueError, codec.loads, b'{"result": [')
+        # values not supported by JSON are converted to primitives
+        self.assertEqual({'ips': [1]}, codec.loads(codec.dumps({'ips': {1}})))
+
+    def test_json(self):
+        self._check_codec(json_codec.get_codec('json'))
+
+    def test_oslo(self):
+        self._check_codec(json_codec.get_codec('oslo'))
+
+    @unittest.skipUnless(json_codec.orjson, "orjson is not installed")
+    def test_orjson(self):
+        self._check_codec(json_codec.get_codec('orjson'))
+
+    def test_auto(self):
+        codec = json_codec.get_codec()
+        if json_codec.orjson:
+            self.assertIsInstance(codec, json_codec.OrjsonCodec)
+        else:
+            self.assertIsInstance(codec, json_codec.JsonCodec)
+        with mock.patch.object(json_codec, 'orjson', None):
+            self.assertEqual('json', json_codec.get_codec('auto').name)
+            self.assertRaises(exceptions.InfobloxConfigException,
+                              json_codec.get_codec, 'orjson')
+
+    def test_unknown_codec(self):
+        self.assertRaises(exceptions.InfobloxConfigException,
+                          json_codec.get_codec, 'xml')
+
+    def test_codec_instance(self):
+        codec = mock.Mock()
+        self.assertIs(codec, json_codec.get_codec(codec))
+
+    def test_register_codec(self):
+        class CustomCodec(json_codec.JsonCodec):
+            name = 'custom'
+
+        with mock.patch.object(json_codec, 'CODECS',
+                               list(json_codec.CODECS)):
+            json_codec.register_codec(CustomCodec)
+            self.assertIsInstance(json_codec.get_codec(), CustomCodec)
+            self.assertIsInstance(json_codec.get_codec('custom'),
+                                  CustomCodec)
+
+
+class TestConnectorCodec(unittest.TestCase):
+
+    def test_codec_option(self):
+        conn = connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password',
+                                    'json_codec': 'json'})
+        self.assertEqual({'data': b'{"name": "test"}'},
+                         {'data': conn._get_request_options(
+                             {'name': 'test'})['data']})
+        with mock.patch.object(conn.session, 'get') as get:
+            get.return_value = mock.Mock(status_code=200,
+                                         content=b'[{"_ref": "network/1"}]')
+            self.assertEqual([{'_ref': 'network/1'}],
+                             conn.get_object('network'))
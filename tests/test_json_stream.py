@@ -0,0 +1,75 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import json
+import unittest
+
+from infoblox_client import json_stream
+
+
+def chunked(data, size):
+    data = data.encode('utf-8')
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+class TestPagedReplyDecoder(unittest.TestCase):
+
+    def setUp(self):
+        super(TestPagedReplyDecoder, self).setUp()
+        self.reply = {
+            'result': [{'_ref': 'network/1', 'network': '10.0.0.0/24',
+                        'extattrs': {'Name': {'value': u'\u0441\u0435'}},
+                        'members': [], 'utilization': 1234},
+                       {'_ref': 'network/2', 'comment': 'a "quoted" [text]'}],
+            'next_page_id': '789c:page2'}
+
+    def test_decode_in_small_chunks(self):
+        data = json.dumps(self.reply, ensure_ascii=False)
+        for size in (1, 2, 7, 1024):
+            decoder = json_stream.PagedReplyDecoder(chunked(data, size))
+            self.assertEqual(self.reply['result'], list(decoder))
+            self.assertEqual('789c:page2', decoder.next_page_id)
+            self.assertEqual(len(data.encode('utf-8')), decoder.bytes_read)
+
+    def test_objects_yielded_before_reply_is_read(self):
+        chunks = iter(chunked(json.dumps(self.reply), 10))
+        decoder = iter(json_stream.PagedReplyDecoder(chunks))
+        self.assertEqual('network/1', next(decoder)['_ref'])
+        self.assertTrue(list(chunks))
+
+    def test_next_page_id_first_and_whitespace(self):
+        data = ('{ "next_page_id" : "p2" ,\n "result" : [ 1 , 23 ,'
+                ' {"a": [1, 2]} ] }')
+        decoder = json_stream.PagedReplyDecoder(chunked(data, 3))
+        self.assertEqual([1, 23, {'a': [1, 2]}], list(decoder))
+        self.assertEqual('p2', decoder.next_page_id)
+
+    def test_last_page(self):
+        decoder = json_stream.PagedReplyDecoder(chunked('{"result": []}', 4))
+        self.assertEqual([], list(decoder))
+        self.assertIsNone(decoder.next_page_id)
+        self.assertEqual([], list(json_stream.PagedReplyDecoder([b'{}'])))
+
+    def test_truncated_reply(self):
+        decoder = json_stream.PagedReplyDecoder(
+            chunked('{"result": [{"_ref": "network/1"}, {"_ref": "net', 5))
+        items = iter(decoder)
+        self.assertEqual({'_ref': 'network/1'}, next(items))
+        self.assertRaises(ValueError, next, items)
+
+    def test_not_an_object(self):
+        decoder = json_stream.PagedReplyDecoder([b'[{"_ref": "network/1"}]'])
+        self.assertRaises(ValueError, list, decoder)
+        self.assertRaises(ValueError, list,
+                          json_stream.PagedReplyDecoder([b'']))
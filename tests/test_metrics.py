@@ -0,0 +1,159 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import unittest
+
+import mock
+from requests import exceptions as req_exc
+
+from infoblox_client import connector
+from infoblox_client import exceptions
+from infoblox_client import metrics
+
+
+def make_metrics(method, obj_type, latency, status_code=200, error=None):
+    request = metrics.RequestMetrics(method, obj_type, 'url', bytes_sent=10,
+                                     timer=lambda: 0)
+    request.status_code = status_code
+    request.bytes_received = 100
+    request.latency = latency
+    request.error = error
+    return request
+
+
+class TestRequestMetrics(unittest.TestCase):
+
+    def test_measurements(self):
+        now = [1.0]
+        request = metrics.RequestMetrics('get', 'network', 'url',
+                                         timer=lambda: now[0])
+        request.reply_received(mock.Mock(status_code=200,
+                                         content=b'{"result": []}'))
+
+        def decode(reply):
+            now[0] += 0.5
+            return {'result': []}
+
+        self.assertEqual({'result': []}, request.decode(decode, None))
+        now[0] += 1
+        request.finish()
+        self.assertEqual(200, request.status_code)
+        self.assertEqual(14, request.bytes_received)
+        self.assertEqual(1, request.pages)
+        self.assertEqual(0.5, request.decode_time)
+        self.assertEqual(1.5, request.latency)
+
+
+class TestHistogramCollector(unittest.TestCase):
+
+    def test_collects_per_method_and_type(self):
+        collector = metrics.HistogramCollector(buckets=(0.1, 1))
+        collector.after_response(make_metrics('get', 'network', 0.05))
+        collector.after_response(make_metrics('get', 'network', 0.5))
+        collector.after_response(make_metrics('get', 'network', 5,
+                                              status_code=None,
+                                              error=ValueError()))
+        stats = collector.get_stats('get', 'network')
+        self.assertEqual(3, stats['count'])
+        self.assertEqual(1, stats['errors'])
+        self.assertEqual({200: 2}, stats['status_codes'])
+        self.assertEqual(30, stats['bytes_sent'])
+        self.assertEqual([1, 1, 1], stats['histogram'])
+        self.assertEqual(5, stats['latency_max'])
+        self.assertIsNone(collector.get_stats('post', 'network'))
+
+    def test_percentile(self):
+        collector = metrics.HistogramCollector(buckets=(0.1, 1))
+        for _ in range(9):
+            collector.after_response(make_metrics('get', 'network', 0.05))
+        collector.after_response(make_metrics('get', 'network', 0.5))
+        self.assertEqual(0.1, collector.percentile('get', 'network', 50))
+        self.assertEqual(1, collector.percentile('get', 'network', 99))
+        self.assertIsNone(collector.percentile('get', 'zone_auth', 50))
+
+    def test_summary_sorted_by_total_latency(self):
+        collector = metrics.HistogramCollector()
+        collector.after_response(make_metrics('get', 'network', 0.1))
+        collector.after_response(make_metrics('post', 'record:host', 0.3))
+        collector.after_response(make_metrics('get', 'network', 0.1))
+        summary = collector.summary()
+        self.assertEqual([('post', 'record:host'), ('get', 'network')],
+                         [(s['method'], s['obj_type']) for s in summary])
+        self.assertEqual(2, summary[1]['count'])
+        self.assertAlmostEqual(0.1, summary[1]['mean_latency'])
+        collector.reset()
+        self.assertEqual([], collector.summary())
+
+
+class TestConnectorMetricsHooks(unittest.TestCase):
+
+    def setUp(self):
+        super(TestConnectorMetricsHooks, self).setUp()
+        self.collector = metrics.HistogramCollector()
+        self.connector = connector.Connector(
+            {'host': 'infoblox.example.org', 'wapi_version': '1.1',
+             'username': 'admin', 'password': 'password',
+             'metrics_hooks': [self.collector]})
+
+    def test_paged_get(self):
+        pages = [mock.Mock(status_code=200,
+                           content='{"result": [{"_ref": "network/1"}], '
+                                   '"next_page_id": "2"}'),
+                 mock.Mock(status_code=200,
+                           content='{"result": [{"_ref": "network/2"}]}')]
+        with mock.patch.object(self.connector.session, 'get',
+                               side_effect=pages):
+            self.connector.get_object('network', paging=True)
+        stats = self.collector.get_stats('get', 'network')
+        self.assertEqual(2, stats['count'])
+        self.assertEqual(2, stats['pages'])
+        self.assertEqual(len(pages[0].content) + len(pages[1].content),
+                         stats['bytes_received'])
+
+    def test_write_request(self):
+        hook = mock.Mock()
+        self.connector.add_metrics_hook(hook)
+        with mock.patch.object(self.connector.session, 'put') as put:
+            put.return_value = mock.Mock(status_code=200,
+                                         content='"network/1"')
+            self.connector.update_object('network/1', {'comment': 'test'})
+        request = hook.after_response.call_args[0][0]
+        self.assertEqual(('put', 'network', 200, 0),
+                         (request.method, request.obj_type,
+                          request.status_code, request.pages))
+        self.assertEqual(len(self.connector.codec.dumps({'comment': 'test'})),
+                         request.bytes_sent)
+        self.assertIsNotNone(request.latency)
+
+    def test_error_is_reported(self):
+        with mock.patch.object(self.connector.session, 'delete') as delete:
+            delete.side_effect = req_exc.Timeout()
+            self.assertRaises(exceptions.InfobloxTimeoutError,
+                              self.connector.delete_object, 'network/1')
+        stats = self.collector.get_stats('delete', 'network')
+        self.assertEqual(1, stats['errors'])
+        self.assertEqual({}, stats['status_codes'])
+
+    def test_failing_hook_is_ignored(self):
+        hook = mock.Mock()
+        hook.before_request.side_effect = ValueError()
+        self.connector.add_metrics_hook(hook)
+        with mock.patch.object(self.connector.session, 'post') as post:
+            post.return_value = mock.Mock(status_code=201,
+                                          content='"network/1"')
+            self.assertEqual('network/1', self.connector.create_object(
+                'network', {'network': '10.0.0.0/24'}))
+        self.assertTrue(hook.after_response.called)
+        self.assertEqual(1, self.collector.get_stats('post',
+                                                     'network')['count'])
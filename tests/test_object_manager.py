@@ -80,7 +80,8 @@ class ObjectManagerTestCase(unittest.TestCase):
         create_matcher = PayloadMatcher({'name': net_view_name,
                                          'extattrs': self.EXT_ATTRS})
         connector.get_object.assert_called_once_with(
-            'networkview', get_matcher, return_fields=mock.ANY)
+            'networkview', get_matcher, return_fields=[], max_results=1,
+            paging=False)
         connector.create_object.assert_called_once_with(
             'networkview', create_matcher, mock.ANY)
 
@@ -202,7 +203,8 @@ class ObjectManagerTestCase(unittest.TestCase):
 
         matcher = PayloadMatcher({'name': net_view_name})
         connector.get_object.assert_called_once_with(
-            'networkview', matcher, return_fields=mock.ANY)
+            'networkview', matcher, return_fields=[], max_results=1,
+            paging=False)
         assert not connector.create_object.called
 
     def test_get_member_gets_member_object(self):
@@ -241,7 +243,8 @@ class ObjectManagerTestCase(unittest.TestCase):
         connector.update_object.assert_called_once_with(ref, {'options': opts},
                                                         mock.ANY)
 
-    def _update_network_updates_eas(self, origina_ea, new_ea, merged_ea):
+    def _update_network_updates_eas(self, origina_ea, new_ea, merged_ea,
+                                    ea_field='extattrs'):
         ref = 'infoblox_object_id'
         opts = 'infoblox_options'
         connector = mock.Mock()
@@ -255,7 +258,7 @@ class ObjectManagerTestCase(unittest.TestCase):
         connector.update_object.assert_called_once_with(
             ref,
             {'options': opts,
-             'extattrs': merged_ea},
+             ea_field: merged_ea},
             mock.ANY)
 
     def test_update_network_merges_eas(self):
@@ -269,8 +272,57 @@ class ObjectManagerTestCase(unittest.TestCase):
     def test_update_network_updates_eas(self):
         original_ea = None
         new_ea = objects.EA({'Subnet ID': 'two'})
-        merged_ea = new_ea.to_dict()
-        self._update_network_updates_eas(original_ea, new_ea, merged_ea)
+        self._update_network_updates_eas(original_ea, new_ea,
+                                         new_ea.to_dict(), 'extattrs+')
+
+    def test_update_network_sends_only_new_eas(self):
+        ref = 'network/ZG5zLm5ldHdvcmskMTAuMC4wLjAvMjQvMA:10.0.0.0%2F24/x'
+        connector = mock.Mock()
+        ib_network = objects.NetworkV4.from_dict(
+            connector, {'_ref': ref, 'network': '10.0.0.0/24',
+                        'extattrs': {'User EA': {'value': 'user value'},
+                                     'Subnet ID': {'value': 'one'}}})
+        ibom = om.InfobloxObjectManager(connector)
+        ibom.update_network_options(ib_network,
+                                    objects.EA({'Subnet ID': 'two'}))
+
+        connector.update_object.assert_called_once_with(
+            ref, {'extattrs+': {'Subnet ID': {'value': 'two'}}}, mock.ANY)
+        self.assertEqual({'User EA': 'user value', 'Subnet ID': 'two'},
+                         ib_network.extattrs.ea_dict)
+
+    def _host_record(self, connector, ips):
+        return objects.HostRecordV4.from_dict(
+            connector, {'_ref': 'record:host/ZG5zLmhvc3Qk:host.example.com',
+                        'name': 'host.example.com',
+                        'ipv4addrs': [{'ipv4addr': ip} for ip in ips]})
+
+    def test_add_ip_to_record_sends_only_new_ip(self):
+        connector = mock.Mock()
+        host_record = self._host_record(connector, ['10.0.0.1'])
+        ibom = om.InfobloxObjectManager(connector)
+        ibom.add_ip_to_record(host_record, '10.0.0.2',
+                              'aa:bb:cc:dd:ee:ff')
+
+        connector.update_object.assert_called_once_with(
+            host_record.ref,
+            {'ipv4addrs+': [{'ipv4addr': '10.0.0.2',
+                             'mac': 'aa:bb:cc:dd:ee:ff',
+                             'configure_for_dhcp': True}]},
+            mock.ANY)
+        self.assertEqual(['10.0.0.1', '10.0.0.2'],
+                         [ip.ip for ip in host_record.ip])
+
+    def test_delete_ip_from_host_record_sends_only_removed_ip(self):
+        connector = mock.Mock()
+        host_record = self._host_record(connector, ['10.0.0.1', '10.0.0.2'])
+        ibom = om.InfobloxObjectManager(connector)
+        ibom.delete_ip_from_host_record(host_record, '10.0.0.1')
+
+        connector.update_object.assert_called_once_with(
+            host_record.ref, {'ipv4addrs-': [{'ipv4addr': '10.0.0.1'}]},
+            mock.ANY)
+        self.assertEqual(['10.0.0.2'], [ip.ip for ip in host_record.ip])
 
     def test_create_ip_range_creates_range_object(self):
         net_view = 'net-view-name'
@@ -451,8 +503,10 @@ class ObjectManagerTestCase(unittest.TestCase):
         exp_for_a = {'ipv4addr': ip, 'view': dns_view_name}
         exp_for_ptr = {'ptrdname': name, 'view': dns_view_name,
                        'ipv4addr': ip}
-        calls = [mock.call('record:a', exp_for_a, return_fields=mock.ANY),
-                 mock.call('record:ptr', exp_for_ptr, return_fields=mock.ANY)]
+        calls = [mock.call('record:a', exp_for_a, return_fields=[],
+                           max_results=1, paging=False),
+                 mock.call('record:ptr', exp_for_ptr, return_fields=[],
+                           max_results=1, paging=False)]
         connector.get_object.assert_has_calls(calls)
 
         exp_for_a['name'] = name
@@ -498,7 +552,7 @@ class ObjectManagerTestCase(unittest.TestCase):
         matcher = PayloadMatcher({'name': dns_view_name,
                                   'network_view': net_view_name})
         connector.get_object.assert_called_once_with(
-            'view', matcher, return_fields=mock.ANY)
+            'view', matcher, return_fields=[], max_results=1, paging=False)
         connector.create_object.assert_called_once_with(
             'view', matcher, mock.ANY)
 
@@ -521,10 +575,21 @@ class ObjectManagerTestCase(unittest.TestCase):
 
         matcher = PayloadMatcher({'network_view': net_view_name})
         connector.get_object.assert_called_once_with(
-            'network', matcher, return_fields=mock.ANY, max_results=None,
-            force_proxy=mock.ANY, extattrs=None)
+            'network', matcher, return_fields=[], max_results=1,
+            force_proxy=mock.ANY, extattrs=None, paging=False)
         self.assertEqual(False, result)
 
+    def test_has_dns_zones(self):
+        connector = mock.Mock()
+        connector.get_object.return_value = [{'_ref': 'zone_auth/1'}]
+        ibom = om.InfobloxObjectManager(connector)
+
+        self.assertTrue(ibom.has_dns_zones('some-view'))
+        matcher = PayloadMatcher({'view': 'some-view'})
+        connector.get_object.assert_called_once_with(
+            'zone_auth', matcher, return_fields=[], max_results=1,
+            force_proxy=mock.ANY, extattrs=None, paging=False)
+
     def test_create_fixed_address_for_given_ip(self):
         network_view = 'test_network_view'
         ip = '192.168.0.1'
@@ -546,6 +611,75 @@ class ObjectManagerTestCase(unittest.TestCase):
                                                         exp_payload,
                                                         mock.ANY)
 
+    def test_create_fixed_addresses_for_given_ips(self):
+        network_view = 'test_network_view'
+        connector = mock.Mock()
+        connector.http_pool_maxsize = 4
+        connector.create_object.side_effect = [
+            {'_ref': 'fixedaddress/1', 'ipv4addr': '192.168.0.1'},
+            exceptions.InfobloxCannotCreateObject(
+                response='', obj_type='fixedaddress', content='',
+                code=400)]
+
+        ibom = om.InfobloxObjectManager(connector)
+        results = ibom.create_fixed_addresses_for_given_ips(
+            ({'network_view': network_view, 'mac': 'aa:bb:cc:dd:ee:ff',
+              'ip': '192.168.0.%s' % i, 'extattrs': None}
+             for i in (1, 2)),
+            max_workers=1)
+
+        self.assertEqual(2, len(results))
+        self.assertTrue(results[0].ok)
+        self.assertEqual('fixedaddress/1', results[0].result.ref)
+        self.assertFalse(results[1].ok)
+        self.assertIsInstance(results[1].error,
+                              exceptions.InfobloxCannotCreateObject)
+        self.assertEqual('192.168.0.2', results[1].spec['ip'])
+
+    def test_create_host_records_from_range(self):
+        connector = mock.Mock()
+        connector.http_pool_maxsize = 1
+        connector.get_object.return_value = [{'_ref': 'range/1'}]
+        connector.call_func.return_value = {
+            'ips': ['192.168.0.2', '192.168.0.3']}
+        connector.create_object.side_effect = lambda obj_type, payload, _: (
+            dict(payload, _ref='record:host/' + payload['name']))
+
+        ibom = om.InfobloxObjectManager(connector)
+        results = ibom.create_host_records_from_range(
+            'default', 'net-view', 'example.com', '192.168.0.2',
+            '192.168.0.20',
+            ({'hostname': 'host%d' % i, 'mac': 'aa:bb:cc:dd:ee:0%d' % i,
+              'extattrs': None} for i in (1, 2)))
+
+        connector.get_object.assert_called_once_with(
+            'range', {'network_view': 'net-view',
+                      'start_addr': '192.168.0.2',
+                      'end_addr': '192.168.0.20'},
+            return_fields=[], max_results=1, paging=False)
+        connector.call_func.assert_called_once_with(
+            'next_available_ip', 'range/1', {'num': 2})
+        self.assertEqual(['192.168.0.2', '192.168.0.3'],
+                         [result.spec['ip'] for result in results])
+        self.assertEqual(
+            [[{'ipv4addr': '192.168.0.2', 'mac': 'aa:bb:cc:dd:ee:01',
+               'configure_for_dhcp': True}],
+             [{'ipv4addr': '192.168.0.3', 'mac': 'aa:bb:cc:dd:ee:02',
+               'configure_for_dhcp': True}]],
+            [call[0][1]['ipv4addrs']
+             for call in connector.create_object.call_args_list])
+
+    def test_create_fixed_addresses_from_cidr_without_ips(self):
+        connector = mock.Mock()
+        connector.get_object.return_value = [{'_ref': 'network/1'}]
+        connector.call_func.return_value = {'ips': ['192.168.0.2']}
+        ibom = om.InfobloxObjectManager(connector)
+        self.assertRaises(exceptions.InfobloxCannotAllocateIp,
+                          ibom.create_fixed_addresses_from_cidr,
+                          'net-view', '192.168.0.0/24',
+                          [{'mac': 'aa:bb:cc:dd:ee:ff', 'extattrs': None}] * 2)
+        self.assertFalse(connector.create_object.called)
+
     def test_create_fixed_address_from_range(self):
         network_view = 'test_network_view'
         first_ip = '192.168.0.2'
@@ -701,7 +835,9 @@ class ObjectManagerTestCase(unittest.TestCase):
         matcher = PayloadMatcher({'view': dns_view_name,
                                   'fqdn': fqdn})
         connector.get_object.assert_called_once_with('zone_auth', matcher,
-                                                     return_fields=mock.ANY)
+                                                     return_fields=[],
+                                                     max_results=1,
+                                                     paging=False)
 
         payload = {'view': dns_view_name,
                    'fqdn': fqdn,
@@ -734,7 +870,9 @@ class ObjectManagerTestCase(unittest.TestCase):
         matcher = PayloadMatcher({'view': dns_view_name,
                                   'fqdn': fqdn})
         connector.get_object.assert_called_once_with('zone_auth', matcher,
-                                                     return_fields=mock.ANY)
+                                                     return_fields=[],
+                                                     max_results=1,
+                                                     paging=False)
 
         matcher = PayloadMatcher({'view': dns_view_name,
                                   'fqdn': fqdn,
@@ -771,11 +909,9 @@ class ObjectManagerTestCase(unittest.TestCase):
             {'fqdn': 'host.global.com', 'view': 'dns-view-name'},
             return_fields=return_fields,
             extattrs=None, force_proxy=False, max_results=None)
+        # only changed field is sent
         connector.update_object.assert_called_once_with(
-            zone_ref,
-            {'extattrs': new_attrs,'ns_group': 'test_group',
-             'view': 'dns-view-name', 'zone_format': 'FORWARD'},
-            return_fields)
+            zone_ref, {'extattrs': new_attrs}, return_fields)
 
     def _mock_for_get_connector(self, reply_map):
         def get_object(ref, *args, **kwargs):
@@ -16,7 +16,10 @@
 import unittest
 import copy
 import mock
+from six.moves.urllib import parse
 
+from infoblox_client import connector
+from infoblox_client import exceptions
 from infoblox_client import objects
 REC = 'ZG5zLmJpbmRfbXgkLjQuY29tLm15X3pvbmUuZGVtby5teC5kZW1vLm15X3pvbmUuY29tLjE'
 
@@ -80,6 +83,77 @@ class TestObjects(unittest.TestCase):
             extattrs=None, force_proxy=False, return_fields=mock.ANY,
             max_results=None)
 
+    def test_iter_search(self):
+        connector = self._mock_connector()
+        connector.iter_objects.return_value = iter([
+            {'_ref': 'network/1', 'network': '10.0.0.0/24'},
+            {'_ref': 'network/2', 'network': '10.0.1.0/24'}])
+
+        networks = objects.Network.iter_search(connector,
+                                               network_view='some-view',
+                                               page_size=10,
+                                               prefetch=True)
+        network = next(networks)
+        self.assertIsInstance(network, objects.NetworkV4)
+        self.assertEqual('network/1', network.ref)
+        self.assertEqual(['network/2'], [n.ref for n in networks])
+        connector.iter_objects.assert_called_once_with(
+            'network', {'network_view': 'some-view'},
+            extattrs=None, force_proxy=False, return_fields=mock.ANY,
+            page_size=10, prefetch=True)
+
+    def test_exists(self):
+        connector = self._mock_connector(get_object=[{'_ref': 'network/1'}])
+        self.assertTrue(objects.Network.exists(connector,
+                                               network_view='some-view'))
+        connector.get_object.assert_called_once_with(
+            'network', {'network_view': 'some-view', '_return_fields': ''},
+            extattrs=None, force_proxy=False, return_fields=[],
+            max_results=1, paging=False)
+        connector.get_object.return_value = None
+        self.assertFalse(objects.Network.exists(connector,
+                                                network_view='some-view'))
+
+    def test_count(self):
+        connector = self._mock_connector()
+        connector.iter_objects.return_value = iter([{'_ref': 'network/1'},
+                                                    {'_ref': 'network/2'}])
+        self.assertEqual(2, objects.Network.count(connector,
+                                                  network_view='some-view',
+                                                  page_size=500))
+        connector.iter_objects.assert_called_once_with(
+            'network', {'network_view': 'some-view', '_return_fields': ''},
+            extattrs=None, force_proxy=False, return_fields=[],
+            page_size=500)
+
+    def test_exists_and_count_request_references_only(self):
+        conn = connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password',
+                                    'wapi_version': '1.1'})
+        replies = [mock.Mock(status_code=200,
+                             content='[{"_ref": "network/1"}]'),
+                   mock.Mock(status_code=200,
+                             content='{"result": [{"_ref": "network/1"}]}')]
+        with mock.patch.object(conn.session, 'get',
+                               side_effect=replies) as get:
+            self.assertTrue(objects.Network.exists(
+                conn, network_view='some-view'))
+            self.assertEqual(1, objects.Network.count(
+                conn, network_view='some-view', page_size=500))
+        urls = [call[0][0] for call in get.call_args_list]
+        self.assertEqual(
+            {'_return_fields': [''], '_max_results': ['1'],
+             'network_view': ['some-view']},
+            parse.parse_qs(parse.urlsplit(urls[0]).query,
+                           keep_blank_values=True))
+        self.assertEqual(
+            {'_return_fields': [''], '_max_results': ['500'],
+             '_paging': ['1'], '_return_as_object': ['1'],
+             'network_view': ['some-view']},
+            parse.parse_qs(parse.urlsplit(urls[1]).query,
+                           keep_blank_values=True))
+
     def test_search_network_v6(self):
         connector = self._mock_connector()
 
@@ -223,7 +297,7 @@ class TestObjects(unittest.TestCase):
         connector.get_object.assert_called_once_with(
             'record:host',
             {'view': 'some-dns-view', 'ipv4addr': '22.0.0.2'},
-            return_fields=mock.ANY)
+            return_fields=[], max_results=1, paging=False)
         # Validate create_object call
         ip_dict = {'ipv4addr': '22.0.0.2', 'mac': 'fa:16:3e:29:87:70'}
         connector.create_object.assert_called_once_with(
@@ -296,7 +370,7 @@ class TestObjects(unittest.TestCase):
             'fixedaddress',
             {'network_view': 'some-view', 'ipv4addr': '192.168.1.15',
              'mac': 'aa:ac:cd:11:22:33'},
-            return_fields=mock.ANY)
+            return_fields=[], max_results=1, paging=False)
         self.assertIsInstance(fixed_addr, objects.FixedAddressV4)
         connector.create_object.assert_called_once_with(
             'fixedaddress',
@@ -306,6 +380,56 @@ class TestObjects(unittest.TestCase):
              'ms_server': {'_struct': 'msdhcpserver',
                            'ipv4addr': '192.168.1.0'}}, mock.ANY)
 
+    def _already_exists(self):
+        return exceptions.InfobloxObjectAlreadyExists(
+            response={'text': 'The record already exists.'},
+            obj_type='network', content='', args={}, code=400)
+
+    def test_optimistic_create_skips_search(self):
+        reply = {'_ref': 'network/abc', 'network': '10.0.0.0/24',
+                 'network_view': 'default'}
+        connector = self._mock_connector(create_object=reply)
+        net, created = objects.Network.create_check_exists(
+            connector, network_view='default', cidr='10.0.0.0/24',
+            optimistic=True)
+        self.assertTrue(created)
+        self.assertEqual('network/abc', net.ref)
+        self.assertFalse(connector.get_object.called)
+        connector.create_object.assert_called_once_with(
+            'network', {'network_view': 'default',
+                        'network': '10.0.0.0/24'}, mock.ANY)
+
+    def test_optimistic_create_finds_existing_object(self):
+        connector = self._mock_connector(get_object=[{'_ref': 'network/abc'}])
+        connector.create_object.side_effect = self._already_exists()
+        net, created = objects.Network.create_check_exists(
+            connector, network_view='default', cidr='10.0.0.0/24',
+            optimistic=True)
+        self.assertFalse(created)
+        self.assertEqual('network/abc', net.ref)
+        self.assertEqual(1, connector.create_object.call_count)
+        self.assertFalse(connector.update_object.called)
+
+    def test_optimistic_create_updates_existing_object(self):
+        connector = self._mock_connector(get_object=[{'_ref': 'network/abc'}])
+        connector.create_object.side_effect = self._already_exists()
+        connector.update_object.return_value = 'network/abc'
+        net, created = objects.Network.create_check_exists(
+            connector, network_view='default', cidr='10.0.0.0/24',
+            comment='new', optimistic=True, update_if_exists=True)
+        self.assertFalse(created)
+        connector.update_object.assert_called_once_with(
+            'network/abc', {'network': '10.0.0.0/24', 'comment': 'new'},
+            mock.ANY)
+
+    def test_optimistic_create_reraises_if_object_not_found(self):
+        connector = self._mock_connector(get_object=[])
+        connector.create_object.side_effect = self._already_exists()
+        self.assertRaises(exceptions.InfobloxObjectAlreadyExists,
+                          objects.Network.create, connector,
+                          network_view='default', cidr='10.0.0.0/24',
+                          optimistic=True)
+
     def test_create_fixed_address_v6(self):
         mock_fixed_address = {
             '_ref': 'ipv6fixedaddress/ZG5zLmhvc3QkLl9kZWZhdWx0LmNvbS5nbG9iYA',
@@ -329,7 +453,7 @@ class TestObjects(unittest.TestCase):
             'ipv6fixedaddress',
             {'duid': mock.ANY, 'ipv6addr': 'fffe:1234:1234::1',
              'network_view': 'some-view' },
-            return_fields=mock.ANY)
+            return_fields=[], max_results=1, paging=False)
         connector.create_object.assert_called_once_with(
             'ipv6fixedaddress',
             {'duid': mock.ANY, 'ipv6addr': 'fffe:1234:1234::1',
@@ -466,6 +590,165 @@ class TestObjects(unittest.TestCase):
         self.assertEqual('192.168.1.0/24', net.network)
         self.assertEqual(None, net.network_view)
 
+    def _host_record(self, connector):
+        return objects.HostRecordV4.from_dict(connector, {
+            '_ref': 'record:host/abc',
+            'name': 'host.example.com',
+            'view': 'default',
+            'comment': 'old',
+            'ipv4addrs': [{'ipv4addr': '10.0.0.1'}],
+            'extattrs': {'Tenant': {'value': 'one'}}})
+
+    def test_next_available_ips(self):
+        connector = self._mock_connector()
+        connector.call_func.return_value = {'ips': ['10.0.0.1', '10.0.0.2']}
+        net = objects.Network(connector, _ref='network/abc',
+                              cidr='10.0.0.0/24')
+        self.assertEqual(['10.0.0.1', '10.0.0.2'],
+                         objects.IPAllocation.next_available_ips(
+                             net, 2, exclude=['10.0.0.3']))
+        connector.call_func.assert_called_once_with(
+            'next_available_ip', 'network/abc',
+            {'num': 2, 'exclude': ['10.0.0.3']})
+        self.assertFalse(connector.get_object.called)
+
+    def test_next_available_ips_parent_not_found(self):
+        connector = self._mock_connector(get_object=[])
+        net = objects.Network(connector, cidr='10.0.0.0/24')
+        self.assertRaises(exceptions.InfobloxCannotAllocateIp,
+                          objects.IPAllocation.next_available_ips, net, 2)
+        self.assertFalse(connector.call_func.called)
+
+    def test_next_available_networks(self):
+        connector = self._mock_connector(
+            get_object=[{'_ref': 'networkcontainer/abc'}])
+        connector.call_func.return_value = {
+            'networks': ['10.0.1.0/24', '10.0.2.0/24']}
+        container = objects.NetworkContainer(
+            connector, network_view='default', cidr='10.0.0.0/16')
+        self.assertEqual(['10.0.1.0/24', '10.0.2.0/24'],
+                         objects.IPAllocation.next_available_networks(
+                             container, 24, 2))
+        connector.call_func.assert_called_once_with(
+            'next_available_network', 'networkcontainer/abc',
+            {'cidr': 24, 'num': 2})
+        self.assertRaises(exceptions.InfobloxCannotAllocateNetwork,
+                          objects.IPAllocation.next_available_networks,
+                          container, 24, 3)
+
+    def test_update_sends_changed_fields_only(self):
+        connector = self._mock_connector()
+        connector.update_object.return_value = 'record:host/abc'
+        host = self._host_record(connector)
+        self.assertEqual(set(), host.changed_fields)
+        host.comment = 'new'
+        self.assertEqual({'comment'}, host.changed_fields)
+        host.update()
+        connector.update_object.assert_called_once_with(
+            'record:host/abc', {'comment': 'new'}, mock.ANY)
+        self.assertEqual(set(), host.changed_fields)
+
+    def test_update_detects_changes_in_place(self):
+        connector = self._mock_connector()
+        host = self._host_record(connector)
+        host.ip.append(objects.IP.create(ip='10.0.0.2'))
+        host.extattrs.set('Tenant', 'two')
+        self.assertEqual({'ipv4addrs', 'extattrs'}, host.changed_fields)
+        self.assertEqual(
+            {'ipv4addrs': [{'ipv4addr': '10.0.0.1'},
+                           {'ipv4addr': '10.0.0.2'}],
+             'extattrs': {'Tenant': {'value': 'two'}}},
+            host.get_update_fields())
+
+    def test_update_without_changes_is_not_sent(self):
+        connector = self._mock_connector()
+        host = self._host_record(connector)
+        self.assertIs(host, host.update())
+        self.assertFalse(connector.update_object.called)
+
+    def test_full_update(self):
+        connector = self._mock_connector()
+        host = self._host_record(connector)
+        host.update(full=True)
+        connector.update_object.assert_called_once_with(
+            'record:host/abc',
+            {'comment': 'old', 'ipv4addrs': [{'ipv4addr': '10.0.0.1'}],
+             'extattrs': {'Tenant': {'value': 'one'}},
+             'name': 'host.example.com', 'view': 'default'},
+            mock.ANY)
+
+    def test_local_object_sends_all_fields(self):
+        connector = self._mock_connector()
+        net = objects.Network(connector, network_view='default',
+                              cidr='10.0.0.0/24', comment='test')
+        net._ref = 'network/abc'
+        self.assertIsNone(net.changed_fields)
+        net.update()
+        connector.update_object.assert_called_once_with(
+            'network/abc', {'comment': 'test', 'network': '10.0.0.0/24'},
+            mock.ANY)
+
+    def test_update_sends_list_and_ea_modifications(self):
+        connector = self._mock_connector()
+        connector.update_object.return_value = 'record:host/abc'
+        host = self._host_record(connector)
+        host.add_to_field('ip', [objects.IP.create(ip='10.0.0.2')])
+        host.remove_from_field('ipv4addrs', [objects.IPv4(ip='10.0.0.1')])
+        host.set_extattrs({'Site': 'east'})
+        host.unset_extattrs(['Tenant'])
+        self.assertEqual(['10.0.0.2'], [ip.ip for ip in host.ip])
+        self.assertEqual({'Site': 'east'}, host.extattrs.ea_dict)
+        host.update()
+        connector.update_object.assert_called_once_with(
+            'record:host/abc',
+            {'ipv4addrs+': [{'ipv4addr': '10.0.0.2'}],
+             'ipv4addrs-': [{'ipv4addr': '10.0.0.1'}],
+             'extattrs+': {'Site': {'value': 'east'}},
+             'extattrs-': {'Tenant': {}}},
+            mock.ANY)
+        self.assertEqual({}, host.get_update_fields())
+
+    def test_opposite_modifications_cancel(self):
+        connector = self._mock_connector()
+        host = self._host_record(connector)
+        host.unset_extattrs(['Site'])
+        host.set_extattrs({'Site': 'east'})
+        host.add_to_field('ip', [objects.IP.create(ip='10.0.0.2')])
+        host.remove_from_field('ip', [objects.IP.create(ip='10.0.0.2')])
+        self.assertEqual(
+            {'ipv4addrs-': [{'ipv4addr': '10.0.0.2'}],
+             'extattrs+': {'Site': {'value': 'east'}}},
+            host.get_update_fields())
+
+    def test_assigned_field_is_sent_whole(self):
+        connector = self._mock_connector()
+        host = self._host_record(connector)
+        host.set_extattrs({'Site': 'east'})
+        host.extattrs = objects.EA({'Site': 'west'})
+        self.assertEqual({'extattrs': {'Site': {'value': 'west'}}},
+                         host.get_update_fields())
+
+    def test_modifications_of_unknown_field(self):
+        connector = self._mock_connector()
+        net = objects.Network(connector, cidr='10.0.0.0/24')
+        net.set_extattrs(objects.EA({'Site': 'east'}))
+        self.assertIsNone(net.extattrs)
+        self.assertEqual({'network': '10.0.0.0/24',
+                          'extattrs+': {'Site': {'value': 'east'}}},
+                         net.get_update_fields())
+        self.assertRaises(ValueError, net.add_to_field, 'ipv4addrs', [])
+
+    def test_fetch_marks_received_fields_unchanged(self):
+        connector = self._mock_connector(get_object=[
+            {'_ref': 'network/abc', 'network': '10.0.0.0/24',
+             'network_view': 'default', 'comment': 'saved'}])
+        net = objects.Network(connector, network_view='default',
+                              cidr='10.0.0.0/24', options=[])
+        net.fetch()
+        self.assertEqual({'options'}, set(
+            field for field in net.changed_fields
+            if getattr(net, field) is not None))
+
     def test_update_fields_on_create(self):
         a_record = [{'_ref': 'record:a/Awsdrefsasdwqoijvoriibtrni',
                      'ip': '192.168.1.52',
@@ -479,7 +762,7 @@ class TestObjects(unittest.TestCase):
         connector.get_object.assert_called_once_with(
             'record:a',
             {'view': 'view', 'ipv4addr': '192.168.1.52'},
-            return_fields=[])
+            return_fields=[], max_results=1, paging=False)
         connector.update_object.assert_called_once_with(
             a_record[0]['_ref'],
             {'name': 'some-new_name', 'ipv4addr': '192.168.1.52'},
@@ -498,7 +781,7 @@ class TestObjects(unittest.TestCase):
         connector.get_object.assert_called_once_with(
             'record:aaaa',
             {'view': 'view', 'ipv6addr': '2001:610:240:22::c100:68b'},
-            return_fields=[])
+            return_fields=[], max_results=1, paging=False)
         connector.update_object.assert_called_once_with(
             aaaa_record[0]['_ref'],
             {'name': 'some-new_name'},
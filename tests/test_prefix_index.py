@@ -0,0 +1,204 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+import unittest
+
+import mock
+
+from infoblox_client import change_feed
+from infoblox_client import exceptions
+from infoblox_client import objects
+from infoblox_client import prefix_index
+
+
+def net(ref, cidr, network_view='default'):
+    return {'_ref': ref, 'network': cidr, 'network_view': network_view}
+
+
+def ip_range(ref, start, end, network_view='default'):
+    return {'_ref': ref, 'start_addr': start, 'end_addr': end,
+            'network_view': network_view}
+
+
+class TestPrefixIndex(unittest.TestCase):
+
+    def setUp(self):
+        super(TestPrefixIndex, self).setUp()
+        self.objects = {
+            'network': [net('network/1', '10.0.0.0/24'),
+                        net('network/2', '10.0.0.0/28'),
+                        net('network/3', '10.0.0.0/24', 'other')],
+            'ipv6network': [net('ipv6network/1', 'fd00::/64')],
+            'networkcontainer': [net('networkcontainer/1', '10.0.0.0/8'),
+                                 net('networkcontainer/2', '10.0.0.0/16')],
+            'ipv6networkcontainer': [],
+            'range': [ip_range('range/1', '10.0.0.20', '10.0.0.30'),
+                      ip_range('range/2', '10.0.0.100', '10.0.0.200')],
+            'ipv6range': [],
+        }
+        self.connector = mock.Mock()
+        self.connector.iter_objects.side_effect = self._iter_objects
+        self.index = prefix_index.PrefixIndex(self.connector)
+
+    def _iter_objects(self, obj_type, payload, **kwargs):
+        self.assertEqual('db_objects', obj_type)
+        for object_type in payload['object_types'].split(','):
+            for data in self.objects[object_type]:
+                yield {'object_type': object_type,
+                       'unique_id': 'id-' + data['_ref'],
+                       'object': data, 'last_sequence_id': '1'}
+
+    def test_build(self):
+        self.assertEqual(8, self.index.build(page_size=500))
+        self.assertEqual(8, len(self.index))
+        self.connector.iter_objects.assert_called_once_with(
+            'db_objects',
+            {'object_types': 'ipv6network,ipv6networkcontainer,ipv6range,'
+                             'network,networkcontainer,range'},
+            return_fields=mock.ANY, page_size=500, raise_on_error=True)
+
+    def test_failed_build_keeps_index(self):
+        self.index.build()
+        self.connector.iter_objects.side_effect = (
+            exceptions.InfobloxSearchError(response=None,
+                                           obj_type='db_objects',
+                                           content='', code=503))
+        self.assertRaises(exceptions.InfobloxSearchError, self.index.build)
+        self.assertEqual(8, len(self.index))
+
+    def test_build_by_network_view(self):
+        self.assertEqual(1, self.index.build(network_view='other'))
+        self.assertEqual(
+            'network/3',
+            self.index.find_network('10.0.0.5', network_view='other').ref)
+
+    def test_build_then_apply_events(self):
+        self.index.build()
+        self.index.apply_events([
+            change_feed.ChangeEvent('network', 'id-network/2', None, '2'),
+            change_feed.ChangeEvent(
+                'range', 'id-range/1',
+                ip_range('range/1', '10.0.0.40', '10.0.0.50'), '2')])
+        self.assertEqual('network/1',
+                         self.index.find_network('10.0.0.5').ref)
+        self.assertIsNone(self.index.find_range('10.0.0.20'))
+        self.assertEqual('range/1', self.index.find_range('10.0.0.45').ref)
+        self.assertEqual(7, len(self.index))
+
+    def test_find_network_longest_match(self):
+        self.index.build()
+        self.assertEqual('network/2',
+                         self.index.find_network('10.0.0.5').ref)
+        self.assertEqual('network/1',
+                         self.index.find_network('10.0.0.200').ref)
+        self.assertIsNone(self.index.find_network('10.0.1.1'))
+        self.assertIsInstance(self.index.find_network('10.0.0.5'),
+                              objects.NetworkV4)
+
+    def test_find_network_by_network_view_and_version(self):
+        self.index.build()
+        self.assertEqual(
+            'network/3',
+            self.index.find_network('10.0.0.5', network_view='other').ref)
+        self.assertIsNone(
+            self.index.find_network('10.0.0.5', network_view='missing'))
+        self.assertEqual('ipv6network/1',
+                         self.index.find_network('fd00::1').ref)
+        self.assertIsNone(self.index.find_network('fd01::1'))
+
+    def test_find_network_container_and_containing(self):
+        self.index.build()
+        self.assertEqual(
+            'networkcontainer/2',
+            self.index.find_network_container('10.0.0.5').ref)
+        self.assertEqual(
+            'networkcontainer/1',
+            self.index.find_network_container('10.1.0.5').ref)
+        self.assertEqual(
+            ['network/2', 'network/1', 'networkcontainer/2',
+             'networkcontainer/1'],
+            [ib_obj.ref for ib_obj
+             in self.index.find_containing('10.0.0.5')])
+
+    def test_find_range(self):
+        self.index.build()
+        self.assertEqual('range/1', self.index.find_range('10.0.0.20').ref)
+        self.assertEqual('range/1', self.index.find_range('10.0.0.30').ref)
+        self.assertEqual('range/2', self.index.find_range('10.0.0.150').ref)
+        self.assertIsNone(self.index.find_range('10.0.0.31'))
+        self.assertIsNone(self.index.find_range('10.0.0.1'))
+
+    def test_find_waits_for_changes(self):
+        self.index.build()
+        found = []
+        with self.index._lock:
+            # lookup must not see tables in the middle of a change
+            thread = threading.Thread(target=lambda: found.extend([
+                self.index.find_range('10.0.0.25'),
+                self.index.find_network('10.0.0.5'),
+                self.index.find_containing('10.0.0.5')]))
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+        thread.join()
+        self.assertEqual('range/1', found[0].ref)
+        self.assertEqual('network/2', found[1].ref)
+        self.assertEqual(4, len(found[2]))
+
+    def test_build_replaces_index(self):
+        self.index.build()
+        self.objects['network'] = [net('network/1', '10.0.0.0/24')]
+        self.index.build()
+        self.assertEqual('network/1',
+                         self.index.find_network('10.0.0.5').ref)
+
+    def test_apply_events(self):
+        self.index.apply_events([
+            change_feed.ChangeEvent('network', 'n1',
+                                    net('network/1', '10.0.0.0/24'), '1'),
+            change_feed.ChangeEvent('network', 'n2',
+                                    net('network/2', '10.0.0.0/28'), '1'),
+            change_feed.ChangeEvent('record:host', 'h1',
+                                    {'_ref': 'record:host/1'}, '1')])
+        self.assertEqual(2, len(self.index))
+        self.assertEqual('network/2',
+                         self.index.find_network('10.0.0.5').ref)
+
+        self.index.apply_events([
+            change_feed.ChangeEvent('network', 'n2', None, '2')])
+        self.assertEqual(1, len(self.index))
+        self.assertEqual('network/1',
+                         self.index.find_network('10.0.0.5').ref)
+
+    def test_object_replaced_under_other_key(self):
+        self.index.build()
+        # the same network reported by change feed under unique_id
+        self.index.apply_events([
+            change_feed.ChangeEvent('network', 'n2',
+                                    net('network/2', '10.0.0.0/28'), '1')])
+        self.assertEqual(8, len(self.index))
+        self.index.apply_events([
+            change_feed.ChangeEvent('network', 'n2', None, '2')])
+        self.assertEqual('network/1',
+                         self.index.find_network('10.0.0.5').ref)
+
+    def test_subscribe(self):
+        feed = mock.Mock()
+        self.index.subscribe(feed)
+        feed.subscribe.assert_has_calls(
+            [mock.call(obj_type, self.index.apply_events)
+             for obj_type in ('ipv6network', 'ipv6networkcontainer',
+                              'ipv6range', 'network', 'networkcontainer',
+                              'range')])
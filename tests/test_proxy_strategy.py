@@ -0,0 +1,112 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import unittest
+
+import mock
+
+from infoblox_client import connector
+from infoblox_client import exceptions
+
+
+class TestProxySearchStrategy(unittest.TestCase):
+
+    def _connector(self, strategy, replies):
+        conn = connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password',
+                                    'wapi_version': '2.5',
+                                    'proxy_strategy': strategy})
+        self.urls = []
+
+        def get_object(obj_type, url, raise_on_error=False):
+            self.urls.append(url)
+            proxied = '_proxy_search=GM' in url
+            return replies.get(proxied)
+
+        conn._get_object = mock.Mock(side_effect=get_object)
+        return conn
+
+    def _proxied(self):
+        return ['_proxy_search=GM' in url for url in self.urls]
+
+    def test_fallback_is_default(self):
+        conn = self._connector('fallback', {True: [{'_ref': 'network/1'}]})
+        self.assertEqual([{'_ref': 'network/1'}],
+                         conn.get_object('network'))
+        self.assertEqual([False, True], self._proxied())
+        self.assertEqual(1, conn.proxy_search.counters['second_requests'])
+
+    def test_gm(self):
+        conn = self._connector('gm', {})
+        self.assertIsNone(conn.get_object('network'))
+        self.assertIsNone(conn.get_object('network'))
+        self.assertEqual([True, True], self._proxied())
+        self.assertEqual(
+            2, conn.proxy_search.counters['second_requests_saved'])
+
+    def test_local(self):
+        conn = self._connector('local', {True: [{'_ref': 'network/1'}]})
+        self.assertIsNone(conn.get_object('network'))
+        self.assertEqual([False], self._proxied())
+        # force_proxy still goes to GM
+        self.assertEqual([{'_ref': 'network/1'}],
+                         conn.get_object('network', force_proxy=True))
+
+    def test_adaptive_learns_per_object_type(self):
+        conn = self._connector('adaptive', {True: [{'_ref': 'network/1'}]})
+        conn.get_object('network')
+        conn.get_object('network')
+        conn.get_object('network/ZG5z:10.0.0.0/8/default')
+        conn.get_object('range')
+        self.assertEqual([False, True, True, True, False, True],
+                         self._proxied())
+        self.assertEqual(2, conn.proxy_search.counters['second_requests'])
+
+    def test_adaptive_goes_back_to_local_search(self):
+        conn = self._connector('adaptive', {True: [{'_ref': 'network/1'}]})
+        conn.get_object('network')
+        self.assertTrue(conn.proxy_search.use_gm('network'))
+        conn.proxy_search.first_search_done('network', False, True)
+        self.assertFalse(conn.proxy_search.use_gm('network'))
+
+    def test_probe_without_result_on_gm(self):
+        conn = self._connector('probe', {})
+        conn.get_object('network')
+        conn.get_object('range')
+        conn.get_object('network')
+        self.assertEqual([False, True, False, False], self._proxied())
+        self.assertEqual(
+            2, conn.proxy_search.counters['second_requests_saved'])
+
+    def test_probe_with_result_on_gm(self):
+        conn = self._connector('probe', {True: [{'_ref': 'network/1'}]})
+        conn.get_object('network')
+        conn.get_object('range')
+        self.assertEqual([False, True, True], self._proxied())
+
+    def test_iter_objects_uses_strategy(self):
+        conn = self._connector('gm', {True: {'result': []}})
+        self.assertEqual([], list(conn.iter_objects('network')))
+        self.assertEqual([True], self._proxied())
+
+    def test_non_cloud_wapi_is_not_proxied(self):
+        conn = self._connector('gm', {})
+        conn.cloud_api_enabled = False
+        conn.get_object('network')
+        self.assertEqual([False], self._proxied())
+
+    def test_unknown_strategy(self):
+        self.assertRaises(exceptions.InfobloxConfigException,
+                          self._connector, 'sometimes', {})
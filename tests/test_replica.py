@@ -0,0 +1,237 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import os
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+try:
+    from oslo_serialization import jsonutils
+except ImportError:  # pragma: no cover
+    import json as jsonutils
+
+from infoblox_client import connector
+from infoblox_client import exceptions
+from infoblox_client import objects
+from infoblox_client import replica
+from tests import fakes
+from tests import test_connector
+
+
+def network(i, comment=None):
+    return {'_ref': 'network/%d' % i, 'network': '10.0.%d.0/24' % i,
+            'network_view': 'default', 'comment': comment}
+
+
+def entry(unique_id, obj, sequence_id, obj_type='network'):
+    return {'unique_id': unique_id, 'object_type': obj_type,
+            'object': obj, 'last_sequence_id': sequence_id}
+
+
+class TestReplica(unittest.TestCase):
+
+    def setUp(self):
+        super(TestReplica, self).setUp()
+        self.connector = mock.Mock()
+        self.snapshot = [entry('n1', network(1), '5'),
+                         entry('n2', network(2), '5'),
+                         entry('h1', {'_ref': 'record:host/1'}, '5',
+                               obj_type='record:host')]
+        self.changes = []
+        self.connector.iter_objects.side_effect = self._iter_objects
+        self.timer = fakes.FakeTimer()
+
+    def _iter_objects(self, obj_type, payload, return_fields=None,
+                      page_size=None, raise_on_error=False):
+        self.assertTrue(raise_on_error)
+        self.assertEqual('db_objects', obj_type)
+        if 'start_sequence_id' in payload:
+            return iter(self.changes)
+        return iter(self.snapshot)
+
+    def _replica(self, **kwargs):
+        return replica.Replica(self.connector, [objects.Network],
+                               timer=self.timer, **kwargs)
+
+    def test_snapshot(self):
+        rep = self._replica()
+        self.assertTrue(rep.sync())
+        self.assertEqual(2, len(rep))
+        self.assertEqual('5', rep.sequence_id)
+        self.connector.iter_objects.assert_called_once_with(
+            'db_objects', {'object_types': 'ipv6network,network'},
+            return_fields=mock.ANY, page_size=None, raise_on_error=True)
+
+    def test_changes_are_applied(self):
+        rep = self._replica()
+        rep.sync()
+        self.changes = [entry('n1', network(1, comment='new'), '6'),
+                        entry('n2', None, '7'),
+                        entry('n3', network(3), '8')]
+        self.assertTrue(rep.sync())
+        self.connector.iter_objects.assert_called_with(
+            'db_objects', {'object_types': 'ipv6network,network',
+                           'start_sequence_id': '5', 'all_events': True},
+            return_fields=mock.ANY, page_size=None, raise_on_error=True)
+        self.assertEqual('8', rep.sequence_id)
+        self.assertEqual(['network/1', 'network/3'],
+                         sorted(net.ref for net in rep.search_all(
+                             objects.Network)))
+        self.assertEqual('new', rep.search(objects.Network,
+                                           cidr='10.0.1.0/24').comment)
+        self.changes = []
+        self.assertFalse(rep.sync())
+        self.assertEqual('8', rep.sequence_id)
+
+    def test_search(self):
+        rep = self._replica()
+        net = rep.search(objects.Network, network_view='default',
+                         cidr='10.0.2.0/24')
+        self.assertIsInstance(net, objects.NetworkV4)
+        self.assertEqual('network/2', net.ref)
+        self.assertIsNone(rep.search(objects.Network, cidr='10.0.9.0/24'))
+        self.assertRaises(ValueError, rep.search, objects.HostRecord)
+
+    def test_host_records_of_both_versions(self):
+        self.snapshot.append(entry(
+            'h2', {'_ref': 'record:host/2',
+                   'ipv6addrs': [{'ipv6addr': 'fd00::1'}]},
+            '5', obj_type='record:host'))
+        rep = replica.Replica(self.connector, [objects.HostRecord],
+                              timer=self.timer)
+        self.assertEqual(['record:host'], rep.object_types)
+        hosts = rep.search_all(objects.HostRecord)
+        self.assertEqual([objects.HostRecordV4, objects.HostRecordV6],
+                         [type(host) for host in hosts])
+
+    def test_search_host_record_by_ip_and_extattrs(self):
+        self.snapshot.append(entry(
+            'h2', {'_ref': 'record:host/2', 'view': 'default',
+                   'ipv4addrs': [{'ipv4addr': '10.0.0.1',
+                                  'mac': 'aa:bb:cc:dd:ee:ff'},
+                                 {'ipv4addr': '10.0.0.2'}],
+                   'extattrs': {'Site': {'value': 'HQ'}}},
+            '5', obj_type='record:host'))
+        rep = replica.Replica(self.connector, [objects.HostRecord],
+                              timer=self.timer)
+        host = rep.search(objects.HostRecord, view='default',
+                          ip='10.0.0.2', network_view=None)
+        self.assertEqual('record:host/2', host.ref)
+        self.assertEqual('record:host/2', rep.search(
+            objects.HostRecord, mac='aa:bb:cc:dd:ee:ff').ref)
+        self.assertEqual('record:host/2', rep.search(
+            objects.HostRecord,
+            search_extattrs=objects.EA({'Site': 'HQ'})).ref)
+        self.assertIsNone(rep.search(objects.HostRecord, ip='10.0.0.3'))
+        self.assertIsNone(rep.search(objects.HostRecord, ip='10.0.0.1',
+                                     search_extattrs={'Site': {
+                                         'value': 'Branch'}}))
+        self.assertRaises(ValueError, rep.search, objects.HostRecord,
+                          ip='10.0.0.1', max_results=1)
+
+    def test_stale_replica_is_synced_before_lookup(self):
+        rep = self._replica(max_staleness=10)
+        rep.search_all(objects.Network)
+        self.assertEqual(1, self.connector.iter_objects.call_count)
+        self.timer.now = 10
+        rep.search_all(objects.Network)
+        self.assertEqual(1, self.connector.iter_objects.call_count)
+        self.timer.now = 11
+        rep.search_all(objects.Network)
+        self.assertEqual(2, self.connector.iter_objects.call_count)
+        rep.search_all(objects.Network, max_staleness=0)
+        self.assertEqual(2, self.connector.iter_objects.call_count)
+        self.timer.now = 12
+        rep.search_all(objects.Network, max_staleness=0)
+        self.assertEqual(3, self.connector.iter_objects.call_count)
+
+    def _replica_of_replies(self, *replies):
+        self.connector = connector.Connector(
+            test_connector.TestInfobloxConnector._prepare_options())
+        self.connector.session = mock.Mock()
+        self.connector.session.get.side_effect = [
+            mock.Mock(status_code=code, content=jsonutils.dumps(content))
+            for code, content in replies]
+        return self._replica()
+
+    def test_snapshot_when_sequence_id_is_rejected(self):
+        rep = self._replica_of_replies(
+            (200, {'result': self.snapshot}),
+            (400, {'Error': 'AdmConProtoError: Invalid sequence ID'}),
+            (200, {'result': [entry('n3', network(3), '9')]}))
+        rep.sync()
+        self.timer.now = 5
+        self.assertTrue(rep.sync())
+        self.assertEqual(2, rep.snapshots)
+        self.assertEqual('9', rep.sequence_id)
+        self.assertEqual(['network/3'],
+                         [n.ref for n in rep.search_all(objects.Network)])
+        self.assertEqual(5, rep.synced_at)
+
+    def test_failed_snapshot_keeps_replica(self):
+        rep = self._replica_of_replies(
+            (200, {'result': self.snapshot}),
+            (400, {'Error': 'AdmConProtoError: Invalid sequence ID'}),
+            (503, {'Error': 'Service unavailable'}))
+        rep.sync()
+        self.timer.now = 5
+        self.assertRaises(exceptions.InfobloxSearchError, rep.sync)
+        self.assertEqual(1, rep.snapshots)
+        self.assertEqual('5', rep.sequence_id)
+        self.assertEqual(2, len(rep))
+        self.assertEqual(0, rep.synced_at)
+
+    def test_failed_first_snapshot_is_not_installed(self):
+        rep = self._replica_of_replies((500, {'Error': 'Internal error'}))
+        self.assertRaises(exceptions.InfobloxSearchError, rep.sync)
+        self.assertIsNone(rep.sequence_id)
+        self.assertIsNone(rep.synced_at)
+        self.assertEqual(0, rep.snapshots)
+
+    def test_checkpoint(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'replica.json')
+        self._replica(checkpoint=path).sync()
+
+        self.connector.iter_objects.reset_mock()
+        self.changes = [entry('n2', None, '6')]
+        rep = self._replica(checkpoint=path)
+        self.assertEqual('5', rep.sequence_id)
+        self.assertEqual(2, len(rep))
+        rep.sync()
+        self.assertEqual(0, rep.snapshots)
+        self.assertEqual(1, len(rep))
+        self.assertEqual('6', self._replica(checkpoint=path).sequence_id)
+
+    def test_checkpoint_of_other_types_is_ignored(self):
+        checkpoint = mock.Mock()
+        checkpoint.load.return_value = {'sequence_id': '5',
+                                        'object_types': ['range'],
+                                        'objects': {}}
+        rep = self._replica(checkpoint=checkpoint)
+        self.assertIsNone(rep.sequence_id)
+
+    def test_background_sync(self):
+        with self._replica(poll_interval=0.01) as rep:
+            for _ in range(100):
+                if rep.synced_at is not None:
+                    break
+                self.timer.now += 1
+                rep._stop.wait(0.01)
+        self.assertEqual(2, len(rep))
+        self.assertIsNone(rep._thread)
@@ -0,0 +1,122 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import unittest
+
+import mock
+from requests import exceptions as req_exc
+
+from infoblox_client import connector
+from infoblox_client import exceptions
+from infoblox_client import retry
+
+
+class TestRetryPolicy(unittest.TestCase):
+
+    def test_disabled_by_default(self):
+        policy = retry.RetryPolicy()
+        self.assertFalse(policy.should_retry('get', 0, status_code=503))
+        self.assertEqual(0, policy.stats['exhausted'])
+
+    def test_backoff_without_jitter(self):
+        policy = retry.RetryPolicy(attempts=10, backoff_base=0.5,
+                                   backoff_max=3, jitter=False)
+        self.assertEqual([0.5, 1, 2, 3, 3],
+                         [policy.get_delay(n) for n in range(5)])
+
+    def test_full_jitter(self):
+        policy = retry.RetryPolicy(attempts=3, backoff_base=1, backoff_max=4)
+        for attempt in range(5):
+            delay = policy.get_delay(attempt)
+            self.assertTrue(0 <= delay <= min(4, 2 ** attempt))
+
+    def test_retryable_methods_and_codes(self):
+        policy = retry.RetryPolicy(attempts=2)
+        self.assertTrue(policy.is_retryable('GET', status_code=503))
+        self.assertTrue(policy.is_retryable('put', error=req_exc.Timeout()))
+        self.assertFalse(policy.is_retryable('get', status_code=400))
+        # POST is not idempotent
+        self.assertFalse(policy.is_retryable('post', status_code=503))
+        policy = retry.RetryPolicy(attempts=2, methods=('post',))
+        self.assertTrue(policy.is_retryable('post', status_code=503))
+
+    def test_exhausted(self):
+        policy = retry.RetryPolicy(attempts=2)
+        self.assertTrue(policy.should_retry('get', 0, status_code=503))
+        self.assertTrue(policy.should_retry('get', 1, status_code=503))
+        self.assertFalse(policy.should_retry('get', 2, status_code=503))
+        self.assertEqual(2, policy.stats['retries'])
+        self.assertEqual(1, policy.stats['exhausted'])
+
+    def test_record_attempt(self):
+        policy = retry.RetryPolicy(attempts=1, history_size=2)
+        policy.record_attempt('get', 0, 0.1, 503)
+        policy.record_attempt('get', 1, 0.2, 200)
+        policy.record_attempt('put', 0, 0.3, 'Timeout')
+        self.assertEqual({'requests': 2, 'attempts': 3, 'retries': 0,
+                          'exhausted': 0}, policy.stats)
+        self.assertEqual([('get', 1, 0.2, 200), ('put', 0, 0.3, 'Timeout')],
+                         list(policy.latencies))
+
+
+@mock.patch('infoblox_client.connector.time.sleep')
+class TestConnectorRetry(unittest.TestCase):
+
+    def setUp(self):
+        super(TestConnectorRetry, self).setUp()
+        self.connector = connector.Connector({'host': 'infoblox.example.org',
+                                              'username': 'admin',
+                                              'password': 'password',
+                                              'retry_attempts': 2,
+                                              'retry_jitter': False})
+
+    @staticmethod
+    def _response(status_code, content):
+        return mock.Mock(status_code=status_code, content=content)
+
+    def test_get_retried_on_503(self, sleep):
+        with mock.patch.object(self.connector.session, 'get') as get:
+            get.side_effect = [self._response(503, 'Unavailable'),
+                               self._response(200, '[{"_ref": "network/1"}]')]
+            self.assertEqual([{'_ref': 'network/1'}],
+                             self.connector.get_object('network'))
+        self.assertEqual(2, get.call_count)
+        sleep.assert_called_once_with(0.5)
+        self.assertEqual(1, self.connector.retry_policy.stats['retries'])
+
+    def test_delete_retried_on_timeout(self, sleep):
+        with mock.patch.object(self.connector.session, 'delete') as delete:
+            delete.side_effect = [req_exc.Timeout(), req_exc.Timeout(),
+                                  self._response(200, '"network/1"')]
+            self.connector.delete_object('network/1')
+        self.assertEqual([mock.call(0.5), mock.call(1)],
+                         sleep.call_args_list)
+
+    def test_retries_exhausted(self, sleep):
+        with mock.patch.object(self.connector.session, 'put') as put:
+            put.side_effect = req_exc.Timeout()
+            self.assertRaises(exceptions.InfobloxTimeoutError,
+                              self.connector.update_object,
+                              'network/1', {'comment': 'test'})
+        self.assertEqual(3, put.call_count)
+        self.assertEqual(1, self.connector.retry_policy.stats['exhausted'])
+
+    def test_create_not_retried(self, sleep):
+        with mock.patch.object(self.connector.session, 'post') as post:
+            post.return_value = self._response(503, 'Unavailable')
+            self.assertRaises(exceptions.InfobloxCannotCreateObject,
+                              self.connector.create_object,
+                              'network', {'network': '10.0.0.0/24'})
+        self.assertEqual(1, post.call_count)
+        self.assertFalse(sleep.called)
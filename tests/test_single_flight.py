@@ -0,0 +1,166 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+import unittest
+
+import mock
+from six.moves import queue
+
+from infoblox_client import connector
+from infoblox_client import single_flight
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        super(TestSingleFlight, self).setUp()
+        self.flight = single_flight.SingleFlight()
+        self.key = self.flight.make_key('network', 'https://gm/network')
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.calls = []
+
+    def _func(self, result=None, error=None):
+        def func():
+            self.calls.append(1)
+            self.started.set()
+            self.release.wait()
+            if error is not None:
+                raise error
+            return result
+        return func
+
+    def _call_concurrently(self, func, count=3, key=None):
+        """Runs leader and then count - 1 followers, returns their results"""
+        results = queue.Queue()
+
+        def call():
+            try:
+                results.put(self.flight.do(key or self.key, func))
+            except Exception as e:
+                results.put(e)
+
+        threads = [threading.Thread(target=call) for _ in range(count)]
+        threads[0].start()
+        self.started.wait()
+        for thread in threads[1:]:
+            thread.start()
+        while self.flight.coalesced < count - 1:
+            threading.Event().wait(0.001)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        return [results.get() for _ in range(count)]
+
+    def test_concurrent_calls_share_result(self):
+        results = self._call_concurrently(self._func([{'_ref': 'a'}]))
+        self.assertEqual([[{'_ref': 'a'}]] * 3, results)
+        self.assertEqual(1, len(self.calls))
+        self.assertEqual(2, self.flight.coalesced)
+        # each caller gets a copy
+        self.assertEqual(3, len(set(id(result) for result in results)))
+        self.assertEqual(0, len(self.flight))
+
+    def test_error_is_shared(self):
+        error = ValueError('failed')
+        results = self._call_concurrently(self._func(error=error))
+        self.assertEqual([error] * 3, results)
+        self.assertEqual(1, len(self.calls))
+
+    def test_sequential_calls_are_not_coalesced(self):
+        self.release.set()
+        result = {'result': []}
+        self.assertIs(result, self.flight.do(self.key, self._func(result)))
+        self.flight.do(self.key, self._func(result))
+        self.assertEqual(2, len(self.calls))
+        self.assertEqual(0, self.flight.coalesced)
+
+    def test_forget(self):
+        self.release.set()
+        self.flight._join(self.key)
+        other = self.flight.make_key('record:host', 'https://gm/record:host')
+        self.flight._join(other)
+        self.flight.forget('network/ZG5z:10.0.0.0/24/default')
+        self.assertEqual(1, len(self.flight))
+        self.flight.do(self.key, self._func())
+        self.assertEqual(1, len(self.calls))
+
+
+class TestConnectorCoalescing(unittest.TestCase):
+
+    def setUp(self):
+        super(TestConnectorCoalescing, self).setUp()
+        self.connector = connector.Connector({'host': 'infoblox.example.org',
+                                              'username': 'admin',
+                                              'password': 'password'})
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def _get(self, url, **kwargs):
+        self.started.set()
+        self.release.wait()
+        return mock.Mock(status_code=200, content=b'[{"_ref": "network/1"}]')
+
+    def test_identical_searches_share_request(self):
+        results = queue.Queue()
+
+        def search():
+            results.put(self.connector.get_object('network'))
+
+        with mock.patch.object(self.connector.session, 'get',
+                               side_effect=self._get) as get:
+            threads = [threading.Thread(target=search) for _ in range(4)]
+            threads[0].start()
+            self.started.wait()
+            for thread in threads[1:]:
+                thread.start()
+            while self.connector.coalesced_requests < 3:
+                threading.Event().wait(0.001)
+            self.release.set()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(1, get.call_count)
+        self.assertEqual([[{'_ref': 'network/1'}]] * 4,
+                         [results.get() for _ in range(4)])
+
+    def test_change_stops_joining_search_in_flight(self):
+        flight = self.connector.gets_in_flight
+        flight._join(flight.make_key('network', 'url'))
+        with mock.patch.object(
+                self.connector.session, 'delete',
+                return_value=mock.Mock(status_code=200,
+                                       content=b'"network/1"')):
+            self.connector.delete_object('network/1')
+        self.assertEqual(0, len(flight))
+
+    def test_search_started_during_change_is_not_joined_after_it(self):
+        flight = self.connector.gets_in_flight
+
+        def delete(url, **kwargs):
+            flight._join(flight.make_key('network', 'url'))
+            return mock.Mock(status_code=200, content=b'"network/1"')
+
+        with mock.patch.object(self.connector.session, 'delete',
+                               side_effect=delete):
+            self.connector.delete_object('network/1')
+        self.assertEqual(0, len(flight))
+
+    def test_disabled(self):
+        conn = connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password',
+                                    'coalesce_gets': False})
+        self.assertIsNone(conn.gets_in_flight)
+        self.assertEqual(0, conn.coalesced_requests)
@@ -0,0 +1,140 @@
+# Copyright 2015 Infoblox Inc.
+# All Rights Reserved.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+import threading
+import time
+import unittest
+
+import mock
+
+from infoblox_client import connector
+from infoblox_client import throttle
+
+
+class TestTokenBucket(unittest.TestCase):
+
+    def test_reserve(self):
+        now = [0]
+        bucket = throttle.TokenBucket(2, timer=lambda: now[0])
+        # burst of 'capacity' requests is not delayed
+        self.assertEqual(0, bucket.reserve())
+        self.assertEqual(0, bucket.reserve())
+        # next requests are queued one after another
+        self.assertEqual(0.5, bucket.reserve())
+        self.assertEqual(1.0, bucket.reserve())
+        now[0] = 1.0
+        self.assertEqual(0.5, bucket.reserve())
+
+    def test_invalid_rate(self):
+        self.assertRaises(ValueError, throttle.TokenBucket, 0)
+
+
+class TestRequestGovernor(unittest.TestCase):
+
+    def test_rate_limit(self):
+        sleep = mock.Mock()
+        governor = throttle.RequestGovernor(rate=1, sleep=sleep)
+        with governor:
+            pass
+        self.assertFalse(sleep.called)
+        with governor:
+            pass
+        self.assertEqual(1, sleep.call_count)
+
+    def test_max_in_flight(self):
+        governor = throttle.RequestGovernor(max_in_flight=2)
+        lock = threading.Lock()
+        state = {'running': 0, 'max': 0}
+
+        def request():
+            with governor:
+                with lock:
+                    state['running'] += 1
+                    state['max'] = max(state['max'], state['running'])
+                time.sleep(0.005)
+                with lock:
+                    state['running'] -= 1
+
+        threads = [threading.Thread(target=request) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(2, state['max'])
+
+    def test_acquired_slot_is_released_once(self):
+        governor = throttle.RequestGovernor(max_in_flight=1)
+        slot = governor.acquire()
+        self.assertFalse(governor.semaphore.acquire(False))
+        slot.release()
+        slot.release()
+        self.assertTrue(governor.semaphore.acquire(False))
+        self.assertFalse(governor.semaphore.acquire(False))
+
+    def test_no_limits(self):
+        governor = throttle.RequestGovernor()
+        with governor:
+            self.assertIsNone(governor.bucket)
+            self.assertIsNone(governor.semaphore)
+
+
+class TestConnectorGovernors(unittest.TestCase):
+
+    def test_reads_and_writes_are_limited_separately(self):
+        conn = connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password',
+                                    'read_rate_limit': 100,
+                                    'max_writes_in_flight': 5})
+        self.assertEqual(100, conn._read_governor.bucket.rate)
+        self.assertIsNone(conn._read_governor.semaphore)
+        self.assertIsNone(conn._write_governor.bucket)
+        self.assertIs(conn._write_governor, conn._get_governor('post'))
+        self.assertIs(conn._write_governor, conn._get_governor('delete'))
+        self.assertIs(conn._read_governor, conn._get_governor('get'))
+
+    def test_request_goes_through_governor(self):
+        conn = connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password'})
+        conn._write_governor = mock.MagicMock()
+        with mock.patch.object(conn.session, 'delete') as delete:
+            delete.return_value.status_code = 200
+            delete.return_value.content = '"network/1"'
+            conn.delete_object('network/1')
+        conn._write_governor.__enter__.assert_called_once_with()
+        conn._write_governor.__exit__.assert_called_once_with(
+            None, None, None)
+
+    def test_streamed_reply_holds_slot_until_read(self):
+        conn = connector.Connector({'host': 'infoblox.example.org',
+                                    'username': 'admin',
+                                    'password': 'password',
+                                    'stream_pages': True,
+                                    'max_reads_in_flight': 1})
+        semaphore = conn._read_governor.semaphore
+        reply = mock.Mock(status_code=200)
+        reply.iter_content.return_value = [b'{"result": [1, 2]}']
+        with mock.patch.object(conn.session, 'get', return_value=reply):
+            items = conn.iter_objects('network')
+            self.assertEqual(1, next(items))
+            self.assertFalse(semaphore.acquire(False))
+            self.assertEqual([2], list(items))
+        self.assertTrue(semaphore.acquire(False))
+        semaphore.release()
+
+        not_found = mock.Mock(status_code=404, content=b'not found')
+        with mock.patch.object(conn.session, 'get', return_value=not_found):
+            self.assertIsNone(conn.get_object('network', paging=True))
+        self.assertTrue(semaphore.acquire(False))
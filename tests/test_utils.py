@@ -90,3 +90,13 @@ class TestUtils(unittest.TestCase):
         mac = 123
         with self.assertRaises(ValueError):
             utils.generate_duid(mac)
+
+    def test_background_call(self):
+        call = utils.BackgroundCall(lambda x, y=0: x + y, 1, y=2)
+        self.assertEqual(3, call())
+
+    def test_background_call_reraises_exception(self):
+        def fail():
+            raise ValueError()
+
+        self.assertRaises(ValueError, utils.BackgroundCall(fail))